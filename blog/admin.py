@@ -1,7 +1,14 @@
 from django.contrib import admin
+from django.contrib.admin.views.main import PAGE_VAR
+from django.core.cache import cache
+from django.db.models import Min
 from django.shortcuts import render
-from .models import Contact, Project, Supplier, Equipment, StockItem, Inspection, VehicleRecord
+from django.utils import timezone
+from datetime import timedelta
+from .models import Contact, Project, Supplier, Equipment, StockItem, Inspection, VehicleRecord, VehicleRecordQuerySet, PdfJob, StockMovement, DailyVehicleSummary
 from django.contrib.auth.decorators import login_required
+from .pagination import EstimatedCountPaginator
+from .search import filter_queryset
 
 # ----------------------------
 # CONTACT ADMIN
@@ -28,6 +35,7 @@ class ContactAdmin(admin.ModelAdmin):
 class SupplierAdmin(admin.ModelAdmin):
     list_display = ('id', 'name', 'contact_person', 'phone', 'email', 'date_added')
     search_fields = ('name', 'contact_person', 'phone')
+    ordering = ('name',)
 
 
 # ----------------------------
@@ -50,6 +58,21 @@ class StockItemAdmin(admin.ModelAdmin):
     list_filter = ('supplier',)
 
 
+# ----------------------------
+# STOCK MOVEMENT ADMIN
+# ----------------------------
+@admin.register(StockMovement)
+class StockMovementAdmin(admin.ModelAdmin):
+    list_display = ('id', 'stock_item', 'kind', 'quantity', 'vehicle_record', 'note', 'created_at')
+    list_filter = ('kind',)
+    list_select_related = ('stock_item', 'vehicle_record')
+    raw_id_fields = ('stock_item', 'vehicle_record')
+
+    # the ledger is append-only; quantities change through blog.stock
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
 # # ----------------------------
 # # INSPECTION ADMIN
 # # ----------------------------
@@ -59,12 +82,110 @@ class StockItemAdmin(admin.ModelAdmin):
 #     search_fields = ('equipment__name', 'inspector_name')
 #     list_filter = ('status',)
 
+class ProductTypeFilter(admin.SimpleListFilter):
+    # product_type is free text; the stock list_filter would run a DISTINCT
+    # over the whole table on every changelist load, so cache the choices
+    title = 'product type'
+    parameter_name = 'product_type'
+
+    def lookups(self, request, model_admin):
+        product_types = cache.get_or_set(
+            'blog:vehicle-product-types',
+            lambda: list(VehicleRecord.objects.order_by('product_type')
+                         .values_list('product_type', flat=True).distinct()),
+            600,
+        )
+        return [(p, p) for p in product_types]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(product_type=self.value())
+        return queryset
+
+
+class SeekDatesQuerySet(VehicleRecordQuerySet):
+    """
+    date_hierarchy lists its years/months/days with DISTINCT over a date
+    truncation of every matching row. This finds the same buckets with one
+    MIN() index seek per bucket, which stays fast however many rows there are.
+    """
+
+    def datetimes(self, field_name, kind, order='ASC', tzinfo=None):
+        if kind not in ('year', 'month', 'day'):
+            return super().datetimes(field_name, kind, order, tzinfo)
+        tz = tzinfo or timezone.get_current_timezone()
+        queryset = self.order_by()
+        buckets = []
+        current = queryset.aggregate(first=Min(field_name))['first']
+        while current is not None:
+            local = timezone.localtime(current, tz)
+            if kind == 'year':
+                bucket = local.replace(month=1, day=1, hour=0, minute=0, second=0, microsecond=0)
+                following = bucket.replace(year=bucket.year + 1)
+            elif kind == 'month':
+                bucket = local.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+                following = (bucket + timedelta(days=32)).replace(day=1)
+            else:
+                bucket = local.replace(hour=0, minute=0, second=0, microsecond=0)
+                following = bucket + timedelta(days=1)
+            buckets.append(bucket)
+            following = timezone.make_aware(following.replace(tzinfo=None), tz)
+            current = queryset.filter(**{f'{field_name}__gte': following}).aggregate(first=Min(field_name))['first']
+        return buckets[::-1] if order == 'DESC' else buckets
+
+
 @admin.register(VehicleRecord)
 class VehicleRecordAdmin(admin.ModelAdmin):
     list_display = ('vehicle_number', 'driver_name', 'driver_phone', 'supplier', 'product_type', 'quantity', 'entry_time', 'exit_time')
-    search_fields = ('vehicle_number', 'driver_name', 'supplier__name', 'product_type')
-    list_filter = ('vehicle_type', 'product_type', 'supplier')    
-    
+    search_fields = ('vehicle_number', 'driver_name')
+    list_filter = ('vehicle_type', ProductTypeFilter, 'supplier')
+    list_select_related = ('supplier',)
+    autocomplete_fields = ('supplier',)
+    date_hierarchy = 'entry_time'
+    ordering = ('-entry_time', '-id')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        return SeekDatesQuerySet(model=queryset.model, query=queryset.query, using=queryset.db)
+
+    def get_paginator(self, request, queryset, per_page, orphans=0, allow_empty_first_page=True):
+        # count far enough past the requested page before the changelist
+        # reads the total, so pages beyond the count cap stay reachable
+        paginator = super().get_paginator(request, queryset, per_page, orphans, allow_empty_first_page)
+        paginator.extend_to(request.GET.get(PAGE_VAR))
+        return paginator
+
+    def get_search_results(self, request, queryset, search_term):
+        # served from the full-text index instead of icontains scans
+        if not search_term.strip():
+            return queryset, False
+        return filter_queryset('vehicle', search_term, queryset), False
+
+
+@admin.register(PdfJob)
+class PdfJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'kind', 'status', 'created_at', 'started_at', 'finished_at')
+    list_filter = ('status', 'kind')
+    readonly_fields = ('started_at', 'finished_at', 'error')
+
+
+@admin.register(DailyVehicleSummary)
+class DailyVehicleSummaryAdmin(admin.ModelAdmin):
+    list_display = ('date', 'supplier', 'product_type', 'vehicle_type', 'vehicles', 'total_quantity', 'average_dwell')
+    list_filter = ('product_type', 'vehicle_type')
+    list_select_related = ('supplier',)
+    date_hierarchy = 'date'
+    ordering = ('-date',)
+
+    # rebuilt from vehicle records by blog.rollups; never edited by hand
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
 @login_required
 def dashboard(request):
     # only logged in users can access
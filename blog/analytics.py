@@ -0,0 +1,140 @@
+from datetime import datetime, timezone as dt_timezone
+
+from django.core.exceptions import EmptyResultSet
+from django.db import connections
+from django.db.models import TextField
+from django.db.models.functions import Cast
+from django.utils import timezone
+
+try:
+    import numpy as np
+except ImportError:  # optional: the dwell dashboard says so instead
+    np = None
+
+DWELL_BINS_MINUTES = [0, 30, 60, 120, 240, 480, 1440]
+PERCENTILES = [50, 90, 95, 99]
+
+
+# ------------------ Column Loading ------------------
+# The values_list() SQL is run on a plain cursor so rows come back as the
+# driver's native values; NumPy then parses whole columns at once instead
+# of Django converting every datetime and Decimal one by one. SQLite's
+# driver would still build a datetime per value for timestamp columns, so
+# there they are read as text, which NumPy parses itself.
+
+def _fetch_columns(queryset, fields, datetime_fields=()):
+    if datetime_fields and connections[queryset.db].vendor == 'sqlite':
+        queryset = queryset.annotate(**{f'{f}_text': Cast(f, TextField()) for f in datetime_fields})
+        fields = [f'{f}_text' if f in datetime_fields else f for f in fields]
+    try:
+        sql, params = queryset.values_list(*fields).query.sql_with_params()
+    except EmptyResultSet:
+        return [()] * len(fields)
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+    return list(zip(*rows)) if rows else [()] * len(fields)
+
+
+def _datetimes(values):
+    first = next((v for v in values if v is not None), None)
+    if isinstance(first, datetime) and first.tzinfo is not None:
+        # aware values (PostgreSQL) are all UTC; NumPy only takes naive ones
+        values = [v.replace(tzinfo=None) if v is not None else None for v in values]
+    return np.array(values, dtype='datetime64[us]')
+
+
+def load_vehicle_columns(queryset):
+    """entry/exit as datetime64 (UTC, NaT when still on site), quantity as float, supplier id (-1 for none)."""
+    if np is None:
+        raise ValueError("Gate analytics need the numpy package")
+    entry, exit_, quantity, supplier = _fetch_columns(
+        queryset, ['entry_time', 'exit_time', 'quantity', 'supplier_id'], datetime_fields=('entry_time', 'exit_time'),
+    )
+    return {
+        'entry': _datetimes(entry),
+        'exit': _datetimes(exit_),
+        'quantity': np.array(quantity, dtype=float),
+        'supplier': np.array([-1 if s is None else s for s in supplier], dtype=np.int64),
+    }
+
+
+def _localize(values):
+    """
+    UTC datetime64 values in the current time zone, each at the offset in
+    force at that instant. Offsets and their changes fall on quarter hours,
+    so one lookup per quarter-hour slot covers every value in it.
+    """
+    if not len(values):
+        return values
+    slots, index = np.unique(values.astype('datetime64[m]').astype(np.int64) // 15, return_inverse=True)
+    offsets = np.array([
+        timezone.localtime(datetime.fromtimestamp(int(slot) * 900, dt_timezone.utc)).utcoffset().total_seconds()
+        for slot in slots
+    ], dtype=np.int64)
+    return values + offsets[index.ravel()].astype('timedelta64[s]')
+
+
+# ------------------ Dwell Statistics ------------------
+
+def _group_medians(groups, values):
+    """Median of `values` within each group id, for ids sorted ascending."""
+    if not len(values):
+        return groups, values
+    order = np.lexsort((values, groups))
+    groups, values = groups[order], values[order]
+    starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]])
+    counts = np.diff(np.r_[starts, len(groups)])
+    low = values[starts + (counts - 1) // 2]
+    high = values[starts + counts // 2]
+    return groups[starts], (low + high) / 2
+
+
+def dwell_stats(queryset):
+    """Gate dwell, arrival and supplier turnaround figures for a VehicleRecord queryset."""
+    columns = load_vehicle_columns(queryset)
+    entry, exit_ = columns['entry'], columns['exit']
+    exited = ~np.isnat(exit_)
+    dwell = (exit_[exited] - entry[exited]) / np.timedelta64(1, 'm')
+
+    stats = {
+        'vehicles': len(entry),
+        'exited': int(exited.sum()),
+        'on_site': int((~exited).sum()),
+        'total_quantity': float(columns['quantity'].sum()),
+        'mean_dwell': float(dwell.mean()) if len(dwell) else None,
+        'percentiles': dict(zip(PERCENTILES, np.percentile(dwell, PERCENTILES).tolist())) if len(dwell) else {},
+    }
+
+    bins = DWELL_BINS_MINUTES + [max(DWELL_BINS_MINUTES[-1], dwell.max(initial=0)) + 1]
+    counts, _ = np.histogram(dwell, bins=bins)
+    stats['dwell_histogram'] = [
+        (f"{lo}–{hi} min" if i < len(DWELL_BINS_MINUTES) - 1 else f"{lo}+ min", int(n))
+        for i, (lo, hi, n) in enumerate(zip(bins[:-1], bins[1:], counts))
+    ]
+
+    # arrivals per hour of the local day, averaged over the days covered
+    local = _localize(entry)
+    hours = (local - local.astype('datetime64[D]')) // np.timedelta64(1, 'h')
+    days = len(np.unique(local.astype('datetime64[D]'))) or 1
+    stats['hourly_arrivals'] = (np.bincount(hours.astype(np.int64), minlength=24) / days).round(2).tolist()
+
+    # turnaround per supplier, over the vehicles that have left
+    suppliers = columns['supplier'][exited]
+    ids, per_supplier = np.unique(suppliers, return_counts=True)
+    index = np.searchsorted(ids, suppliers)
+    total_dwell = np.bincount(index, weights=dwell, minlength=len(ids))
+    quantity = np.bincount(index, weights=columns['quantity'][exited], minlength=len(ids))
+    _, medians = _group_medians(suppliers, dwell)
+    stats['suppliers'] = [
+        {
+            'supplier_id': None if sid == -1 else int(sid),
+            'vehicles': int(n),
+            'mean_dwell': float(total / n),
+            'median_dwell': float(median),
+            'quantity': float(q),
+        }
+        for sid, n, total, median, q in zip(ids, per_supplier, total_dwell, medians, quantity)
+    ]
+    stats['suppliers'].sort(key=lambda row: row['mean_dwell'], reverse=True)
+    return stats
@@ -0,0 +1,172 @@
+import re
+import urllib.request
+from functools import cache
+from pathlib import Path
+from urllib.parse import urljoin, urlsplit
+
+from django.conf import settings
+from django.templatetags.static import static
+
+STATIC_SOURCE = Path(__file__).resolve().parent / "static"
+
+
+# ------------------ Vendored Front-end Libraries ------------------
+# The CSS/JS libraries the templates link to, by CDN URL and by the path
+# of a pinned copy under blog/static/vendor/. `manage.py build_assets`
+# downloads the copies (and the fonts their CSS refers to). Which one the
+# pages use is decided by VENDOR_ASSETS_LOCAL alone, never by whether a
+# file happens to exist: with it on, a missing copy fails the blog.E002
+# check and collectstatic (blog.storage).
+
+VENDOR_ASSETS = {
+    'bootstrap.css': (
+        "https://cdn.jsdelivr.net/npm/bootstrap@5.3.3/dist/css/bootstrap.min.css",
+        "vendor/bootstrap-5.3.3/bootstrap.min.css",
+    ),
+    'bootstrap.js': (
+        "https://cdn.jsdelivr.net/npm/bootstrap@5.3.3/dist/js/bootstrap.bundle.min.js",
+        "vendor/bootstrap-5.3.3/bootstrap.bundle.min.js",
+    ),
+    'bootstrap-icons.css': (
+        "https://cdn.jsdelivr.net/npm/bootstrap-icons@1.11.3/font/bootstrap-icons.min.css",
+        "vendor/bootstrap-icons-1.11.3/bootstrap-icons.min.css",
+    ),
+    'animate.css': (
+        "https://cdnjs.cloudflare.com/ajax/libs/animate.css/4.1.1/animate.min.css",
+        "vendor/animate-4.1.1/animate.min.css",
+    ),
+    'fontawesome.css': (
+        "https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.6.0/css/all.min.css",
+        "vendor/fontawesome-6.6.0/css/all.min.css",
+    ),
+    'chart.js': (
+        "https://cdn.jsdelivr.net/npm/chart.js@4.4.4/dist/chart.umd.min.js",
+        "vendor/chartjs-4.4.4/chart.umd.min.js",
+    ),
+    'oil-industry.png': (
+        "https://img.icons8.com/office/200/oil-industry.png",
+        "vendor/icons8/oil-industry.png",
+    ),
+}
+
+CSS_URL = re.compile(r"url\(\s*['\"]?([^'\")]+)['\"]?\s*\)")
+
+
+def vendor_url(name):
+    cdn_url, path = VENDOR_ASSETS[name]
+    return static(path) if settings.VENDOR_ASSETS_LOCAL else cdn_url
+
+
+def _local_refs(css):
+    """Relative url() targets of a stylesheet: its fonts and images."""
+    for ref in set(CSS_URL.findall(css)):
+        if not ref.startswith(('data:', 'http:', 'https:', '//', '#')):
+            yield urlsplit(ref).path
+
+
+def missing_vendor_files():
+    """Vendored files (and files their CSS refers to) absent from blog/static, as static paths."""
+    missing = []
+    for _, path in VENDOR_ASSETS.values():
+        target = STATIC_SOURCE / path
+        if not target.exists():
+            missing.append(path)
+        elif path.endswith('.css'):
+            for ref in _local_refs(target.read_text(errors='replace')):
+                if not (target.parent / ref).resolve().exists():
+                    missing.append(str((target.parent / ref).resolve().relative_to(STATIC_SOURCE.resolve())))
+    return sorted(set(missing))
+
+
+def _fetch(url):
+    request = urllib.request.Request(url, headers={'User-Agent': 'petroleum-hub build_assets'})
+    with urllib.request.urlopen(request, timeout=30) as response:
+        return response.read()
+
+
+def download_vendor_assets(force=False):
+    """Download every vendored file that is missing; return the paths written."""
+    written = []
+    for cdn_url, path in VENDOR_ASSETS.values():
+        target = STATIC_SOURCE / path
+        if target.exists() and not force:
+            continue
+        body = _fetch(cdn_url)
+        files = {target: body}
+        if path.endswith('.css'):
+            # fonts and images referenced relative to the stylesheet
+            for ref in _local_refs(body.decode()):
+                files[(target.parent / ref).resolve()] = _fetch(urljoin(cdn_url, ref))
+        for file_path, content in files.items():
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            file_path.write_bytes(content)
+            written.append(file_path)
+    return written
+
+
+# ------------------ Responsive Image Variants ------------------
+# Downscaled AVIF/WebP copies of the large page images, written next to the
+# sources as images/variants/<name>-<width>w.<format> and picked by the
+# {% picture %} tag and the body background.
+
+HERO_IMAGES = [
+    "images/backround-image.png",
+    "images/consalting.webp",
+    "images/contact-us.jpg",
+    "images/gass managment.webp",
+    "images/oil trading.jpeg",
+]
+VARIANT_WIDTHS = (480, 800, 1280)
+VARIANT_FORMATS = {
+    # format: (mime type, Pillow save options)
+    'avif': ('image/avif', {'quality': 55}),
+    'webp': ('image/webp', {'quality': 78, 'method': 6}),
+}
+VARIANT_NAME = re.compile(r"^(.+)-(\d+)w\.(\w+)$")
+
+
+def variant_path(source, width, fmt):
+    stem = Path(source).stem.replace(" ", "-")
+    return f"images/variants/{stem}-{width}w.{fmt}"
+
+
+def variant_widths(width):
+    """Target widths for an image `width` pixels wide; never upscales."""
+    return sorted({w for w in VARIANT_WIDTHS if w < width} | {width})
+
+
+def build_image_variants(force=False):
+    from PIL import Image
+
+    written = []
+    for source in HERO_IMAGES:
+        with Image.open(STATIC_SOURCE / source) as image:
+            image = image.convert('RGB')
+            for width in variant_widths(image.width):
+                resized = None
+                for fmt, (_, options) in VARIANT_FORMATS.items():
+                    target = STATIC_SOURCE / variant_path(source, width, fmt)
+                    if target.exists() and not force:
+                        continue
+                    if resized is None:
+                        height = round(image.height * width / image.width)
+                        resized = image.resize((width, height), Image.LANCZOS)
+                    target.parent.mkdir(parents=True, exist_ok=True)
+                    resized.save(target, fmt.upper(), **options)
+                    written.append(target)
+    return written
+
+
+@cache
+def image_variants(source):
+    """{mime type: [(static path, width), ...]} for the variants built for `source`."""
+    stem = Path(source).stem.replace(" ", "-")
+    found = {fmt: [] for fmt in VARIANT_FORMATS}
+    for file in (STATIC_SOURCE / "images" / "variants").glob(f"{stem}-*"):
+        match = VARIANT_NAME.match(file.name)
+        if match and match.group(1) == stem and match.group(3) in found:
+            found[match.group(3)].append((f"images/variants/{file.name}", int(match.group(2))))
+    return {
+        VARIANT_FORMATS[fmt][0]: sorted(files, key=lambda item: item[1])
+        for fmt, files in found.items() if files
+    }
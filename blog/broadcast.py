@@ -0,0 +1,74 @@
+import asyncio
+import json
+import threading
+
+from .models import StockItem
+
+
+# ------------------ In-process Broadcaster ------------------
+# Each connected client owns an asyncio.Queue on the event loop that serves it.
+# Publishers may run in any thread (signal handlers fire in sync workers), so
+# messages are handed to each loop with call_soon_threadsafe.
+
+class Broadcaster:
+    def __init__(self, max_pending=10):
+        self.max_pending = max_pending
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def has_subscribers(self):
+        return bool(self._subscribers)
+
+    def subscribe(self):
+        subscription = (asyncio.get_running_loop(), asyncio.Queue(maxsize=self.max_pending))
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def publish(self, message):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._deliver, queue, message)
+            except RuntimeError:
+                # the client's loop is already closed
+                self.unsubscribe((loop, queue))
+
+    @staticmethod
+    def _deliver(queue, message):
+        # a slow client only ever needs the latest state, so drop the oldest
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(message)
+
+
+low_stock_feed = Broadcaster()
+
+
+# ------------------ Low Stock Snapshots ------------------
+
+def low_stock_queryset():
+    return StockItem.objects.low().values('id', 'name', 'quantity', 'min_level')
+
+
+def _snapshot(low_items):
+    return json.dumps({'low_stock_count': len(low_items), 'low_items': low_items})
+
+
+def low_stock_snapshot():
+    return _snapshot(list(low_stock_queryset()))
+
+
+async def alow_stock_snapshot():
+    return _snapshot([item async for item in low_stock_queryset()])
+
+
+def publish_low_stock():
+    """Push the current low-stock list to every connected client (one query, any number of clients)."""
+    if low_stock_feed.has_subscribers():
+        low_stock_feed.publish(low_stock_snapshot())
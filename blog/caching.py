@@ -0,0 +1,114 @@
+import hashlib
+import time
+from datetime import datetime, timezone
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.views.decorators.http import condition
+from django.views.decorators.vary import vary_on_cookie
+
+
+# ------------------ Model Version Counters ------------------
+# Cached fragments that show rows of a model put that model's version in
+# their key. Saves and deletes bump the version (blog.signals), so a stale
+# fragment is never read again and simply expires. Counters start from the
+# clock, so an evicted counter can't come back at a value already used.
+
+def _version_key(label):
+    return f"blog:version:{label}"
+
+
+def _modified_key(label):
+    return f"blog:modified:{label}"
+
+
+def _stamps(labels):
+    """Versions and last-modified times (epoch seconds) of the labels, in one cache lookup."""
+    labels = [label.lower() for label in labels]
+    keys = [_version_key(label) for label in labels] + [_modified_key(label) for label in labels]
+    found = cache.get_many(keys)
+    now = time.time_ns()
+    # a lost modified time could hide a change from If-Modified-Since, so
+    # it comes back as "just now"
+    missing = {key: now if key.startswith("blog:version:") else now / 1e9 for key in keys if key not in found}
+    if missing:
+        cache.set_many(missing, None)
+        found.update(missing)
+    return [found[_version_key(label)] for label in labels], [found[_modified_key(label)] for label in labels]
+
+
+def model_versions(*labels):
+    """One cache lookup for the combined version of the given model labels."""
+    versions, _ = _stamps(labels)
+    return ".".join(str(version) for version in versions)
+
+
+def _bump(label):
+    key = _version_key(label)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
+    cache.set(_modified_key(label), time.time(), None)
+
+
+def bump_model_version(model):
+    label = model._meta.label_lower
+    _bump(label)
+    # a request reading before COMMIT could cache the old rows under the new
+    # version, so bump once more when the change becomes visible
+    if connection.in_atomic_block:
+        transaction.on_commit(lambda: _bump(label))
+
+
+# ------------------ Change Stamps ------------------
+# Every bump also records when it happened, so the counters double as the
+# change stamps for conditional GET: the combined version is the ETag and
+# the latest bump the Last-Modified date. A client revalidating a page
+# nothing has touched gets a 304 without a single database query.
+
+def change_stamp(*labels):
+    """(version, last modified datetime) for the given model labels."""
+    versions, modified = _stamps(labels)
+    return ".".join(str(version) for version in versions), datetime.fromtimestamp(max(modified), timezone.utc)
+
+
+def conditional_on(*labels, per_session=False):
+    """
+    condition() for a view whose response only changes with the given
+    models. per_session is for HTML pages, whose navbar follows the login:
+    the ETag then also covers the session cookie (hashed) and the response
+    varies on Cookie.
+    """
+    def stamp(request):
+        # condition() asks for the date and the ETag separately
+        if not hasattr(request, '_change_stamp'):
+            request._change_stamp = change_stamp(*labels)
+        return request._change_stamp
+
+    def etag(request, *args, **kwargs):
+        version = stamp(request)[0]
+        if per_session:
+            session = request.COOKIES.get(settings.SESSION_COOKIE_NAME, '')
+            version += "-" + hashlib.sha256(session.encode()).hexdigest()[:16]
+        return f'"{version}"'
+
+    def last_modified(request, *args, **kwargs):
+        return stamp(request)[1]
+
+    def decorator(view):
+        conditional = condition(etag_func=etag, last_modified_func=last_modified)(view)
+        if iscoroutinefunction(view):
+            # condition() asks for the stamp synchronously; look it up in a
+            # thread first so an async view never reads the cache on the loop
+            @wraps(view)
+            async def conditional_view(request, *args, **kwargs):
+                request._change_stamp = await sync_to_async(change_stamp)(*labels)
+                return await conditional(request, *args, **kwargs)
+        else:
+            conditional_view = conditional
+        return vary_on_cookie(conditional_view) if per_session else conditional_view
+    return decorator
@@ -0,0 +1,105 @@
+from collections import defaultdict
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import ChangeLog, StockItem, VehicleRecord
+
+
+# ------------------ Delta Sync ------------------
+# Depot tablets keep the cursor of their last sync and ask only for what
+# changed after it. Every save, bulk change or delete of a feed's model
+# (blog/signals.py) replaces the object's ChangeLog entry with a new one,
+# so the log holds one row per object plus tombstones, and a sync returns
+# each changed object once, in its current state.
+#
+# A cursor only works if entries become visible in id order. Entries are
+# therefore written after the change commits, in a short transaction of
+# their own that (on PostgreSQL) holds an advisory lock from drawing the
+# ids to committing them. Otherwise a long transaction could commit an
+# entry below a cursor a client has already moved past. SQLite's single
+# writer gives the same order.
+
+class SyncFeed:
+    def __init__(self, model, fields):
+        self.model = model
+        self.fields = fields
+
+
+FEEDS = {
+    'stock': SyncFeed(StockItem, ('id', 'name', 'fuel_type', 'supplier_id', 'quantity', 'min_level',
+                                  'last_updated')),
+    'vehicle': SyncFeed(VehicleRecord, ('id', 'vehicle_number', 'vehicle_type', 'driver_name', 'driver_phone',
+                                        'supplier_id', 'product_type', 'quantity', 'entry_time', 'exit_time',
+                                        'remarks', 'checked_by')),
+}
+
+# object ids per statement, well under SQLite's bound-parameter limit
+LOG_BATCH = 500
+
+# pg_advisory_xact_lock key serializing log writes
+LOG_LOCK_ID = 0x6368616e6765
+
+
+def log_changes(kind, pks, deleted=False):
+    """Log the objects as changed (or deleted) once the current transaction commits."""
+    pks = list(pks)
+    if pks:
+        transaction.on_commit(lambda: _write_log(kind, pks, deleted))
+
+
+def _write_log(kind, pks, deleted):
+    with transaction.atomic():
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_xact_lock(%s)", [LOG_LOCK_ID])
+        for start in range(0, len(pks), LOG_BATCH):
+            batch = pks[start:start + LOG_BATCH]
+            ChangeLog.objects.filter(kind=kind, object_id__in=batch).delete()
+            ChangeLog.objects.bulk_create(ChangeLog(kind=kind, object_id=pk, deleted=deleted) for pk in batch)
+
+
+def changes_since(cursor, kinds=None, limit=1000):
+    """
+    Up to `limit` log entries after `cursor`, oldest first: the current rows
+    of changed objects and the ids of deleted ones, plus the cursor to send
+    next time and whether more entries are waiting.
+    """
+    kinds = list(kinds or FEEDS)
+    entries = list(
+        ChangeLog.objects.filter(id__gt=cursor, kind__in=kinds).order_by('id')
+        .values_list('id', 'kind', 'object_id', 'deleted')[:limit + 1]
+    )
+    more = len(entries) > limit
+    entries = entries[:limit]
+
+    changed = defaultdict(list)
+    deleted = {kind: [] for kind in kinds}
+    for _, kind, object_id, is_deleted in entries:
+        (deleted[kind] if is_deleted else changed[kind]).append(object_id)
+    # an object deleted since its entry was read is simply missing here;
+    # its tombstone comes with a later cursor
+    rows = {kind: [] for kind in kinds}
+    for kind, pks in changed.items():
+        feed = FEEDS[kind]
+        rows[kind] = list(feed.model.objects.filter(pk__in=pks).order_by('pk').values(*feed.fields))
+    return {
+        'cursor': entries[-1][0] if entries else cursor,
+        'more': more,
+        'changes': rows,
+        'deleted': deleted,
+    }
+
+
+def rebuild_change_log(kind):
+    """Log every current object of `kind` afresh, e.g. after a load that sent no signals."""
+    feed = FEEDS[kind]
+    qn = connection.ops.quote_name
+    ChangeLog.objects.filter(kind=kind, deleted=False).delete()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {qn(ChangeLog._meta.db_table)} ({qn('kind')}, {qn('object_id')}, {qn('deleted')}, "
+            f"{qn('changed_at')}) SELECT %s, {qn(feed.model._meta.pk.column)}, %s, %s "
+            f"FROM {qn(feed.model._meta.db_table)} ORDER BY {qn(feed.model._meta.pk.column)}",
+            [kind, False, connection.ops.adapt_datetimefield_value(timezone.now())],
+        )
@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+from .assets import missing_vendor_files
+
+
+@register(Tags.staticfiles)
+def check_vendor_assets(app_configs, **kwargs):
+    # only when the pages link to the vendored copies; collectstatic stops
+    # on the same condition (blog.storage)
+    missing = missing_vendor_files() if settings.VENDOR_ASSETS_LOCAL else []
+    if not missing:
+        return []
+    return [Error(
+        f"{len(missing)} vendored static file(s) are missing from blog/static: {', '.join(missing)}",
+        hint="Run `manage.py build_assets` and commit blog/static/vendor/, or unset VENDOR_ASSETS_LOCAL.",
+        id='blog.E002',
+    )]
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    # version counters and the receipt size live in the cache; a per-process
+    # cache lets workers serve stale pages and 304s after another one writes
+    if settings.DEBUG:
+        return []
+    return [Error(
+        f"Cache '{alias}' uses LocMemCache, which is not shared between worker processes.",
+        hint="Set DJANGO_CACHE=file (or point CACHES at a shared backend).",
+        id='blog.E001',
+    ) for alias, config in settings.CACHES.items() if config['BACKEND'].endswith('.LocMemCache')]
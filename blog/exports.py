@@ -0,0 +1,60 @@
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .filters import filter_date_range
+from .models import Equipment, StockItem, Supplier, VehicleRecord
+
+
+# ------------------ Streaming Export ------------------
+# Rows are read with values_list().iterator() and written out one at a time,
+# so an export of any size holds only one database chunk in memory.
+
+class ExportSpec:
+    def __init__(self, model, fields, date_field):
+        self.model = model
+        self.fields = fields
+        self.date_field = date_field
+
+
+EXPORTS = {
+    'equipment': ExportSpec(Equipment, [
+        'id', 'name', 'type', 'condition', 'location', 'storage_capacity', 'date_added',
+    ], 'date_added'),
+    'suppliers': ExportSpec(Supplier, [
+        'id', 'name', 'company_type', 'contact_person', 'email', 'phone', 'address', 'date_added',
+    ], 'date_added'),
+    'stock': ExportSpec(StockItem, [
+        'id', 'name', 'fuel_type', 'supplier_id', 'supplier__name', 'quantity', 'min_level', 'last_updated',
+    ], 'last_updated'),
+    'vehicles': ExportSpec(VehicleRecord, [
+        'id', 'vehicle_number', 'driver_name', 'driver_phone', 'supplier_id', 'supplier__name',
+        'vehicle_type', 'product_type', 'quantity', 'entry_time', 'exit_time', 'remarks',
+        'checked_by', 'print_count',
+    ], 'entry_time'),
+}
+
+
+class _Echo:
+    # csv.writer only needs an object with write(); hand the line straight back
+    def write(self, value):
+        return value
+
+
+def export_rows(spec, params, fields, chunk_size=2000):
+    """Rows (tuples of `fields`) for an export, narrowed by the since/until parameters."""
+    rows = filter_date_range(spec.model.objects.order_by('pk'), spec.date_field, params, 'since', 'until')
+    return rows.values_list(*fields).iterator(chunk_size=chunk_size)
+
+
+def csv_lines(fields, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def ndjson_lines(fields, rows):
+    for row in rows:
+        yield json.dumps(dict(zip(fields, row)), cls=DjangoJSONEncoder) + "\n"
@@ -0,0 +1,33 @@
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+
+# ------------------ Query Parameter Filters ------------------
+
+def date_param(params, name):
+    """Parse a YYYY-MM-DD parameter; returns None when missing or invalid."""
+    try:
+        return parse_date(params.get(name) or '')
+    except ValueError:
+        return None
+
+
+def day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def filter_date_range(queryset, field, params, from_key='date_from', to_key='date_to'):
+    """
+    Narrow a queryset to the days given by two YYYY-MM-DD parameters
+    (both inclusive). Compared as a timestamp range so an index on the
+    field can be used, unlike the __date lookup.
+    """
+    date_from = date_param(params, from_key)
+    date_to = date_param(params, to_key)
+    if date_from:
+        queryset = queryset.filter(**{f'{field}__gte': day_start(date_from)})
+    if date_to:
+        queryset = queryset.filter(**{f'{field}__lt': day_start(date_to + timedelta(days=1))})
+    return queryset
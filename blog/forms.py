@@ -1,5 +1,5 @@
 from django import forms
-from .models import Equipment, Supplier, StockItem, VehicleRecord, Vehicle
+from .models import Equipment, Supplier, StockItem, StockMovement, VehicleRecord, Vehicle
 from django.contrib.auth.models import User
 
 class EquipmentForm(forms.ModelForm):
@@ -28,14 +28,38 @@ class SupplierForm(forms.ModelForm):
 class StockItemForm(forms.ModelForm):
     class Meta:
         model = StockItem
-        fields = ['name', 'supplier', 'quantity', 'min_level']
+        # fuel_type decides which gate deliveries are booked into the item
+        # (blog.stock.stock_item_for_vehicle)
+        fields = ['name', 'fuel_type', 'supplier', 'quantity', 'min_level']
         widgets = {
             'name': forms.TextInput(attrs={'class': 'form-control'}),
+            'fuel_type': forms.Select(attrs={'class': 'form-select'}),
             'supplier': forms.Select(attrs={'class': 'form-select'}),
             'quantity': forms.NumberInput(attrs={'class': 'form-control', 'min': 0}),
             'min_level': forms.NumberInput(attrs={'class': 'form-control', 'min': 0}),
         }
 
+class StockItemEditForm(StockItemForm):
+    # quantity as it was when the form was shown; the difference to the
+    # submitted value is applied as a ledger adjustment
+    original_quantity = forms.IntegerField(widget=forms.HiddenInput)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['original_quantity'].initial = self.instance.quantity
+
+class StockMovementForm(forms.ModelForm):
+    kind = forms.ChoiceField(choices=[('receipt', 'Receipt'), ('issue', 'Issue')],
+                             widget=forms.Select(attrs={'class': 'form-select'}))
+    quantity = forms.IntegerField(min_value=1, widget=forms.NumberInput(attrs={'class': 'form-control', 'min': 1}))
+
+    class Meta:
+        model = StockMovement
+        fields = ['kind', 'quantity', 'note']
+        widgets = {
+            'note': forms.TextInput(attrs={'class': 'form-control'}),
+        }
+
 class VehicleRecordForm(forms.ModelForm):
     class Meta:
         model = VehicleRecord
@@ -57,6 +81,15 @@ class VehicleForm(forms.ModelForm):
         model = Vehicle
         fields = '__all__'
         
+class ImportForm(forms.Form):
+    kind = forms.ChoiceField(choices=[
+        ('suppliers', 'Suppliers'),
+        ('stock', 'Stock Items'),
+        ('vehicles', 'Vehicle Records'),
+    ], widget=forms.Select(attrs={'class': 'form-select'}))
+    file = forms.FileField(help_text="CSV or .xlsx with a header row of field names",
+                           widget=forms.ClearableFileInput(attrs={'class': 'form-control', 'accept': '.csv,.xlsx'}))
+
 class UserLoginForm(forms.Form):
     username = forms.CharField(max_length=150, widget=forms.TextInput(attrs={'class':'form-control'}))
     password = forms.CharField(widget=forms.PasswordInput(attrs={'class':'form-control'}))
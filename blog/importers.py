@@ -0,0 +1,220 @@
+import csv
+import io
+from functools import cache
+from itertools import islice
+
+from django import forms
+from django.forms import modelform_factory
+from django.db import transaction
+
+from .forms import StockItemForm, SupplierForm, VehicleRecordForm
+from .models import StockItem, StockMovement, Supplier, VehicleRecord
+from .signals import bulk_changed
+from .stock import book_exits
+
+
+# ------------------ Bulk Import ------------------
+# Rows are validated with the same ModelForms as the add/edit pages, a chunk
+# at a time, and written with bulk_create/bulk_update. A row with an `id`
+# column updates that record; every other row creates a new one.
+
+class SupplierChoiceField(forms.Field):
+    """Resolves a supplier id or name from a lookup table loaded once per import."""
+
+    def __init__(self, suppliers, **kwargs):
+        kwargs.setdefault('required', False)
+        super().__init__(**kwargs)
+        self.suppliers = suppliers
+
+    def to_python(self, value):
+        value = (value or '').strip()
+        if not value:
+            return None
+        supplier = self.suppliers.get(value) or self.suppliers.get(value.lower())
+        if supplier is None:
+            raise forms.ValidationError(f"Unknown supplier: {value}")
+        return supplier
+
+
+class ImportSpec:
+    def __init__(self, model, form_class, extra_fields=None, update_exclude=(), after_write=None):
+        self.model = model
+        self.form_class = form_class
+        # model fields accepted by the import but not shown on the form
+        self.extra_fields = extra_fields or {}
+        self.update_exclude = update_exclude
+        # called with the created and updated objects inside the batch's
+        # transaction, for the work save() signals would otherwise do
+        self.after_write = after_write
+
+    def update_fields(self):
+        fields = dict.fromkeys([*self.form_class._meta.fields, *self.extra_fields])
+        return [f for f in fields if f not in self.update_exclude]
+
+
+def _book_exits(created, updated):
+    book_exits(created + updated)
+
+
+def _opening_balances(created, updated):
+    # bulk_create bypasses the ledger, so new items get an opening row that
+    # makes their movements add up to the imported quantity
+    StockMovement.objects.bulk_create(
+        StockMovement(stock_item=item, kind='adjustment', quantity=item.quantity, note="Opening balance (import)")
+        for item in created if item.quantity
+    )
+
+
+IMPORTS = {
+    'suppliers': ImportSpec(Supplier, SupplierForm, {
+        'company_type': forms.ChoiceField(choices=Supplier.COMPANY_TYPES, required=False),
+    }),
+    # quantities of existing items only change through the stock ledger,
+    # so updates neither need nor read a quantity column
+    'stock': ImportSpec(StockItem, StockItemForm, {
+        'fuel_type': forms.ChoiceField(choices=StockItem.FUEL_TYPES, required=False),
+    }, update_exclude=('quantity',), after_write=_opening_balances),
+    # rows that record an exit book the delivery into stock, as the gate does
+    'vehicles': ImportSpec(VehicleRecord, VehicleRecordForm, {
+        'entry_time': forms.DateTimeField(required=False),
+        'exit_time': forms.DateTimeField(required=False),
+    }, after_write=_book_exits),
+}
+
+
+class ImportResult:
+    def __init__(self):
+        self.processed = 0
+        self.created = 0
+        self.updated = 0
+        self.errors = []  # (row number, {field: [messages]})
+
+
+def read_rows(fileobj, filename):
+    """Yield each data row of a CSV or .xlsx file (opened in binary mode) as a dict keyed by the header row."""
+    if filename.lower().endswith('.xlsx'):
+        try:
+            from openpyxl import load_workbook
+        except ImportError:
+            raise ValueError("Excel import needs the openpyxl package; upload a CSV file instead")
+        sheet = load_workbook(fileobj, read_only=True, data_only=True).active
+        values = sheet.iter_rows(values_only=True)
+        header = [str(h or '').strip() for h in next(values, [])]
+        for row in values:
+            yield {h: ('' if v is None else str(v)) for h, v in zip(header, row) if h}
+    else:
+        text = io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline='')
+        for row in csv.DictReader(text):
+            yield {(k or '').strip(): (v or '').strip() for k, v in row.items()}
+
+
+def _import_forms(spec):
+    """
+    Return the form class for new rows and a function giving the form class
+    for update rows with a given set of columns. Extra fields and the
+    supplier lookup are declared on the form but left out of Meta.fields,
+    so construct_instance and the model-level checks skip them: the supplier
+    is already resolved, and the ForeignKey check would repeat that with an
+    exists() query per row. Update forms only have the columns the file
+    has, so a partial file leaves every other value of the record alone.
+    """
+    attrs = dict(spec.extra_fields)
+    fields = [f for f in spec.form_class._meta.fields if f not in attrs]
+    if 'supplier' in fields:
+        suppliers = {}
+        for supplier in Supplier.objects.all():
+            suppliers[str(supplier.pk)] = supplier
+            suppliers.setdefault(supplier.name.lower(), supplier)
+        fields.remove('supplier')
+        attrs['supplier'] = SupplierChoiceField(suppliers)
+
+    def form_for(declared, model_fields):
+        # the form metaclass pops the fields out of the dict it is given
+        base = type('ImportForm', (spec.form_class,), dict(declared))
+        return modelform_factory(spec.model, form=base, fields=model_fields)
+
+    @cache
+    def update_form(columns):
+        return form_for({name: field for name, field in attrs.items() if name in columns},
+                        [f for f in fields if f in columns and f not in spec.update_exclude])
+
+    return form_for(attrs, fields), update_form
+
+
+def _auto_now_add_fields(spec):
+    return [f.name for f in spec.model._meta.concrete_fields
+            if getattr(f, 'auto_now_add', False) and f.name in spec.extra_fields]
+
+
+def import_rows(kind, rows, batch_size=1000, progress=None):
+    """
+    Validate and save an iterable of row dicts for one of IMPORTS. Invalid
+    rows are skipped and reported; `progress(result)` is called per batch.
+    """
+    spec = IMPORTS[kind]
+    create_form, update_form_for = _import_forms(spec)
+    auto_fields = _auto_now_add_fields(spec)
+    update_fields = spec.update_fields()
+    result = ImportResult()
+    numbered = enumerate(rows, start=2)  # row 1 is the header
+
+    while True:
+        chunk = list(islice(numbered, batch_size))
+        if not chunk:
+            break
+        ids = [row['id'] for _, row in chunk if (row.get('id') or '').isdigit()]
+        existing = spec.model.objects.in_bulk([int(i) for i in ids])
+        to_create, to_update, restore = [], [], []
+
+        for row_number, row in chunk:
+            row_id = row.get('id') or ''
+            instance = existing.get(int(row_id)) if row_id.isdigit() else None
+            if row_id and instance is None:
+                message = f"No {kind} record with id {row_id}"
+                result.errors.append((row_number, {'id': [{'message': message, 'code': 'does_not_exist'}]}))
+                continue
+            if instance is None:
+                form = create_form(data=row)
+            else:
+                form = update_form_for(frozenset(row))(data=row, instance=instance)
+            if not form.is_valid():
+                result.errors.append((row_number, form.errors.get_json_data()))
+                continue
+            obj = form.save(commit=False)
+            if 'supplier' in form.fields:
+                obj.supplier = form.cleaned_data['supplier']
+            for name in spec.extra_fields:
+                if form.cleaned_data.get(name) not in (None, ''):
+                    setattr(obj, name, form.cleaned_data[name])
+            if instance is None:
+                to_create.append(obj)
+                # bulk_create stamps auto_now_add fields with the current
+                # time, so imported values are written back afterwards
+                if any(form.cleaned_data.get(name) for name in auto_fields):
+                    restore.append((obj, {name: form.cleaned_data[name] for name in auto_fields}))
+            else:
+                to_update.append(obj)
+
+        with transaction.atomic():
+            spec.model.objects.bulk_create(to_create, batch_size=batch_size)
+            if restore:
+                for obj, values in restore:
+                    for name, value in values.items():
+                        if value:
+                            setattr(obj, name, value)
+                spec.model.objects.bulk_update([obj for obj, _ in restore], auto_fields, batch_size=batch_size)
+            if to_update:
+                spec.model.objects.bulk_update(to_update, update_fields, batch_size=batch_size)
+            if spec.after_write:
+                spec.after_write(to_create, to_update)
+
+        changed = [obj.pk for obj in to_create + to_update if obj.pk]
+        if changed:
+            bulk_changed.send(sender=spec.model, pks=changed)
+        result.processed += len(chunk)
+        result.created += len(to_create)
+        result.updated += len(to_update)
+        if progress:
+            progress(result)
+
+    return result
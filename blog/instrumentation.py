@@ -0,0 +1,198 @@
+import contextvars
+import json
+import logging
+import time
+from contextlib import contextmanager
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import FileResponse
+from django.template.backends.django import DjangoTemplates, Template, reraise
+from django.template.exceptions import TemplateDoesNotExist
+from django.utils import timezone
+
+logger = logging.getLogger('blog.instrumentation')
+
+_current = contextvars.ContextVar('request_timings', default=None)
+
+
+# ------------------ Request Timings ------------------
+# One RequestTimings per request, reachable through a context variable so
+# the query wrapper, the template backend and the PDF code can add to it
+# without being handed the request.
+
+class RequestTimings:
+    KINDS = ('sql', 'render', 'pdf')
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.queries = 0
+        self.durations = dict.fromkeys(self.KINDS, 0.0)
+        self.open = set()
+
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+    def as_dict(self):
+        data = {f"{kind}_ms": round(seconds * 1000, 1) for kind, seconds in self.durations.items()}
+        data['total_ms'] = round(self.elapsed() * 1000, 1)
+        data['queries'] = self.queries
+        return data
+
+
+@contextmanager
+def timed(kind):
+    """Add the time spent in the block to the current request's `kind` total."""
+    timings = _current.get()
+    # nested blocks of the same kind (an include rendering a template) count once
+    if timings is None or kind in timings.open:
+        yield
+        return
+    timings.open.add(kind)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.durations[kind] += time.perf_counter() - start
+        timings.open.discard(kind)
+
+
+def record_query(execute, sql, params, many, context):
+    """Database execute wrapper; installed on every connection by blog.signals."""
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.queries += 1
+        timings.durations['sql'] += time.perf_counter() - start
+
+
+# ------------------ Template Backend ------------------
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        with timed('render'):
+            return super().render(context, request)
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """The Django template backend, timing every top-level render."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return TimedTemplate(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
+
+
+# ------------------ Middleware ------------------
+
+def server_timing(timings):
+    data = timings.as_dict()
+    return ", ".join([
+        f'sql;dur={data["sql_ms"]};desc="{data["queries"]} queries"',
+        f'render;dur={data["render_ms"]}',
+        f'pdf;dur={data["pdf_ms"]}',
+        f'total;dur={data["total_ms"]}',
+    ])
+
+
+def log_if_slow(request, response, timings, streamed=False):
+    data = timings.as_dict()
+    thresholds = settings.SLOW_REQUEST_THRESHOLDS
+    exceeded = [key for key, limit in thresholds.items() if data.get(key, 0) >= limit]
+    if not exceeded:
+        return
+    match = request.resolver_match
+    entry = {
+        'time': timezone.now().isoformat(),
+        'method': request.method,
+        'path': request.path,
+        'view': match.view_name if match else None,
+        'status': response.status_code,
+        'streamed': streamed,
+        'exceeded': exceeded,
+        **data,
+    }
+    logger.warning(json.dumps(entry))
+
+
+class SlowRequestFileHandler(RotatingFileHandler):
+    """RotatingFileHandler that creates the log directory on first write."""
+
+    def _open(self):
+        Path(self.baseFilename).parent.mkdir(parents=True, exist_ok=True)
+        return super()._open()
+
+
+class RequestTimingMiddleware:
+    """
+    Counts queries and times SQL, template rendering and PDF generation for
+    each request, reports them in a Server-Timing header and writes requests
+    over SLOW_REQUEST_THRESHOLDS to the slow-request log.
+
+    A streamed body is produced after the headers go out, so for streaming
+    responses the header covers the view only and the log entry is written
+    once the last chunk has been sent.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timings = RequestTimings()
+        token = _current.set(timings)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, timings)
+
+    async def __acall__(self, request):
+        timings = RequestTimings()
+        token = _current.set(timings)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, timings)
+
+    def finish(self, request, response, timings):
+        response['Server-Timing'] = server_timing(timings)
+        if not response.streaming or isinstance(response, FileResponse):
+            # a FileResponse keeps its file_to_stream so wsgi.file_wrapper can
+            # sendfile() it; only the time to open the file is measured
+            log_if_slow(request, response, timings)
+        elif not response.is_async:
+            # long-lived async streams (the low-stock feed) are not logged;
+            # the original iterator stays in the response's closers, so
+            # response.close() still closes it if the client goes away
+            response.streaming_content = self.stream(request, response, timings, response.streaming_content)
+        return response
+
+    def stream(self, request, response, timings, content):
+        while True:
+            token = _current.set(timings)
+            try:
+                chunk = next(content, None)
+            finally:
+                _current.reset(token)
+            if chunk is None:
+                break
+            yield chunk
+        log_if_slow(request, response, timings, streamed=True)
@@ -0,0 +1,78 @@
+import os
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import PdfJob, VehicleRecord
+from .pdf import render_vehicle_receipt, vehicle_report_chunks, vehicle_report_queryset
+
+
+# ------------------ PDF Job Queue ------------------
+# Jobs are rows in PdfJob. Web requests only insert a row; `manage.py
+# pdf_worker` claims queued rows and renders them in a process pool, writing
+# the result under MEDIA_ROOT/pdf_jobs/.
+
+def enqueue_pdf_job(kind, params):
+    return PdfJob.objects.create(kind=kind, params=params)
+
+
+def claim_next_job():
+    """Mark the oldest queued job as running and return it, or None if the queue is empty."""
+    while True:
+        job_id = (PdfJob.objects.filter(status='queued')
+                  .order_by('created_at', 'id').values_list('id', flat=True).first())
+        if job_id is None:
+            return None
+        # the conditional UPDATE makes claiming safe with several workers
+        claimed = PdfJob.objects.filter(pk=job_id, status='queued').update(
+            status='running', started_at=timezone.now()
+        )
+        if claimed:
+            return job_id
+
+
+def fail_stale_jobs(timeout, exclude=()):
+    """
+    Fail jobs 'running' for longer than `timeout` seconds: the worker that
+    claimed them crashed or was killed, and nothing else would ever finish
+    them. Returns the number of jobs failed.
+    """
+    cutoff = timezone.now() - timedelta(seconds=timeout)
+    return (PdfJob.objects.filter(status='running', started_at__lt=cutoff).exclude(pk__in=list(exclude))
+            .update(status='failed', error="The worker stopped before finishing this job.",
+                    finished_at=timezone.now()))
+
+
+def _write_job_file(job, chunks):
+    name = f"pdf_jobs/{job.kind}-{job.pk}.pdf"
+    path = os.path.join(settings.MEDIA_ROOT, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as fh:
+        for chunk in chunks:
+            fh.write(chunk)
+    return name
+
+
+def run_pdf_job(job_id):
+    """Render one claimed job. Runs inside a pool worker process."""
+    job = PdfJob.objects.get(pk=job_id)
+    try:
+        if job.kind == 'receipt':
+            vehicle = VehicleRecord.objects.select_related('supplier').get(pk=job.params['vehicle'])
+            name = _write_job_file(job, [render_vehicle_receipt(vehicle)])
+        elif job.kind == 'report':
+            name = _write_job_file(job, vehicle_report_chunks(vehicle_report_queryset(job.params)))
+        else:
+            raise ValueError(f"Unknown job kind: {job.kind}")
+    except Exception:
+        fail_pdf_job(job_id, traceback.format_exc())
+        return 'failed'
+
+    PdfJob.objects.filter(pk=job_id).update(status='done', file=name, finished_at=timezone.now())
+    return 'done'
+
+
+def fail_pdf_job(job_id, error):
+    PdfJob.objects.filter(pk=job_id).update(status='failed', error=error, finished_at=timezone.now())
@@ -0,0 +1,42 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max, Min
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from blog.models import VehicleRecord
+from blog.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuild the daily vehicle summaries from VehicleRecord, a month at a time."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='date_from', help="First day (YYYY-MM-DD); defaults to the oldest record.")
+        parser.add_argument('--to', dest='date_to', help="Last day (YYYY-MM-DD); defaults to the newest record.")
+        parser.add_argument('--days-per-batch', type=int, default=31)
+
+    def handle(self, *args, **options):
+        bounds = VehicleRecord.objects.aggregate(first=Min('entry_time'), last=Max('entry_time'))
+        if bounds['first'] is None:
+            self.stdout.write("No vehicle records.")
+            return
+        try:
+            start = parse_date(options['date_from']) if options['date_from'] else timezone.localdate(bounds['first'])
+            end = parse_date(options['date_to']) if options['date_to'] else timezone.localdate(bounds['last'])
+        except ValueError as e:
+            raise CommandError(e)
+        if start is None or end is None or start > end:
+            raise CommandError("Give --from/--to as YYYY-MM-DD with --from on or before --to.")
+
+        began = time.perf_counter()
+        total = 0
+        step = timedelta(days=options['days_per_batch'])
+        while start <= end:
+            batch_end = min(start + step - timedelta(days=1), end)
+            total += rebuild_rollups(start, batch_end)
+            self.stdout.write(f"  {start} .. {batch_end}: {total} summary rows so far")
+            start = batch_end + timedelta(days=1)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {total} summary rows in {time.perf_counter() - began:.1f}s"))
@@ -0,0 +1,139 @@
+import os
+import random
+import shutil
+import tempfile
+import time
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from blog.analytics import PERCENTILES, dwell_stats, np
+from blog.models import Supplier, VehicleRecord
+from blog.synthetic import keep_timestamps
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the NumPy gate-dwell analytics (blog.analytics) against a plain ORM "
+        "loop over the same synthetic vehicle records, in a throwaway test database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000)
+        parser.add_argument('--suppliers', type=int, default=50)
+        parser.add_argument('--days', type=int, default=365, help="Spread of the entry times.")
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        if np is None:
+            raise CommandError("numpy is not installed")
+        db = settings.DATABASES['default']
+        saved_test = db.get('TEST')
+        scratch = None
+        if connection.vendor == 'sqlite':
+            # an in-memory test database would hold a million rows in RAM twice over
+            scratch = tempfile.mkdtemp()
+            db['TEST'] = {**(saved_test or {}), 'NAME': os.path.join(scratch, 'bench.sqlite3')}
+
+        try:
+            old_name = db['NAME']
+            connection.creation.create_test_db(verbosity=0, autoclobber=True)
+            try:
+                self._populate(options)
+                vehicles = VehicleRecord.objects.all()
+
+                start = time.perf_counter()
+                naive = naive_stats(vehicles)
+                naive_time = time.perf_counter() - start
+
+                start = time.perf_counter()
+                fast = dwell_stats(vehicles)
+                fast_time = time.perf_counter() - start
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+        finally:
+            if saved_test is None:
+                db.pop('TEST', None)
+            else:
+                db['TEST'] = saved_test
+            if scratch:
+                shutil.rmtree(scratch, ignore_errors=True)
+
+        self.stdout.write(f"rows:        {options['rows']} ({fast['exited']} exited, {options['suppliers']} suppliers)")
+        self.stdout.write(f"orm loop:    {naive_time:.2f}s")
+        self.stdout.write(f"numpy:       {fast_time:.2f}s ({naive_time / fast_time:.1f}x)")
+        for p in PERCENTILES:
+            self.stdout.write(f"p{p:<11}{fast['percentiles'][p]:.1f} min")
+        if not matches(naive, fast):
+            raise CommandError("The two implementations disagree")
+        self.stdout.write(self.style.SUCCESS("Results match."))
+
+    def _populate(self, options):
+        rng = random.Random(options['seed'])
+        suppliers = Supplier.objects.bulk_create(
+            Supplier(name=f"Bench supplier {n}", company_type='Distributor', contact_person='Bench',
+                     phone='0', email=f"bench{n}@example.com", address='-')
+            for n in range(options['suppliers'])
+        )
+        now = timezone.now()
+        with keep_timestamps(VehicleRecord):
+            batch = []
+            for i in range(options['rows']):
+                entry = now - timedelta(minutes=rng.randrange(options['days'] * 24 * 60))
+                # long-tailed dwell: most visits under two hours, a few overnight
+                dwell = timedelta(minutes=rng.lognormvariate(4, 0.8))
+                batch.append(VehicleRecord(
+                    vehicle_number=f"BENCH-{i}", driver_name="Bench", product_type="Diesel",
+                    supplier=rng.choice(suppliers) if rng.random() < 0.95 else None,
+                    quantity=Decimal(rng.randrange(100, 40000)), entry_time=entry,
+                    exit_time=entry + dwell if rng.random() < 0.97 else None,
+                ))
+                if len(batch) == options['batch_size']:
+                    VehicleRecord.objects.bulk_create(batch)
+                    batch = []
+            VehicleRecord.objects.bulk_create(batch)
+
+# ------------------ Reference Implementation ------------------
+# What the dashboard would do without NumPy: one model instance per row.
+
+def _percentile(ordered, p):
+    # linear interpolation between closest ranks, as numpy.percentile does
+    rank = (len(ordered) - 1) * p / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def naive_stats(vehicles):
+    dwell = []
+    per_supplier = defaultdict(list)
+    for vehicle in vehicles.iterator(chunk_size=5000):
+        duration = vehicle.duration()
+        if duration is not None:
+            minutes = duration.total_seconds() / 60
+            dwell.append(minutes)
+            per_supplier[vehicle.supplier_id].append(minutes)
+    dwell.sort()
+    return {
+        'exited': len(dwell),
+        'percentiles': {p: _percentile(dwell, p) for p in PERCENTILES},
+        'suppliers': {sid: sum(values) / len(values) for sid, values in per_supplier.items()},
+    }
+
+
+def matches(naive, fast):
+    def close(a, b):
+        return abs(a - b) <= 1e-6 * max(1, abs(a))
+
+    return (
+        naive['exited'] == fast['exited']
+        and all(close(naive['percentiles'][p], fast['percentiles'][p]) for p in PERCENTILES)
+        and len(naive['suppliers']) == len(fast['suppliers'])
+        and all(close(naive['suppliers'][row['supplier_id']], row['mean_dwell']) for row in fast['suppliers'])
+    )
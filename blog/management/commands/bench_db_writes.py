@@ -0,0 +1,95 @@
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection, connections, transaction
+from django.db.backends.signals import connection_created
+
+from blog.models import VehicleRecord
+from blog.signals import tune_sqlite
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure write throughput with concurrent gate clerks against a throwaway "
+        "test database for the active DJANGO_DB profile."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=8, help="Concurrent writer threads.")
+        parser.add_argument('--rows', type=int, default=200, help="Rows inserted per writer.")
+        parser.add_argument('--plain', action='store_true',
+                            help="SQLite only: skip SQLITE_PRAGMAS and the busy timeout, for comparison. "
+                                 "Set SQLITE_WAL=1 to include WAL in the tuned run.")
+
+    def handle(self, *args, **options):
+        db = settings.DATABASES['default']
+        saved = {key: db[key] for key in ('TEST', 'OPTIONS') if key in db}
+        plain = options['plain'] and connection.vendor == 'sqlite'
+        if connection.vendor == 'sqlite':
+            # the default SQLite test database lives in memory; concurrency
+            # only means something against a file
+            db['TEST'] = {**db.get('TEST', {}), 'NAME': os.path.join(tempfile.mkdtemp(), 'bench.sqlite3')}
+            if plain:
+                db['OPTIONS'] = {}
+                connection_created.disconnect(tune_sqlite)
+
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            results = self._run(options['writers'], options['rows'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            if plain:
+                connection_created.connect(tune_sqlite)
+            db.pop('TEST', None)
+            db.update(saved)
+
+        elapsed, latencies, failures = results
+        written = len(latencies)
+        label = f"{connection.vendor}{' (plain)' if options['plain'] else ''}"
+        self.stdout.write(f"profile:     {label}")
+        self.stdout.write(f"writers:     {options['writers']} x {options['rows']} rows")
+        self.stdout.write(f"written:     {written} rows in {elapsed:.2f}s ({written / elapsed:.0f} rows/s)")
+        self.stdout.write(f"failed:      {failures} (database locked / timeouts)")
+        if latencies:
+            latencies.sort()
+            self.stdout.write(f"latency p50: {statistics.median(latencies) * 1000:.1f} ms")
+            self.stdout.write(f"latency p95: {latencies[int(len(latencies) * 0.95) - 1] * 1000:.1f} ms")
+
+    def _run(self, writers, rows):
+        latencies = []
+        failures = [0]
+        lock = threading.Lock()
+        start_gate = threading.Barrier(writers)
+
+        def writer(n):
+            start_gate.wait()
+            try:
+                for i in range(rows):
+                    started = time.perf_counter()
+                    try:
+                        with transaction.atomic():
+                            VehicleRecord.objects.create(
+                                vehicle_number=f"BENCH-{n}-{i}", driver_name="Bench",
+                                product_type="Diesel", quantity=1000,
+                            )
+                    except OperationalError:
+                        with lock:
+                            failures[0] += 1
+                        continue
+                    with lock:
+                        latencies.append(time.perf_counter() - started)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=writer, args=(n,)) for n in range(writers)]
+        started = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return time.perf_counter() - started, latencies, failures[0]
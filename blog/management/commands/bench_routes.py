@@ -0,0 +1,327 @@
+import json
+import logging
+import os
+import platform
+import resource
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+from django.db import connection, connections
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import get_resolver, reverse
+from django.utils import timezone
+
+from blog.models import Equipment, PdfJob, StockItem, Supplier, VehicleRecord
+
+# (url name, positional args, query string); args name the seeded object to use
+ROUTES = [
+    ('home', (), ''),
+    ('dashboard', (), ''),
+    ('dashboard_metrics', (), ''),
+    ('about', (), ''),
+    ('services', (), ''),
+    ('service_oil', (), ''),
+    ('service_gas', (), ''),
+    ('service_consulting', (), ''),
+    ('contact', (), ''),
+    ('equipment_list', (), ''),
+    ('equipment_add', (), ''),
+    ('equipment_edit', ('equipment',), ''),
+    ('equipment_delete', ('equipment',), ''),
+    ('supplier_list', (), ''),
+    ('supplier_list', (), 'q=petroleum'),
+    ('supplier_add', (), ''),
+    ('supplier_edit', ('supplier',), ''),
+    ('stock_list', (), ''),
+    ('stock_add', (), ''),
+    ('stock_edit', ('stock',), ''),
+    ('stock_movements', ('stock',), ''),
+    ('low_stock', (), ''),
+    ('low_stock', (), 'format=json'),
+    ('stock_data', (), ''),
+    ('import_data', (), ''),
+    ('export_data', ('export',), ''),
+    ('vehicle_list', (), ''),
+    ('vehicle_on_site', (), ''),
+    ('vehicle_on_site', (), 'format=json'),
+    ('vehicle_on_site', (), 'plate={vehicle_number}'),
+    ('vehicle_list', (), 'q=diesel'),
+    ('vehicle_list_more', (), ''),
+    ('vehicle_lookup', (), 'number={vehicle_number}'),
+    ('vehicle_add', (), ''),
+    ('vehicle_edit', ('vehicle',), ''),
+    ('vehicle_delete', ('vehicle',), ''),
+    ('vehicle_pdf', ('vehicle',), ''),
+    ('vehicle_report_pdf', (), 'date_from={month_ago}'),
+    ('throughput_report', (), ''),
+    ('throughput_report', (), 'group=supplier&format=json'),
+    ('dwell_dashboard', (), ''),
+    ('sync_changes', (), 'since=0'),
+    ('pdf_job_status', ('pdf_job',), ''),
+    ('custom_login', (), ''),
+    ('register', (), ''),
+    ('test_pdf', (), ''),
+]
+
+# Routes that are deliberately not driven, and why
+SKIPPED = {
+    'low_stock_stream': "server-sent events: the response never ends",
+    'supplier_delete': "deletes on GET",
+    'stock_delete': "deletes on GET",
+    'vehicle_exit': "records an exit on GET",
+    'vehicle_exit_batch': "POST only",
+    'vehicle_receipts_pdf': "POST only",
+    'pdf_job_create': "POST only",
+    'pdf_job_download': "needs a rendered job file",
+    'custom_logout': "ends the session",
+}
+
+# p99 is recorded but too noisy over a few dozen requests to gate on
+GATED_METRICS = ('p50_ms', 'p95_ms')
+
+
+def percentile(ordered, p):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+def latency_summary(latencies):
+    ordered = sorted(latencies)
+    return {f'p{p}_ms': round(percentile(ordered, p) * 1000, 2) for p in (50, 95, 99)}
+
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if platform.system() == 'Darwin' else 1024), 1)
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark every blog route against scaled synthetic data in a throwaway "
+        "database: latency percentiles, queries and peak RSS through the test "
+        "client, plus throughput under concurrent HTTP load. Results are written "
+        "as JSON; --compare flags regressions against an earlier run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=int, default=1, help="As for the seed command: 1 = 20 suppliers, 10,000 vehicle records.")
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--requests', type=int, default=30, help="Timed requests per route.")
+        parser.add_argument('--http-requests', type=int, default=200, help="Requests per route under HTTP load; 0 skips it.")
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--only', nargs='*', default=[], help="Limit to these url names.")
+        parser.add_argument('--output', default=str(settings.BASE_DIR / 'benchmarks' / 'routes.json'))
+        parser.add_argument('--compare', metavar='BASELINE', help="Compare against an earlier result file.")
+        parser.add_argument('--threshold', type=float, default=0.5,
+                            help="Relative latency increase that counts as a regression.")
+        parser.add_argument('--min-ms', type=float, default=5.0,
+                            help="Latency increases smaller than this are noise.")
+
+    def handle(self, *args, **options):
+        self.check_coverage()
+        db = settings.DATABASES['default']
+        if connection.vendor == 'sqlite':
+            # the HTTP server threads need a database they can all open
+            db.setdefault('TEST', {})['NAME'] = os.path.join(tempfile.mkdtemp(), 'bench.sqlite3')
+
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            started = time.perf_counter()
+            fixtures = self.seed(options['scale'], options['seed'])
+            self.stdout.write(f"Seeded scale {options['scale']} in {time.perf_counter() - started:.1f}s")
+            routes = [
+                (self.label(name, query), self.url(name, args, query, fixtures))
+                for name, args, query in ROUTES
+                if not options['only'] or name in options['only']
+            ]
+            # failing routes are reported in the table rather than as tracebacks
+            logging.getLogger('django.request').setLevel(logging.CRITICAL)
+            result = {
+                'meta': {
+                    'created': timezone.now().isoformat(timespec='seconds'),
+                    'scale': options['scale'],
+                    'requests': options['requests'],
+                    'concurrency': options['concurrency'],
+                    'database': connection.vendor,
+                    'python': platform.python_version(),
+                    'django': django.get_version(),
+                },
+                'routes': self.run_client(routes, options['requests']),
+            }
+            if options['http_requests']:
+                result['http'] = self.run_http(routes, options['http_requests'], options['concurrency'])
+        finally:
+            connections.close_all()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        output = Path(options['output'])
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(result, indent=2) + "\n")
+        self.stdout.write(f"Wrote {output}")
+
+        if options['compare']:
+            baseline = json.loads(Path(options['compare']).read_text())
+            regressions = self.compare(baseline, result, options['threshold'], options['min_ms'])
+            if regressions:
+                raise CommandError(f"{regressions} regression(s) against {options['compare']}")
+            self.stdout.write(self.style.SUCCESS("No regressions."))
+
+    # ------------------ Routes ------------------
+
+    def check_coverage(self):
+        names = {p.name for p in get_resolver('blog.urls').url_patterns if p.name}
+        missing = names - {name for name, _, _ in ROUTES} - set(SKIPPED)
+        for name in sorted(missing):
+            self.stderr.write(f"warning: route '{name}' is neither benchmarked nor listed in SKIPPED")
+
+    def label(self, name, query):
+        return f"{name}?{query.split('=')[0]}" if query else name
+
+    def url(self, name, args, query, fixtures):
+        path = reverse(name, args=[fixtures[arg] for arg in args])
+        return f"{path}?{query.format(**fixtures)}" if query else path
+
+    def seed(self, scale, seed):
+        """The `seed` command's data at this scale, plus a few objects for the routes to point at."""
+        # one worker: a spawned worker would open the configured database, not the test one
+        call_command('seed', scale=scale, seed=seed, workers=1, stdout=StringIO())
+        vehicle = VehicleRecord.objects.order_by('-entry_time').first()
+        return {
+            'supplier': Supplier.objects.order_by('pk').first().pk,
+            'equipment': Equipment.objects.order_by('pk').first().pk,
+            'stock': StockItem.objects.order_by('pk').first().pk,
+            'vehicle': vehicle.pk,
+            'vehicle_number': vehicle.vehicle_number,
+            'export': 'vehicles',
+            'pdf_job': PdfJob.objects.create(kind='report', params={}).pk,
+            'month_ago': (timezone.localdate() - timedelta(days=30)).isoformat(),
+        }
+
+    # ------------------ Test Client ------------------
+
+    def run_client(self, routes, total):
+        client = Client(SERVER_NAME='localhost', raise_request_exception=False)
+        self.stdout.write(f"\n{'route':<36} {'status':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'queries':>8} {'rss MB':>7}")
+        results = {}
+        for label, url in routes:
+            # the first request fills caches; it is reported separately
+            started = time.perf_counter()
+            status = self.fetch(client, url)
+            cold = time.perf_counter() - started
+            latencies = []
+            with CaptureQueriesContext(connection) as ctx:
+                for _ in range(total):
+                    started = time.perf_counter()
+                    self.fetch(client, url)
+                    latencies.append(time.perf_counter() - started)
+            results[label] = {
+                'url': url,
+                'status': status,
+                'cold_ms': round(cold * 1000, 2),
+                **latency_summary(latencies),
+                'queries': round(len(ctx) / total, 2),
+                'peak_rss_mb': peak_rss_mb(),
+            }
+            row = results[label]
+            self.stdout.write(
+                f"{label:<36.36} {status:>6} {row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} "
+                f"{row['p99_ms']:>8.1f} {row['queries']:>8} {row['peak_rss_mb']:>7}"
+            )
+        return results
+
+    def fetch(self, client, url):
+        response = client.get(url)
+        if response.streaming:
+            for _ in response.streaming_content:
+                pass
+        response.close()
+        return response.status_code
+
+    # ------------------ HTTP Load ------------------
+
+    def run_http(self, routes, total, concurrency):
+        server = ThreadedWSGIServer(('127.0.0.1', 0), QuietHandler)
+        server.set_app(WSGIHandler())
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        base = f"http://127.0.0.1:{server.server_port}"
+
+        def one(url):
+            started = time.perf_counter()
+            try:
+                with urllib.request.urlopen(base + url, timeout=60) as response:
+                    response.read()
+                    ok = response.status < 500
+            except urllib.error.HTTPError as e:
+                ok = e.code < 500
+            except OSError:
+                ok = False
+            return time.perf_counter() - started, ok
+
+        self.stdout.write(f"\nHTTP, {concurrency} concurrent\n{'route':<36} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+        results = {}
+        try:
+            with ThreadPoolExecutor(concurrency) as pool:
+                for label, url in routes:
+                    list(pool.map(one, [url] * concurrency))  # warm every server thread
+                    started = time.perf_counter()
+                    outcomes = list(pool.map(one, [url] * total))
+                    elapsed = time.perf_counter() - started
+                    results[label] = {
+                        'rps': round(total / elapsed, 1),
+                        **latency_summary([latency for latency, _ in outcomes]),
+                        'errors': sum(not ok for _, ok in outcomes),
+                    }
+                    row = results[label]
+                    self.stdout.write(
+                        f"{label:<36.36} {row['rps']:>8.0f} {row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} "
+                        f"{row['p99_ms']:>8.1f} {row['errors']:>7}"
+                    )
+        finally:
+            server.shutdown()
+            server.server_close()
+        return results
+
+    # ------------------ Comparison ------------------
+
+    def compare(self, baseline, current, threshold, min_ms):
+        """Print what got slower, heavier or broke since the baseline; returns the number of regressions."""
+        if baseline.get('meta', {}).get('scale') != current['meta']['scale']:
+            self.stderr.write("warning: the baseline was recorded at a different scale")
+        problems = []
+        for section in ('routes', 'http'):
+            for label, row in current.get(section, {}).items():
+                old = baseline.get(section, {}).get(label)
+                if old is None:
+                    continue
+                for metric in GATED_METRICS:
+                    before, after = old[metric], row[metric]
+                    if after - before > min_ms and after > before * (1 + threshold):
+                        problems.append(f"{section:<6} {label:<36} {metric:<8} {before:>8.1f} -> {after:.1f}")
+                if row.get('queries', 0) > old.get('queries', 0):
+                    problems.append(f"{section:<6} {label:<36} queries  {old['queries']:>8} -> {row['queries']}")
+                if row.get('status', 200) != old.get('status', 200) or row.get('errors', 0) > old.get('errors', 0):
+                    problems.append(f"{section:<6} {label:<36} now failing")
+        self.stdout.write(f"\nCompared with {baseline['meta'].get('created', 'baseline')}:")
+        for line in problems:
+            self.stdout.write(self.style.ERROR(line))
+        return len(problems)
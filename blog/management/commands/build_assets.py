@@ -0,0 +1,29 @@
+from urllib.error import URLError
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.assets import STATIC_SOURCE, build_image_variants, download_vendor_assets
+
+
+class Command(BaseCommand):
+    help = (
+        "Download the vendored CSS/JS libraries into blog/static/vendor and build "
+        "AVIF/WebP variants of the page images. Run before collectstatic."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help="Rebuild files that already exist.")
+        parser.add_argument('--skip-download', action='store_true', help="Only build the image variants.")
+
+    def handle(self, *args, **options):
+        written = []
+        if not options['skip_download']:
+            try:
+                written += download_vendor_assets(force=options['force'])
+            except URLError as e:
+                raise CommandError(f"Could not download vendored assets: {e.reason}")
+        written += build_image_variants(force=options['force'])
+
+        for path in written:
+            self.stdout.write(f"  {path.relative_to(STATIC_SOURCE)} ({path.stat().st_size // 1024} KB)")
+        self.stdout.write(self.style.SUCCESS(f"Wrote {len(written)} files"))
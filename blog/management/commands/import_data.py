@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.importers import IMPORTS, import_rows, read_rows
+
+
+class Command(BaseCommand):
+    help = "Bulk import suppliers, stock items or vehicle records from a CSV or .xlsx file."
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(IMPORTS))
+        parser.add_argument('path', help="CSV or .xlsx file with a header row of field names.")
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        def report(result):
+            self.stdout.write(
+                f"{result.processed} rows: {result.created} created, "
+                f"{result.updated} updated, {len(result.errors)} rejected"
+            )
+
+        try:
+            with open(options['path'], 'rb') as fh:
+                result = import_rows(options['kind'], read_rows(fh, options['path']),
+                                     batch_size=options['batch_size'], progress=report)
+        except (OSError, ValueError) as e:
+            raise CommandError(e)
+
+        for row_number, errors in result.errors[:50]:
+            messages = "; ".join(f"{field}: {e['message']}" for field, errs in errors.items() for e in errs)
+            self.stderr.write(f"Row {row_number}: {messages}")
+        if len(result.errors) > 50:
+            self.stderr.write(f"... and {len(result.errors) - 50} more rejected rows")
+        self.stdout.write(self.style.SUCCESS(f"Imported {result.created + result.updated} {options['kind']} rows"))
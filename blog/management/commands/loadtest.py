@@ -0,0 +1,115 @@
+import asyncio
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from urllib.parse import urlsplit
+
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+
+from blog.models import VehicleRecord
+
+DEFAULT_PATHS = [
+    '/stock/data/',
+    '/stock/low/?format=json',
+    '/dashboard/metrics/',
+    '/vehicles/lookup/?number={vehicle_number}',
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the WSGI and ASGI handlers on the JSON endpoints under concurrent "
+        "load. Requests are driven in process (threads for WSGI, tasks for ASGI), "
+        "so the numbers measure Django rather than a web server or the network."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='*', help="Defaults to the async JSON endpoints.")
+        parser.add_argument('--requests', type=int, default=500, help="Requests per path and app.")
+        parser.add_argument('--concurrency', type=int, default=32)
+
+    def handle(self, *args, **options):
+        number = VehicleRecord.objects.values_list('vehicle_number', flat=True).first() or 'NONE'
+        paths = options['paths'] or [p.format(vehicle_number=number) for p in DEFAULT_PATHS]
+        total, concurrency = options['requests'], options['concurrency']
+
+        self.stdout.write(f"{total} requests per row, {concurrency} concurrent\n")
+        self.stdout.write(f"{'app':<5} {'path':<40} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'errors':>7}")
+        wsgi, asgi = WSGIHandler(), ASGIHandler()
+        for path in paths:
+            for name, run in (('wsgi', self.run_wsgi), ('asgi', self.run_asgi)):
+                elapsed, latencies, errors = run(wsgi if name == 'wsgi' else asgi, path, total, concurrency)
+                latencies.sort()
+                self.stdout.write(
+                    f"{name:<5} {path:<40.40} {total / elapsed:>8.0f} "
+                    f"{statistics.median(latencies) * 1000:>8.1f} "
+                    f"{latencies[int(len(latencies) * 0.95) - 1] * 1000:>8.1f} {errors:>7}"
+                )
+
+    # ------------------ WSGI: one thread per in-flight request ------------------
+
+    def run_wsgi(self, app, path, total, concurrency):
+        url = urlsplit(path)
+
+        def one(_):
+            environ = {
+                'REQUEST_METHOD': 'GET', 'PATH_INFO': url.path, 'QUERY_STRING': url.query,
+                'SERVER_NAME': 'localhost', 'SERVER_PORT': '80', 'HTTP_HOST': 'localhost',
+                'SERVER_PROTOCOL': 'HTTP/1.1', 'wsgi.url_scheme': 'http',
+                'wsgi.input': BytesIO(), 'wsgi.errors': sys.stderr,
+            }
+            status = []
+            start = time.perf_counter()
+            response = app(environ, lambda s, headers, exc_info=None: status.append(s))
+            b''.join(response)
+            response.close()
+            return time.perf_counter() - start, status[0].startswith('200')
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(concurrency) as pool:
+            results = list(pool.map(one, range(total)))
+        return time.perf_counter() - start, [r[0] for r in results], sum(not r[1] for r in results)
+
+    # ------------------ ASGI: one task per in-flight request ------------------
+
+    def run_asgi(self, app, path, total, concurrency):
+        url = urlsplit(path)
+
+        async def one(gate):
+            scope = {
+                'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+                'method': 'GET', 'scheme': 'http', 'path': url.path, 'raw_path': url.path.encode(),
+                'query_string': url.query.encode(), 'headers': [(b'host', b'localhost')],
+                'server': ('localhost', 80), 'client': ('127.0.0.1', 50000),
+            }
+            sent = []
+            received = False
+
+            async def receive():
+                nonlocal received
+                if not received:
+                    received = True
+                    return {'type': 'http.request', 'body': b'', 'more_body': False}
+                # the client never disconnects early
+                await asyncio.Future()
+
+            async def send(message):
+                sent.append(message)
+
+            async with gate:
+                start = time.perf_counter()
+                await app(scope, receive, send)
+                return time.perf_counter() - start, sent[0]['status'] == 200
+
+        async def run():
+            gate = asyncio.Semaphore(concurrency)
+            start = time.perf_counter()
+            results = await asyncio.gather(*(one(gate) for _ in range(total)))
+            return time.perf_counter() - start, results
+
+        elapsed, results = asyncio.run(run())
+        return elapsed, [r[0] for r in results], sum(not r[1] for r in results)
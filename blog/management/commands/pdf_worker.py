@@ -0,0 +1,73 @@
+import multiprocessing
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+# Pool processes are spawned fresh and unpickle the functions below by
+# importing this module, so nothing here may import models at module level.
+
+
+def _init_worker():
+    django.setup()
+
+
+def _run_job(job_id):
+    from blog.jobs import run_pdf_job
+    return run_pdf_job(job_id)
+
+
+class Command(BaseCommand):
+    help = "Process queued PDF jobs with a pool of worker processes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=settings.PDF_JOB_PROCESSES,
+                            help="Number of worker processes.")
+        parser.add_argument('--poll', type=float, default=2.0,
+                            help="Seconds to wait between polls when the queue is empty.")
+        parser.add_argument('--once', action='store_true',
+                            help="Exit once the queue is empty instead of polling forever.")
+
+    def handle(self, *args, **options):
+        from blog.jobs import claim_next_job, fail_pdf_job, fail_stale_jobs
+
+        processes = options['processes']
+        context = multiprocessing.get_context('spawn')
+        running = {}
+        last_sweep = 0
+
+        with ProcessPoolExecutor(max_workers=processes, mp_context=context, initializer=_init_worker) as pool:
+            self.stdout.write(f"PDF worker started with {processes} processes")
+            while True:
+                close_old_connections()
+                if time.monotonic() - last_sweep >= 60:
+                    # jobs this worker is running are alive, however long they take
+                    stale = fail_stale_jobs(settings.PDF_JOB_TIMEOUT, exclude=running.values())
+                    if stale:
+                        self.stdout.write(f"Failed {stale} job(s) abandoned by a stopped worker")
+                    last_sweep = time.monotonic()
+                while len(running) < processes:
+                    job_id = claim_next_job()
+                    if job_id is None:
+                        break
+                    running[pool.submit(_run_job, job_id)] = job_id
+
+                if not running:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll'])
+                    continue
+
+                done, _ = wait(running, timeout=options['poll'], return_when=FIRST_COMPLETED)
+                for future in done:
+                    job_id = running.pop(future)
+                    try:
+                        status = future.result()
+                    except Exception as exc:
+                        # the pool process died before it could record the failure
+                        fail_pdf_job(job_id, repr(exc))
+                        status = 'failed'
+                    self.stdout.write(f"Job {job_id}: {status}")
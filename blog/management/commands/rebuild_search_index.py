@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from blog.search import SOURCES, rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index from the supplier, vehicle and stock tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument('kinds', nargs='*', choices=sorted(SOURCES), help="Defaults to all.")
+
+    def handle(self, *args, **options):
+        for kind in options['kinds'] or sorted(SOURCES):
+            rebuild_index(kind)
+            self.stdout.write(f"Reindexed {kind}")
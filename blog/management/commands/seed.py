@@ -0,0 +1,151 @@
+import multiprocessing
+import os
+import time
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.utils import timezone
+
+from blog.caching import bump_model_version
+from blog.changes import FEEDS, rebuild_change_log
+from blog.metrics import invalidate_dashboard_metrics
+from blog.models import Equipment, StockItem, Supplier, VehicleRecord
+from blog.rollups import rebuild_rollups
+from blog.search import SOURCES, rebuild_index
+from blog.synthetic import (
+    SCALE, create_reference_data, create_vehicle_chunk, generate_vehicle_chunk, write_vehicle_chunk,
+)
+
+
+def _vehicle_chunk(*args):
+    try:
+        return create_vehicle_chunk(*args)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the database with synthetic suppliers, equipment, stock, inspections, "
+        "projects and gate records. The same --scale and --seed always give the same "
+        "data, whatever the number of --workers."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=int, default=1,
+                            help=", ".join(f"{n:,} {name}" for name, n in SCALE.items()) + " per unit.")
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--vehicles', type=int, help="Number of gate records; overrides the scale.")
+        parser.add_argument('--days', type=int, default=365, help="How far back the records go.")
+        parser.add_argument('--workers', type=int, default=min(os.cpu_count() or 1, 8),
+                            help="Processes generating gate records.")
+        parser.add_argument('--chunk-size', type=int, default=20_000, help="Gate records per transaction.")
+        parser.add_argument('--drop-indexes-over', type=int, default=500_000,
+                            help="Drop and rebuild the gate record indexes when loading at least this many.")
+        parser.add_argument('--skip-derived', action='store_true',
+                            help="Don't rebuild the daily rollups and search index afterwards.")
+
+    def handle(self, *args, **options):
+        scale, seed, days = options['scale'], options['seed'], options['days']
+        if scale < 1 or options['chunk_size'] < 1:
+            raise CommandError("--scale and --chunk-size must be positive")
+        started = time.perf_counter()
+
+        supplier_ids = create_reference_data(scale, seed, days)
+        self.stdout.write(f"Reference data: {len(supplier_ids)} suppliers ({time.perf_counter() - started:.1f}s)")
+
+        total = options['vehicles'] if options['vehicles'] is not None else SCALE['vehicles'] * scale
+        chunk_size = options['chunk_size']
+        now = timezone.now()
+        chunks = [
+            (seed, n, min(chunk_size, total - start), supplier_ids, now, days)
+            for n, start in enumerate(range(0, total, chunk_size))
+        ]
+        written = 0
+        with self.indexes_dropped(VehicleRecord, drop=total >= options['drop_indexes_over']):
+            for count in self.vehicle_chunks(chunks, options['workers']):
+                written += count
+                self.progress(written, total, started)
+            self.stdout.write("")
+
+        if not options['skip_derived']:
+            derived = time.perf_counter()
+            rebuild_rollups()
+            for kind in SOURCES:
+                rebuild_index(kind)
+            self.stdout.write(f"Rebuilt rollups and search index ({time.perf_counter() - derived:.1f}s)")
+        # the raw inserts send no signals, so drop what the caches hold and
+        # put the new rows in the sync log
+        for model in (Equipment, Supplier, StockItem, VehicleRecord):
+            bump_model_version(model)
+        for kind in FEEDS:
+            rebuild_change_log(kind)
+        invalidate_dashboard_metrics()
+
+        self.stdout.write(self.style.SUCCESS(f"Seeded {written:,} gate records in {time.perf_counter() - started:.1f}s"))
+
+    @contextmanager
+    def indexes_dropped(self, model, drop):
+        """
+        Drop the model's secondary indexes for the duration of a large load and
+        build them again afterwards: one sorted build per index is far cheaper
+        than updating every index row by row.
+        """
+        indexes = model._meta.indexes if drop else []
+        if indexes:
+            with connection.schema_editor() as editor:
+                for index in indexes:
+                    editor.remove_index(model, index)
+        try:
+            yield
+        finally:
+            if indexes:
+                rebuilt = time.perf_counter()
+                with connection.schema_editor() as editor:
+                    for index in indexes:
+                        editor.add_index(model, index)
+                self.stdout.write(f"Rebuilt {len(indexes)} indexes on {model._meta.db_table} "
+                                  f"({time.perf_counter() - rebuilt:.1f}s)")
+
+    def vehicle_chunks(self, chunks, workers):
+        """Write every chunk, yielding the number of rows as each one lands."""
+        if workers <= 1 or len(chunks) <= 1:
+            for chunk in chunks:
+                yield create_vehicle_chunk(*chunk)
+            return
+        # SQLite takes one writer at a time, so there the workers only
+        # generate rows and this process writes them; elsewhere each worker
+        # writes its own chunks
+        write_here = connection.vendor == 'sqlite'
+        task = generate_vehicle_chunk if write_here else _vehicle_chunk
+        if write_here:
+            # room for the indexes being filled; the default cache is a few MB
+            with connection.cursor() as cursor:
+                cursor.execute("PRAGMA cache_size = -262144")
+        # spawned rather than forked, so no child inherits an open database
+        # connection; the initializer runs before any task (and so any
+        # model import) is unpickled
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(workers, mp_context=context, initializer=django.setup) as pool:
+            # a bounded window of chunks in flight keeps memory flat and the
+            # rows in chunk order
+            pending = deque()
+            for chunk in chunks:
+                pending.append(pool.submit(task, *chunk))
+                if len(pending) >= workers * 2:
+                    yield self.finish(pending.popleft(), write_here)
+            while pending:
+                yield self.finish(pending.popleft(), write_here)
+
+    def finish(self, future, write_here):
+        result = future.result()
+        return write_vehicle_chunk(result) if write_here else result
+
+    def progress(self, written, total, started):
+        rate = written / max(time.perf_counter() - started, 1e-9)
+        self.stdout.write(f"\rGate records: {written:,}/{total:,} ({rate:,.0f}/s)", ending="")
+        self.stdout.flush()
@@ -0,0 +1,63 @@
+import json
+from collections import defaultdict
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+METRICS = ('total_ms', 'sql_ms', 'queries', 'render_ms', 'pdf_ms')
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct))]
+
+
+class Command(BaseCommand):
+    help = "Summarize the slow-request log by endpoint, worst first."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--log', default=None, help="Defaults to SLOW_REQUEST_LOG and its rotated files.")
+        parser.add_argument('--by', choices=METRICS, default='total_ms', help="Metric to rank endpoints by (p95).")
+        parser.add_argument('--top', type=int, default=10)
+
+    def handle(self, *args, **options):
+        if options['log']:
+            paths = [Path(options['log'])]
+        else:
+            base = Path(settings.SLOW_REQUEST_LOG)
+            paths = sorted(base.parent.glob(base.name + '*'))
+        paths = [p for p in paths if p.exists()]
+        if not paths:
+            raise CommandError("No slow-request log found.")
+
+        endpoints = defaultdict(list)
+        for path in paths:
+            with open(path) as fh:
+                for line in fh:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    endpoints[(entry['method'], entry['view'] or entry['path'])].append(entry)
+
+        by = options['by']
+        ranked = sorted(endpoints.items(), key=lambda item: percentile([e[by] for e in item[1]], 0.95), reverse=True)
+
+        self.stdout.write(
+            f"{'endpoint':<40} {'hits':>5} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} "
+            f"{'queries':>8} {'sql ms':>8} {'render':>8} {'pdf ms':>8}"
+        )
+        for (method, name), entries in ranked[:options['top']]:
+            totals = [e['total_ms'] for e in entries]
+
+            def mean(key):
+                return sum(e[key] for e in entries) / len(entries)
+
+            self.stdout.write(
+                f"{method + ' ' + name:<40.40} {len(entries):>5} {percentile(totals, 0.5):>8.1f} "
+                f"{percentile(totals, 0.95):>8.1f} {max(totals):>8.1f} {mean('queries'):>8.1f} "
+                f"{mean('sql_ms'):>8.1f} {mean('render_ms'):>8.1f} {mean('pdf_ms'):>8.1f}"
+            )
+        self.stdout.write(f"\n{sum(map(len, endpoints.values()))} slow requests from {len(paths)} file(s); "
+                          f"ranked by p95 {by}, other columns are means.")
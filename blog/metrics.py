@@ -0,0 +1,65 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+
+from .models import Equipment, Supplier, StockItem
+
+DASHBOARD_METRICS_KEY = 'blog:dashboard-metrics'
+
+
+# ------------------ Dashboard Metrics ------------------
+
+def _fetch_totals():
+    # One round trip for every counter on the dashboard: the stock figures use
+    # conditional aggregation and the other tables are scalar sub-selects.
+    sql = f"""
+        SELECT
+            (SELECT COUNT(*) FROM {Equipment._meta.db_table}),
+            (SELECT COUNT(*) FROM {Supplier._meta.db_table}),
+            COUNT(*),
+            COALESCE(SUM(quantity), 0),
+            COALESCE(SUM(CASE WHEN quantity <= min_level THEN 1 ELSE 0 END), 0)
+        FROM {StockItem._meta.db_table}
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql)
+        row = cursor.fetchone()
+    return {
+        'total_equipment': row[0],
+        'total_suppliers': row[1],
+        'total_stock_items': row[2],
+        'total_quantity': row[3],
+        'low_stock_count': row[4],
+    }
+
+
+def compute_dashboard_metrics():
+    metrics = _fetch_totals()
+    top_items = StockItem.objects.order_by('-quantity').values_list('name', 'quantity')[:10]
+    metrics['chart_labels'] = [name for name, _ in top_items]
+    metrics['chart_data'] = [quantity for _, quantity in top_items]
+    return metrics
+
+
+def get_dashboard_metrics():
+    """Dashboard counters and chart data, served from the cache when possible."""
+    metrics = cache.get(DASHBOARD_METRICS_KEY)
+    if metrics is None:
+        metrics = compute_dashboard_metrics()
+        cache.set(DASHBOARD_METRICS_KEY, metrics, settings.DASHBOARD_METRICS_TIMEOUT)
+    return metrics
+
+
+async def aget_dashboard_metrics():
+    metrics = await cache.aget(DASHBOARD_METRICS_KEY)
+    if metrics is None:
+        # the one-round-trip raw SQL has no async cursor; acount()/aaggregate()
+        # would need a query per table, so run it once in a thread instead
+        metrics = await sync_to_async(compute_dashboard_metrics)()
+        await cache.aset(DASHBOARD_METRICS_KEY, metrics, settings.DASHBOARD_METRICS_TIMEOUT)
+    return metrics
+
+
+def invalidate_dashboard_metrics():
+    cache.delete(DASHBOARD_METRICS_KEY)
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0006_vehicle_vehiclerecord'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='vehiclerecord',
+            index=models.Index(fields=['-entry_time', '-id'], name='vehicle_entry_time_id_idx'),
+        ),
+    ]
@@ -0,0 +1,58 @@
+from django.db import migrations
+
+# Full-text search table used by blog/search.py. There is no model for it:
+# SQLite gets an FTS5 virtual table, PostgreSQL a tsvector table with a GIN
+# index. On other databases nothing is created and search falls back to
+# icontains filters.
+
+SQLITE_SOURCES = [
+    (1, "name || ' ' || contact_person", 'blog_supplier'),
+    (2, "vehicle_number || ' ' || driver_name", 'blog_vehiclerecord'),
+    (3, "name", 'blog_stockitem'),
+]
+
+POSTGRES_SOURCES = [
+    ('supplier', "name || ' ' || contact_person", 'blog_supplier'),
+    ('vehicle', "vehicle_number || ' ' || driver_name", 'blog_vehiclerecord'),
+    ('stock', "name", 'blog_stockitem'),
+]
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute("CREATE VIRTUAL TABLE blog_search_index USING fts5(body, prefix='2 3')")
+        for code, body, table in SQLITE_SOURCES:
+            schema_editor.execute(
+                f"INSERT INTO blog_search_index (rowid, body) SELECT id * 4 + {code}, {body} FROM {table}"
+            )
+    elif vendor == 'postgresql':
+        schema_editor.execute(
+            "CREATE TABLE blog_search_index ("
+            " kind varchar(20) NOT NULL,"
+            " object_id bigint NOT NULL,"
+            " body text NOT NULL,"
+            " document tsvector GENERATED ALWAYS AS (to_tsvector('simple', body)) STORED,"
+            " PRIMARY KEY (kind, object_id))"
+        )
+        schema_editor.execute("CREATE INDEX blog_search_document_idx ON blog_search_index USING GIN (document)")
+        for kind, body, table in POSTGRES_SOURCES:
+            schema_editor.execute(
+                f"INSERT INTO blog_search_index (kind, object_id, body) SELECT '{kind}', id, {body} FROM {table}"
+            )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor in ('sqlite', 'postgresql'):
+        schema_editor.execute("DROP TABLE IF EXISTS blog_search_index")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0009_stockmovement'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0010_search_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='vehiclerecord',
+            index=models.Index(fields=['product_type', '-entry_time'], name='vehicle_product_entry_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vehiclerecord',
+            index=models.Index(fields=['vehicle_type', '-entry_time'], name='vehicle_type_entry_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vehiclerecord',
+            index=models.Index(fields=['supplier', '-entry_time'], name='vehicle_supplier_entry_idx'),
+        ),
+    ]
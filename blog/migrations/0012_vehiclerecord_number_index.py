@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0011_vehiclerecord_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='vehiclerecord',
+            index=models.Index(fields=['vehicle_number', '-entry_time'], name='vehicle_number_entry_idx'),
+        ),
+    ]
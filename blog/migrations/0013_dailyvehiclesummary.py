@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:16
+
+import datetime
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0012_vehiclerecord_number_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyVehicleSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('product_type', models.CharField(max_length=100)),
+                ('vehicle_type', models.CharField(max_length=20)),
+                ('vehicles', models.PositiveIntegerField(default=0)),
+                ('total_quantity', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('exited', models.PositiveIntegerField(default=0)),
+                ('total_dwell', models.DurationField(default=datetime.timedelta)),
+                ('supplier', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='blog.supplier')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['supplier', 'date'], name='daily_summary_supplier_idx'), models.Index(fields=['product_type', 'date'], name='daily_summary_product_idx')],
+                'constraints': [models.UniqueConstraint(fields=('date', 'supplier', 'product_type', 'vehicle_type'), name='daily_vehicle_summary_key')],
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:58
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def log_existing_rows(apps, schema_editor):
+    # rows that predate the log are entries too, so a sync from cursor 0
+    # starts from the complete tables
+    now = django.utils.timezone.now()
+    for kind, table in (('stock', 'blog_stockitem'), ('vehicle', 'blog_vehiclerecord')):
+        schema_editor.execute(
+            "INSERT INTO blog_changelog (kind, object_id, deleted, changed_at) "
+            f"SELECT %s, id, %s, %s FROM {table} ORDER BY id",
+            [kind, False, schema_editor.connection.ops.adapt_datetimefield_value(now)],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0013_dailyvehiclesummary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=20)),
+                ('object_id', models.BigIntegerField()),
+                ('deleted', models.BooleanField(default=False)),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['kind', 'id'], name='changelog_kind_cursor_idx'), models.Index(fields=['kind', 'object_id'], name='changelog_kind_object_idx')],
+            },
+        ),
+        migrations.RunPython(log_existing_rows, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:01
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+# Where partial indexes are unsupported (MySQL, MariaDB) Django skips the
+# two conditional indexes; these plain ones serve the same lookups there
+FALLBACK_INDEXES = [
+    models.Index(fields=['exit_time', '-entry_time', '-id'], name='vehicle_exit_entry_idx'),
+    models.Index(fields=['plate_key', 'exit_time'], name='vehicle_plate_exit_idx'),
+]
+
+
+def add_fallback_indexes(apps, schema_editor):
+    if not schema_editor.connection.features.supports_partial_indexes:
+        VehicleRecord = apps.get_model('blog', 'VehicleRecord')
+        for index in FALLBACK_INDEXES:
+            schema_editor.add_index(VehicleRecord, index)
+
+
+def remove_fallback_indexes(apps, schema_editor):
+    if not schema_editor.connection.features.supports_partial_indexes:
+        VehicleRecord = apps.get_model('blog', 'VehicleRecord')
+        for index in FALLBACK_INDEXES:
+            schema_editor.remove_index(VehicleRecord, index)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0014_changelog'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vehiclerecord',
+            name='plate_key',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.functions.text.Upper(django.db.models.functions.text.Replace(django.db.models.functions.text.Replace(django.db.models.functions.text.Replace(django.db.models.functions.text.Replace(models.F('vehicle_number'), models.Value('-'), models.Value('')), models.Value(' '), models.Value('')), models.Value('.'), models.Value('')), models.Value('/'), models.Value(''))), output_field=models.CharField(max_length=50)),
+        ),
+        migrations.AddIndex(
+            model_name='vehiclerecord',
+            index=models.Index(condition=models.Q(('exit_time__isnull', True)), fields=['-entry_time', '-id'], name='vehicle_on_site_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vehiclerecord',
+            index=models.Index(condition=models.Q(('exit_time__isnull', True)), fields=['plate_key'], name='vehicle_on_site_plate_idx'),
+        ),
+        migrations.RunPython(add_fallback_indexes, remove_fallback_indexes),
+    ]
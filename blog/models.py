@@ -1,4 +1,8 @@
-from django.db import models
+from datetime import timedelta
+
+from django.db import models, transaction
+from django.db.models import Q, Value
+from django.db.models.functions import Replace, Upper
 from django.utils import timezone
 
 # Contact Form
@@ -81,6 +85,20 @@ class Inspection(models.Model):
         return f"{self.equipment.name} ({self.date})"
 
 
+# List querysets: the supplier is joined in the same query and only the
+# columns the list pages show are loaded, so page cost doesn't grow with
+# one supplier lookup per row.
+class StockItemQuerySet(models.QuerySet):
+    def for_list(self):
+        return self.select_related('supplier').only(
+            'id', 'name', 'fuel_type', 'quantity', 'min_level', 'last_updated',
+            'supplier__id', 'supplier__name', 'supplier__company_type',
+        )
+
+    def low(self):
+        return self.filter(quantity__lte=models.F('min_level'))
+
+
 # Stock Management (Fuel, Gas, etc.)
 class StockItem(models.Model):
     FUEL_TYPES = [
@@ -96,10 +114,82 @@ class StockItem(models.Model):
     min_level = models.PositiveIntegerField(default=100)
     last_updated = models.DateTimeField(auto_now=True)
 
+    objects = StockItemQuerySet.as_manager()
+
+    LEVEL_FIELDS = ('quantity', 'min_level')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # levels as loaded, so blog.signals can tell whether a save crossed
+        # the minimum level without reading the row again
+        instance._loaded_levels = {name: instance.__dict__.get(name) for name in cls.LEVEL_FIELDS}
+        return instance
+
     def __str__(self):
         return f"{self.name} - {self.fuel_type} ({self.quantity})"
 
 
+# Stock ledger: every change to StockItem.quantity is recorded as a movement
+# (see blog/stock.py, which applies them with F() updates)
+class StockMovement(models.Model):
+    KINDS = [
+        ('receipt', 'Receipt'),
+        ('issue', 'Issue'),
+        ('adjustment', 'Adjustment'),
+    ]
+    stock_item = models.ForeignKey(StockItem, on_delete=models.CASCADE, related_name='movements')
+    kind = models.CharField(max_length=20, choices=KINDS)
+    quantity = models.IntegerField(help_text="Signed change: positive adds stock, negative removes it")
+    vehicle_record = models.OneToOneField('VehicleRecord', on_delete=models.SET_NULL, null=True, blank=True,
+                                          related_name='stock_movement')
+    note = models.CharField(max_length=200, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['stock_item', '-created_at'], name='movement_item_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} {self.quantity:+d} {self.stock_item.name}"
+
+
+# Characters gate scanners and clerks put between the parts of a plate;
+# "lea-1234", "LEA 1234" and "LEA.1234" all have the plate key "LEA1234"
+PLATE_SEPARATORS = "- ./"
+
+
+def plate_key(vehicle_number):
+    """The normalized plate, as VehicleRecord.plate_key computes it in the database."""
+    number = vehicle_number.strip()
+    for separator in PLATE_SEPARATORS:
+        number = number.replace(separator, "")
+    return number.upper()
+
+
+def _plate_key_expression():
+    expression = models.F('vehicle_number')
+    for separator in PLATE_SEPARATORS:
+        expression = Replace(expression, Value(separator), Value(""))
+    return Upper(expression)
+
+
+class VehicleRecordQuerySet(models.QuerySet):
+    def on_site(self):
+        # matches the condition of the partial indexes below
+        return self.filter(exit_time__isnull=True)
+
+    def for_plate(self, vehicle_number):
+        return self.filter(plate_key=plate_key(vehicle_number))
+
+    def for_list(self):
+        return self.select_related('supplier').only(
+            'id', 'vehicle_number', 'vehicle_type', 'driver_name', 'driver_phone', 'product_type',
+            'quantity', 'entry_time', 'exit_time', 'supplier__id', 'supplier__name', 'supplier__company_type',
+        )
+
+
 # ✅ Vehicle Entry/Exit Records (Updated with driver_phone)
 class VehicleRecord(models.Model):
     VEHICLE_TYPES = [
@@ -120,6 +210,42 @@ class VehicleRecord(models.Model):
     remarks = models.TextField(blank=True)
     checked_by = models.CharField(max_length=100, blank=True)
     print_count = models.PositiveIntegerField(default=0)
+    plate_key = models.GeneratedField(expression=_plate_key_expression(), output_field=models.CharField(max_length=50),
+                                      db_persist=True)
+
+    objects = VehicleRecordQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # backs the keyset pagination in vehicle_list (newest first)
+            models.Index(fields=['-entry_time', '-id'], name='vehicle_entry_time_id_idx'),
+            # one per admin list_filter, each still ordered newest first
+            models.Index(fields=['product_type', '-entry_time'], name='vehicle_product_entry_idx'),
+            models.Index(fields=['vehicle_type', '-entry_time'], name='vehicle_type_entry_idx'),
+            models.Index(fields=['supplier', '-entry_time'], name='vehicle_supplier_entry_idx'),
+            # vehicle_lookup: every visit of one vehicle number, newest first
+            models.Index(fields=['vehicle_number', '-entry_time'], name='vehicle_number_entry_idx'),
+            # the on-site board and the gate scanners' plate lookup only ever
+            # want open visits, a small slice of the table; databases without
+            # partial indexes get the plain ones from migration 0015
+            models.Index(fields=['-entry_time', '-id'], condition=Q(exit_time__isnull=True), name='vehicle_on_site_idx'),
+            models.Index(fields=['plate_key'], condition=Q(exit_time__isnull=True), name='vehicle_on_site_plate_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # timestamps as loaded: blog.stock books the delivery when a save
+        # takes exit_time from empty to set, and blog.signals also rebuilds
+        # the rollup of the day a record was moved away from
+        instance._loaded_exit_time = instance.__dict__.get('exit_time')
+        instance._loaded_entry_time = instance.__dict__.get('entry_time')
+        return instance
+
+    def save(self, *args, **kwargs):
+        # the delivery booked on exit commits or rolls back with the exit
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.vehicle_number} - {self.product_type}"
@@ -130,6 +256,58 @@ class VehicleRecord(models.Model):
         return None
 
 
+# Per-day vehicle throughput, maintained from VehicleRecord by blog/rollups.py.
+# Records are bucketed by the local date of entry_time; dwell time covers the
+# vehicles of that bucket that have exited.
+class DailyVehicleSummary(models.Model):
+    date = models.DateField()
+    supplier = models.ForeignKey('Supplier', on_delete=models.CASCADE, null=True, blank=True)
+    product_type = models.CharField(max_length=100)
+    vehicle_type = models.CharField(max_length=20)
+    vehicles = models.PositiveIntegerField(default=0)
+    total_quantity = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    exited = models.PositiveIntegerField(default=0)
+    total_dwell = models.DurationField(default=timedelta)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['date', 'supplier', 'product_type', 'vehicle_type'], name='daily_vehicle_summary_key',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['supplier', 'date'], name='daily_summary_supplier_idx'),
+            models.Index(fields=['product_type', 'date'], name='daily_summary_product_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.supplier or '-'} {self.product_type} ({self.vehicle_type})"
+
+    def average_dwell(self):
+        if self.exited:
+            return self.total_dwell / self.exited
+        return None
+
+
+# Delta-sync feed for StockItem and VehicleRecord, written by blog/changes.py
+# from signals. The id is the clients' cursor; each object keeps only its
+# latest entry, and a deleted object's entry is its tombstone.
+class ChangeLog(models.Model):
+    kind = models.CharField(max_length=20)
+    object_id = models.BigIntegerField()
+    deleted = models.BooleanField(default=False)
+    changed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['kind', 'id'], name='changelog_kind_cursor_idx'),
+            models.Index(fields=['kind', 'object_id'], name='changelog_kind_object_idx'),
+        ]
+
+    def __str__(self):
+        return f"#{self.pk} {self.kind} {self.object_id}{' (deleted)' if self.deleted else ''}"
+
+
 # ✅ Properly defined Vehicle model
 class Vehicle(models.Model):
     vehicle_name = models.CharField(max_length=100)
@@ -152,4 +330,34 @@ class Vehicle(models.Model):
     date_added = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
-        return f"{self.vehicle_name} - {self.registration_number}"
\ No newline at end of file
+        return f"{self.vehicle_name} - {self.registration_number}"
+
+# Background PDF generation (processed by `manage.py pdf_worker`)
+class PdfJob(models.Model):
+    KINDS = [
+        ('receipt', 'Vehicle Receipt'),
+        ('report', 'Vehicle Report'),
+    ]
+    STATUSES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+    kind = models.CharField(max_length=20, choices=KINDS)
+    params = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUSES, default='queued')
+    file = models.FileField(upload_to='pdf_jobs/', blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # the worker polls for the oldest queued job
+            models.Index(fields=['status', 'created_at'], name='pdfjob_status_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} #{self.pk} ({self.status})"
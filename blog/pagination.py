@@ -0,0 +1,106 @@
+import base64
+from datetime import datetime
+
+from django.core.paginator import Paginator
+from django.db import connection
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+
+# ------------------ Keyset Pagination ------------------
+# Pages are addressed by the (timestamp, id) of the last row shown instead of
+# an OFFSET, so fetching page 500 costs the same as page 1 as long as the
+# ordering is backed by an index.
+
+def encode_cursor(timestamp, pk):
+    raw = f"{timestamp.isoformat()}|{pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Return (timestamp, pk) for a cursor, or None if it is missing or malformed."""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        timestamp, pk = raw.rsplit('|', 1)
+        timestamp, pk = datetime.fromisoformat(timestamp), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        return None
+    # encode_cursor always writes an offset; anything else was not ours
+    if timestamp.tzinfo is None:
+        return None
+    return timestamp, pk
+
+
+def keyset_page(queryset, cursor, size, field='entry_time'):
+    """
+    Slice a queryset ordered by ``-field, -id`` after the given cursor.
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    queryset = queryset.order_by(f'-{field}', '-id')
+    position = decode_cursor(cursor)
+    if position:
+        timestamp, pk = position
+        queryset = queryset.filter(
+            Q(**{f'{field}__lt': timestamp}) | Q(**{field: timestamp, 'id__lt': pk})
+        )
+    rows = list(queryset[:size + 1])
+    next_cursor = None
+    if len(rows) > size:
+        rows = rows[:size]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, field), last.pk)
+    return rows, next_cursor
+
+
+# ------------------ Estimated Counts ------------------
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that never runs an exact COUNT(*) over a large table.
+    Unfiltered PostgreSQL tables use the planner's row estimate; anything
+    else is counted up to `max_count` rows past the requested page. When
+    that cap is hit the count includes one row beyond it, so the last page
+    listed always links to a further page while more rows exist.
+    """
+
+    max_count = 10000
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.limit = self.max_count
+        self.capped = False
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if connection.vendor == 'postgresql' and not queryset.query.where:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                               [queryset.model._meta.db_table])
+                row = cursor.fetchone()
+            if row and row[0] > self.limit:
+                return row[0]
+        counted = queryset.order_by()[:self.limit + 1].count()
+        self.capped = counted > self.limit
+        return counted
+
+    def extend_to(self, number):
+        """Recount so that page `number` is complete when it lies past the cap."""
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            return
+        if number * self.per_page <= self.limit:
+            return
+        if 'count' in self.__dict__ and not self.capped:
+            return
+        self.limit = number * self.per_page + self.max_count
+        self.__dict__.pop('count', None)
+        self.__dict__.pop('num_pages', None)
+
+    def page(self, number):
+        self.extend_to(number)
+        return super().page(number)
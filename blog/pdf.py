@@ -0,0 +1,216 @@
+import zlib
+from io import BytesIO
+
+from django.utils import timezone
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas
+
+from .filters import filter_date_range
+from .instrumentation import timed
+from .models import VehicleRecord
+
+
+# ------------------ Vehicle Receipt ------------------
+
+def receipt_lines(vehicle):
+    return [
+        f"Vehicle No.: {vehicle.vehicle_number}",
+        f"Vehicle Type: {vehicle.vehicle_type}",
+        f"Driver: {vehicle.driver_name}    Phone: {vehicle.driver_phone or 'N/A'}",
+        f"Supplier: {vehicle.supplier.name if vehicle.supplier else 'N/A'}",
+        f"Product: {vehicle.product_type}",
+        f"Quantity: {vehicle.quantity}",
+        f"Entry Time: {vehicle.entry_time.strftime('%Y-%m-%d %H:%M')}",
+        f"Exit Time: {vehicle.exit_time.strftime('%Y-%m-%d %H:%M') if vehicle.exit_time else '---'}",
+        f"Checked By: {vehicle.checked_by or '---'}",
+        f"Remarks: {vehicle.remarks or '---'}",
+    ]
+
+
+def draw_vehicle_receipt(p, vehicle):
+    """Draw one receipt on the current page of a ReportLab canvas and finish the page."""
+    p.setFont("Helvetica-Bold", 16)
+    p.drawCentredString(300, 800, "Vehicle Receipt")
+
+    p.setFont("Helvetica", 11)
+    y = 760
+    for line in receipt_lines(vehicle):
+        p.drawString(60, y, line)
+        y -= 18
+
+    # footer: the date only, so a receipt cached today stays accurate all day
+    # (blog/pdf_cache.py keys receipts on it)
+    p.setFont("Helvetica-Oblique", 9)
+    p.drawString(60, 80, f"Printed: {timezone.localdate().isoformat()}")
+
+    p.showPage()
+
+
+def render_vehicle_receipt(vehicle):
+    return render_vehicle_receipts([vehicle])
+
+
+def render_vehicle_receipts(vehicles):
+    """One PDF with a receipt page per vehicle."""
+    with timed('pdf'):
+        buffer = BytesIO()
+        p = canvas.Canvas(buffer, pagesize=A4)
+        for vehicle in vehicles:
+            draw_vehicle_receipt(p, vehicle)
+        p.save()
+        pdf = buffer.getvalue()
+        buffer.close()
+    return pdf
+
+
+# ------------------ Streaming PDF Writer ------------------
+# ReportLab keeps every page of a document in memory until save(), which is
+# fine for a receipt but not for a multi-year report. This writer emits each
+# page as bytes as soon as it is finished; only the byte offsets needed for
+# the final cross-reference table are kept. It supports what the reports
+# need: text in the standard Helvetica faces.
+
+FONTS = {
+    'Helvetica': 'F1',
+    'Helvetica-Bold': 'F2',
+    'Helvetica-Oblique': 'F3',
+}
+
+CATALOG_ID = 1
+PAGES_ID = 2
+FIRST_FONT_ID = 3
+
+
+def _escape(text):
+    data = str(text).encode('cp1252', 'replace')
+    return data.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)')
+
+
+class Page:
+    def __init__(self):
+        self.ops = []
+        self.font = b"/F1 12 Tf"
+
+    def set_font(self, name, size):
+        self.font = f"/{FONTS[name]} {size} Tf".encode()
+
+    def draw_string(self, x, y, text):
+        self.ops.append(b"BT " + self.font + f" {x} {y} Td (".encode() + _escape(text) + b") Tj ET")
+
+    def content(self):
+        return b"\n".join(self.ops)
+
+
+class StreamingPDF:
+    def __init__(self, pagesize=A4):
+        self.width, self.height = pagesize
+        self.position = 0
+        self.offsets = {}
+        self.page_ids = []
+        self.next_id = FIRST_FONT_ID + len(FONTS)
+
+    def _object(self, obj_id, body):
+        self.offsets[obj_id] = self.position
+        chunk = f"{obj_id} 0 obj\n".encode() + body + b"\nendobj\n"
+        self.position += len(chunk)
+        return chunk
+
+    def begin(self):
+        header = b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n"
+        self.position = len(header)
+        chunks = [header]
+        for i, name in enumerate(FONTS):
+            chunks.append(self._object(
+                FIRST_FONT_ID + i,
+                f"<< /Type /Font /Subtype /Type1 /BaseFont /{name} /Encoding /WinAnsiEncoding >>".encode(),
+            ))
+        return b"".join(chunks)
+
+    def write_page(self, page):
+        content_id, page_id = self.next_id, self.next_id + 1
+        self.next_id += 2
+        self.page_ids.append(page_id)
+        stream = zlib.compress(page.content())
+        fonts = " ".join(f"/{ref} {FIRST_FONT_ID + i} 0 R" for i, ref in enumerate(FONTS.values()))
+        return self._object(
+            content_id,
+            f"<< /Length {len(stream)} /Filter /FlateDecode >>\nstream\n".encode() + stream + b"\nendstream",
+        ) + self._object(
+            page_id,
+            (f"<< /Type /Page /Parent {PAGES_ID} 0 R /MediaBox [0 0 {self.width:.2f} {self.height:.2f}] "
+             f"/Resources << /Font << {fonts} >> >> /Contents {content_id} 0 R >>").encode(),
+        )
+
+    def finish(self):
+        kids = " ".join(f"{page_id} 0 R" for page_id in self.page_ids)
+        chunks = [
+            self._object(PAGES_ID, f"<< /Type /Pages /Kids [{kids}] /Count {len(self.page_ids)} >>".encode()),
+            self._object(CATALOG_ID, f"<< /Type /Catalog /Pages {PAGES_ID} 0 R >>".encode()),
+        ]
+        size = self.next_id
+        xref = [f"xref\n0 {size}\n0000000000 65535 f \n"]
+        for obj_id in range(1, size):
+            xref.append(f"{self.offsets[obj_id]:010d} 00000 n \n")
+        xref.append(f"trailer\n<< /Size {size} /Root {CATALOG_ID} 0 R >>\nstartxref\n{self.position}\n%%EOF\n")
+        chunks.append("".join(xref).encode())
+        return b"".join(chunks)
+
+
+# ------------------ Vehicle Report ------------------
+
+def vehicle_report_queryset(params):
+    """
+    Vehicle records for the report, newest first, narrowed by the optional
+    ``date_from``/``date_to`` (YYYY-MM-DD) and ``supplier`` (id) parameters.
+    """
+    vehicles = VehicleRecord.objects.for_list().order_by('-entry_time', '-id')
+    vehicles = filter_date_range(vehicles, 'entry_time', params)
+    supplier = str(params.get('supplier') or '')
+    if supplier.isdigit():
+        vehicles = vehicles.filter(supplier_id=supplier)
+    return vehicles
+
+
+def vehicle_report_chunks(vehicles, chunk_size=500):
+    """Yield the vehicle report PDF a page at a time for the given queryset."""
+    # only the drawing is timed as PDF work; fetching rows counts as SQL
+    with timed('pdf'):
+        pdf = StreamingPDF()
+        first = pdf.begin()
+        page = Page()
+        page.set_font("Helvetica-Bold", 16)
+        page.draw_string(200, 800, "Vehicle Records Report")
+        page.set_font("Helvetica", 12)
+    yield first
+    y = 770
+    found = False
+
+    for v in vehicles.iterator(chunk_size=chunk_size):
+        found = True
+        with timed('pdf'):
+            page.draw_string(100, y, f"Vehicle No: {v.vehicle_number} | Driver: {v.driver_name}")
+            y -= 20
+            page.draw_string(120, y, f"Supplier: {v.supplier} | Product: {v.product_type} | Qty: {v.quantity}")
+            y -= 20
+            page.draw_string(120, y, f"Entry: {v.entry_time.strftime('%Y-%m-%d %H:%M')}")
+            if v.exit_time:
+                page.draw_string(120, y - 20, f"Exit: {v.exit_time.strftime('%Y-%m-%d %H:%M')}")
+                y -= 20
+            y -= 30
+            chunk = None
+            if y < 100:
+                chunk = pdf.write_page(page)
+                page = Page()
+                page.set_font("Helvetica", 12)
+                y = 770
+        if chunk:
+            yield chunk
+
+    with timed('pdf'):
+        if not found:
+            page.draw_string(100, y, "No vehicle records found.")
+        last = b""
+        if page.ops or not pdf.page_ids:
+            last = pdf.write_page(page)
+        last += pdf.finish()
+    yield last
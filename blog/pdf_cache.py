@@ -0,0 +1,86 @@
+import hashlib
+import os
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .pdf import receipt_lines, render_vehicle_receipt
+
+
+# ------------------ Receipt PDF Cache ------------------
+# Receipts are stored on disk as <record id>-<sha256 of the receipt text and
+# print date>.pdf, so an unchanged record maps to the same file for the day
+# its footer shows, and the digest doubles as the HTTP ETag. The file mtime
+# is the render time (used for Last-Modified); the atime is bumped on every
+# hit and drives LRU eviction. A running byte total in the cache means the
+# directory is only scanned once the budget is exceeded.
+
+SIZE_KEY = "blog:receipt-cache:bytes"
+
+
+def receipt_digest(vehicle):
+    text = "\n".join([*receipt_lines(vehicle), timezone.localdate().isoformat()])
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def _cache_dir():
+    return Path(settings.PDF_CACHE_DIR)
+
+
+def cached_receipt(vehicle, digest=None):
+    """Return the path of the receipt PDF for a record, rendering it on a miss."""
+    digest = digest or receipt_digest(vehicle)
+    path = _cache_dir() / f"{vehicle.pk}-{digest}.pdf"
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        pdf = render_vehicle_receipt(vehicle)
+        tmp.write_bytes(pdf)
+        os.replace(tmp, path)
+        _count_written(len(pdf))
+    else:
+        os.utime(path, (time.time(), stat.st_mtime))
+    return path
+
+
+def _count_written(size):
+    try:
+        total = cache.incr(SIZE_KEY, size)
+    except ValueError:
+        # total unknown (first write, or evicted from the cache): one scan sets it
+        total = None
+    # deleted receipts are never subtracted, so the total can only overshoot
+    # and trigger a scan early
+    if total is None or total > settings.PDF_CACHE_MAX_BYTES:
+        evict_receipts()
+
+
+def evict_receipts(max_bytes=None):
+    """Delete least recently used receipts until the cache fits in PDF_CACHE_MAX_BYTES."""
+    max_bytes = settings.PDF_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    entries = []
+    total = 0
+    for path in _cache_dir().glob('*.pdf'):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_atime, stat.st_size, path))
+        total += stat.st_size
+    entries.sort()
+    for _, size, path in entries:
+        if total <= max_bytes:
+            break
+        path.unlink(missing_ok=True)
+        total -= size
+    cache.set(SIZE_KEY, total, None)
+
+
+def invalidate_receipts(vehicle_pk):
+    for path in _cache_dir().glob(f"{vehicle_pk}-*.pdf"):
+        path.unlink(missing_ok=True)
@@ -0,0 +1,155 @@
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import Count, DurationField, ExpressionWrapper, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .filters import date_param, day_start
+from .models import DailyVehicleSummary, VehicleRecord
+
+KEY_FIELDS = ('supplier', 'product_type', 'vehicle_type')
+
+
+# ------------------ Daily Vehicle Rollups ------------------
+# A day's summary rows are always recomputed as a whole from its vehicle
+# records (one indexed range scan), so edits that move a record between
+# buckets, deletes and bulk writes all come out right without tracking
+# deltas. Saves refresh their day in place (refresh_day); whole ranges are
+# replaced by the backfill (rebuild_rollups).
+
+# pg_advisory_xact_lock class key serializing refreshes of the same day
+ROLLUP_LOCK_ID = 0x726f6c6c
+
+
+def _aggregate(vehicles):
+    dwell = ExpressionWrapper(F('exit_time') - F('entry_time'), output_field=DurationField())
+    return (
+        vehicles.order_by()
+        .annotate(date=TruncDate('entry_time'))
+        .values('date', *KEY_FIELDS)
+        .annotate(
+            vehicles=Count('id'),
+            total_quantity=Sum('quantity'),
+            exited=Count('id', filter=Q(exit_time__isnull=False)),
+            total_dwell=Sum(dwell, filter=Q(exit_time__isnull=False)),
+        )
+    )
+
+
+def rebuild_rollups(date_from=None, date_to=None, batch_size=1000):
+    """Replace the summaries between two dates (inclusive; open-ended when None)."""
+    vehicles = VehicleRecord.objects.all()
+    summaries = DailyVehicleSummary.objects.all()
+    if date_from:
+        vehicles = vehicles.filter(entry_time__gte=day_start(date_from))
+        summaries = summaries.filter(date__gte=date_from)
+    if date_to:
+        vehicles = vehicles.filter(entry_time__lt=day_start(date_to + timedelta(days=1)))
+        summaries = summaries.filter(date__lte=date_to)
+
+    rows = [
+        DailyVehicleSummary(date=row['date'], **_key(row), **_totals(row))
+        for row in _aggregate(vehicles).iterator()
+    ]
+    with transaction.atomic():
+        summaries.delete()
+        DailyVehicleSummary.objects.bulk_create(rows, batch_size=batch_size)
+    return len(rows)
+
+
+def _key(row):
+    return {'supplier_id': row['supplier'], 'product_type': row['product_type'], 'vehicle_type': row['vehicle_type']}
+
+
+def _totals(row):
+    return {
+        'vehicles': row['vehicles'],
+        'total_quantity': row['total_quantity'] or 0,
+        'exited': row['exited'],
+        'total_dwell': row['total_dwell'] or timedelta(0),
+    }
+
+
+def refresh_day(day):
+    """
+    Bring one day's summaries up to date in place: every bucket is upserted
+    and buckets left without vehicles are deleted. Refreshes of the same day
+    are serialized (advisory lock on PostgreSQL, the write lock that
+    IMMEDIATE transactions take on SQLite) and read the records only once
+    they hold it, so the last one to run sees every committed change.
+    """
+    with transaction.atomic():
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_xact_lock(%s, %s)", [ROLLUP_LOCK_ID, day.toordinal()])
+        stale = {
+            (summary.supplier_id, summary.product_type, summary.vehicle_type): summary.pk
+            for summary in DailyVehicleSummary.objects.select_for_update().filter(date=day)
+        }
+        vehicles = VehicleRecord.objects.filter(
+            entry_time__gte=day_start(day), entry_time__lt=day_start(day + timedelta(days=1)),
+        )
+        for row in _aggregate(vehicles):
+            key = _key(row)
+            DailyVehicleSummary.objects.update_or_create(date=day, **key, defaults=_totals(row))
+            stale.pop(tuple(key.values()), None)
+        if stale:
+            DailyVehicleSummary.objects.filter(pk__in=stale.values()).delete()
+
+
+def rebuild_days(days):
+    for day in sorted(set(days)):
+        refresh_day(day)
+
+
+def vehicle_days(pks):
+    """Local entry dates of the given vehicle records."""
+    return {
+        timezone.localdate(entry_time)
+        for entry_time in VehicleRecord.objects.filter(pk__in=pks).values_list('entry_time', flat=True)
+    }
+
+
+# ------------------ Throughput Report ------------------
+
+REPORT_GROUPS = {
+    'day': ('date',),
+    'supplier': ('supplier__name', 'product_type'),
+    'product': ('product_type',),
+    'vehicle_type': ('vehicle_type',),
+}
+
+
+def throughput_rows(params):
+    """
+    Totals from the daily summaries, grouped by ``group`` (see REPORT_GROUPS)
+    and narrowed by ``date_from``/``date_to``, ``supplier`` and ``product``.
+    """
+    group = params.get('group') if params.get('group') in REPORT_GROUPS else 'day'
+    summaries = DailyVehicleSummary.objects.all()
+    date_from, date_to = date_param(params, 'date_from'), date_param(params, 'date_to')
+    if date_from:
+        summaries = summaries.filter(date__gte=date_from)
+    if date_to:
+        summaries = summaries.filter(date__lte=date_to)
+    supplier = str(params.get('supplier') or '')
+    if supplier.isdigit():
+        summaries = summaries.filter(supplier_id=supplier)
+    if params.get('product'):
+        summaries = summaries.filter(product_type__iexact=params['product'])
+
+    fields = REPORT_GROUPS[group]
+    rows = list(
+        summaries.values(*fields)
+        .annotate(
+            vehicles_total=Sum('vehicles'),
+            quantity_total=Sum('total_quantity'),
+            exited_total=Sum('exited'),
+            dwell_total=Sum('total_dwell'),
+        )
+        .order_by(*fields)
+    )
+    for row in rows:
+        row['average_dwell'] = row['dwell_total'] / row['exited_total'] if row['exited_total'] else None
+    return group, rows
@@ -0,0 +1,175 @@
+import re
+
+from django.core.paginator import Paginator
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from .models import StockItem, Supplier, VehicleRecord
+
+
+# ------------------ Full-text Search ------------------
+# One search table covers suppliers, vehicles and stock items:
+#   SQLite:     an FTS5 virtual table, ranked with bm25
+#   PostgreSQL: a table with a generated tsvector column and a GIN index
+# The table is created by migration 0010 and kept in sync by the signals in
+# blog/signals.py. Other databases fall back to icontains filters.
+
+SEARCH_TABLE = 'blog_search_index'
+
+
+class SearchSource:
+    def __init__(self, code, model, fields):
+        self.code = code
+        self.model = model
+        self.fields = fields
+
+    def body(self, obj):
+        return " ".join(str(getattr(obj, f) or '') for f in self.fields)
+
+
+SOURCES = {
+    'supplier': SearchSource(1, Supplier, ('name', 'contact_person')),
+    'vehicle': SearchSource(2, VehicleRecord, ('vehicle_number', 'driver_name')),
+    'stock': SearchSource(3, StockItem, ('name',)),
+}
+
+# SQLite rows are keyed by rowid = object id * KIND_SLOTS + kind code, so a
+# record's entry is updated or deleted by primary key, not by a table scan
+KIND_SLOTS = 4
+
+
+def _terms(q):
+    return re.findall(r'\w+', q or '')[:10]
+
+
+def is_indexed():
+    return connection.vendor in ('sqlite', 'postgresql')
+
+
+def index_objects(kind, objs):
+    source = SOURCES[kind]
+    rows = [(obj.pk, source.body(obj)) for obj in objs]
+    if not rows or not is_indexed():
+        return
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            params = [(pk * KIND_SLOTS + source.code, body) for pk, body in rows]
+            cursor.executemany(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s", [(r,) for r, _ in params])
+            cursor.executemany(f"INSERT INTO {SEARCH_TABLE} (rowid, body) VALUES (%s, %s)", params)
+        else:
+            cursor.executemany(
+                f"INSERT INTO {SEARCH_TABLE} (kind, object_id, body) VALUES (%s, %s, %s) "
+                f"ON CONFLICT (kind, object_id) DO UPDATE SET body = EXCLUDED.body",
+                [(kind, pk, body) for pk, body in rows],
+            )
+
+
+def remove_objects(kind, pks):
+    if not pks or not is_indexed():
+        return
+    source = SOURCES[kind]
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.executemany(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s",
+                               [(pk * KIND_SLOTS + source.code,) for pk in pks])
+        else:
+            cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE kind = %s AND object_id = ANY(%s)", [kind, list(pks)])
+
+
+def rebuild_index(kind, chunk_size=2000):
+    source = SOURCES[kind]
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE rowid %% {KIND_SLOTS} = %s", [source.code])
+        elif connection.vendor == 'postgresql':
+            cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE kind = %s", [kind])
+    batch = []
+    for obj in source.model.objects.only('pk', *source.fields).iterator(chunk_size=chunk_size):
+        batch.append(obj)
+        if len(batch) >= chunk_size:
+            index_objects(kind, batch)
+            batch = []
+    index_objects(kind, batch)
+
+
+class SearchResults:
+    """
+    Lazily evaluated ranked results for Paginator: count() and slicing each
+    run one query against the search table, then the page's rows are loaded
+    by primary key from `queryset` in rank order.
+    """
+
+    def __init__(self, kind, q, queryset):
+        self.source = SOURCES[kind]
+        self.kind = kind
+        self.terms = _terms(q)
+        self.queryset = queryset
+
+    def match_sql(self):
+        if connection.vendor == 'sqlite':
+            match = " ".join(f'"{t}"*' for t in self.terms)
+            return (f"FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s AND rowid %% {KIND_SLOTS} = %s",
+                    [match, self.source.code])
+        match = " & ".join(f"{t}:*" for t in self.terms)
+        return (f"FROM {SEARCH_TABLE} WHERE document @@ to_tsquery('simple', %s) AND kind = %s",
+                [match, self.kind])
+
+    def count(self):
+        if not self.terms:
+            return 0
+        sql, params = self.match_sql()
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT COUNT(*) {sql}", params)
+            return cursor.fetchone()[0]
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, page):
+        if not self.terms:
+            return []
+        sql, params = self.match_sql()
+        if connection.vendor == 'sqlite':
+            select = f"SELECT rowid / {KIND_SLOTS} {sql} ORDER BY rank"
+        else:
+            select = f"SELECT object_id {sql} ORDER BY ts_rank(document, to_tsquery('simple', %s)) DESC"
+            params = params + [params[0]]
+        with connection.cursor() as cursor:
+            cursor.execute(f"{select} LIMIT %s OFFSET %s", params + [page.stop - page.start, page.start])
+            ids = [row[0] for row in cursor.fetchall()]
+        objs = self.queryset.in_bulk(ids)
+        return [objs[pk] for pk in ids if pk in objs]
+
+
+def _icontains(kind, terms):
+    condition = Q()
+    for term in terms:
+        term_q = Q()
+        for field in SOURCES[kind].fields:
+            term_q |= Q(**{f'{field}__icontains': term})
+        condition &= term_q
+    return condition
+
+
+def filter_queryset(kind, q, queryset):
+    """Narrow `queryset` to rows matching `q` (unranked), e.g. for the admin changelist."""
+    terms = _terms(q)
+    if not terms:
+        return queryset.none()
+    if not is_indexed():
+        return queryset.filter(_icontains(kind, terms))
+    results = SearchResults(kind, q, queryset)
+    sql, params = results.match_sql()
+    id_column = f"rowid / {KIND_SLOTS}" if connection.vendor == 'sqlite' else "object_id"
+    return queryset.filter(pk__in=RawSQL(f"SELECT {id_column} {sql}", params))
+
+
+def search(kind, q, queryset, page_number, per_page=25):
+    """Return a Paginator page of `queryset` rows matching `q`, best matches first."""
+    if is_indexed():
+        results = SearchResults(kind, q, queryset)
+    else:
+        terms = _terms(q)
+        results = queryset.filter(_icontains(kind, terms)).order_by('-pk') if terms else queryset.none()
+    return Paginator(results, per_page).get_page(page_number)
@@ -0,0 +1,209 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import Signal, receiver
+from django.utils import timezone
+
+from .broadcast import publish_low_stock
+from .caching import bump_model_version
+from .changes import FEEDS, log_changes
+from .instrumentation import record_query
+from .metrics import invalidate_dashboard_metrics
+from .models import DailyVehicleSummary, Equipment, Supplier, StockItem, VehicleRecord
+from .pdf_cache import invalidate_receipts
+from .rollups import rebuild_days, vehicle_days
+from .search import SOURCES, index_objects, remove_objects
+
+# Sent after queryset-level writes (update(), bulk_create()) that bypass
+# post_save, with the model as sender and the affected primary keys as `pks`.
+bulk_changed = Signal()
+
+
+# ------------------ Dashboard Cache ------------------
+
+@receiver(bulk_changed, sender=Equipment)
+@receiver(bulk_changed, sender=Supplier)
+@receiver(bulk_changed, sender=StockItem)
+@receiver(post_save, sender=Equipment)
+@receiver(post_delete, sender=Equipment)
+@receiver(post_save, sender=Supplier)
+@receiver(post_delete, sender=Supplier)
+@receiver(post_save, sender=StockItem)
+@receiver(post_delete, sender=StockItem)
+def reset_dashboard_metrics(sender, **kwargs):
+    invalidate_dashboard_metrics()
+
+
+# ------------------ Cached List Fragments ------------------
+# (VehicleRecord's version also keys the cached dwell analytics, and the
+# versions are the change stamps behind conditional GET)
+
+@receiver(bulk_changed, sender=Equipment)
+@receiver(bulk_changed, sender=Supplier)
+@receiver(bulk_changed, sender=StockItem)
+@receiver(post_save, sender=Equipment)
+@receiver(post_delete, sender=Equipment)
+@receiver(post_save, sender=Supplier)
+@receiver(post_delete, sender=Supplier)
+@receiver(post_save, sender=StockItem)
+@receiver(post_delete, sender=StockItem)
+@receiver(bulk_changed, sender=VehicleRecord)
+@receiver(post_save, sender=VehicleRecord)
+@receiver(post_delete, sender=VehicleRecord)
+def bump_list_version(sender, **kwargs):
+    bump_model_version(sender)
+
+
+# ------------------ Low Stock Feed ------------------
+# Only a change in "is this item low?" is pushed to clients, so routine
+# quantity edits above the minimum level cost nothing.
+
+def _is_low(quantity, min_level):
+    return quantity is not None and min_level is not None and quantity <= min_level
+
+
+def _stored_levels(instance):
+    if instance.pk is None:
+        return None
+    return StockItem.objects.filter(pk=instance.pk).values_list('quantity', 'min_level').first()
+
+
+@receiver(post_save, sender=StockItem)
+def push_low_stock_on_save(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    written = StockItem.LEVEL_FIELDS if update_fields is None else [f for f in StockItem.LEVEL_FIELDS if f in update_fields]
+    if raw or not written:
+        return
+    # ledger movements are F() updates and publish from apply_movement; a
+    # save compares against the levels the instance was loaded with
+    loaded = dict.fromkeys(StockItem.LEVEL_FIELDS) if created else getattr(instance, '_loaded_levels', None)
+    current = {**(loaded or {}), **{name: instance.__dict__.get(name) for name in written}}
+    if loaded is None or _is_low(**current) != _is_low(**loaded):
+        transaction.on_commit(publish_low_stock)
+    instance._loaded_levels = current
+
+
+@receiver(pre_delete, sender=StockItem)
+def push_low_stock_on_delete(sender, instance, **kwargs):
+    stored = _stored_levels(instance)
+    if stored and _is_low(*stored):
+        transaction.on_commit(publish_low_stock)
+
+
+# ------------------ Receipt PDF Cache ------------------
+
+@receiver(post_save, sender=VehicleRecord)
+@receiver(post_delete, sender=VehicleRecord)
+def drop_cached_receipts(sender, instance, **kwargs):
+    invalidate_receipts(instance.pk)
+
+
+@receiver(bulk_changed, sender=VehicleRecord)
+def drop_cached_receipts_bulk(sender, pks, **kwargs):
+    for pk in pks:
+        invalidate_receipts(pk)
+
+
+# ------------------ Daily Rollups ------------------
+# Rebuild the touched days once the change is committed.
+
+@receiver(post_save, sender=VehicleRecord)
+@receiver(post_delete, sender=VehicleRecord)
+def rollup_vehicle(sender, instance, **kwargs):
+    days = {timezone.localdate(instance.entry_time)}
+    # a record moved to another day leaves its old day's totals behind
+    loaded = getattr(instance, '_loaded_entry_time', None)
+    if loaded is not None:
+        days.add(timezone.localdate(loaded))
+    instance._loaded_entry_time = instance.entry_time
+    transaction.on_commit(lambda: rebuild_days(days))
+
+
+@receiver(bulk_changed, sender=VehicleRecord)
+def rollup_vehicles(sender, pks, **kwargs):
+    transaction.on_commit(lambda: rebuild_days(vehicle_days(pks)))
+
+
+@receiver(pre_delete, sender=Supplier)
+def rollup_supplier_delete(sender, instance, **kwargs):
+    # the supplier's summaries cascade away and its vehicles fall back to
+    # "no supplier", so those days need rebuilding
+    days = list(DailyVehicleSummary.objects.filter(supplier=instance).values_list('date', flat=True).distinct())
+    transaction.on_commit(lambda: rebuild_days(days))
+
+
+# ------------------ SQLite Tuning ------------------
+
+@receiver(connection_created)
+def tune_sqlite(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+
+
+# ------------------ Query Instrumentation ------------------
+
+@receiver(connection_created)
+def instrument_queries(sender, connection, **kwargs):
+    # fires again on reconnect; the wrapper list survives on the wrapper object
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+# ------------------ Search Index ------------------
+
+SEARCH_KINDS = {source.model: kind for kind, source in SOURCES.items()}
+
+
+@receiver(post_save, sender=Supplier)
+@receiver(post_save, sender=VehicleRecord)
+@receiver(post_save, sender=StockItem)
+def index_for_search(sender, instance, **kwargs):
+    index_objects(SEARCH_KINDS[sender], [instance])
+
+
+@receiver(post_delete, sender=Supplier)
+@receiver(post_delete, sender=VehicleRecord)
+@receiver(post_delete, sender=StockItem)
+def unindex_for_search(sender, instance, **kwargs):
+    remove_objects(SEARCH_KINDS[sender], [instance.pk])
+
+
+@receiver(bulk_changed, sender=Supplier)
+@receiver(bulk_changed, sender=VehicleRecord)
+@receiver(bulk_changed, sender=StockItem)
+def bulk_index_for_search(sender, pks, **kwargs):
+    kind = SEARCH_KINDS[sender]
+    index_objects(kind, sender.objects.filter(pk__in=pks).only('pk', *SOURCES[kind].fields))
+
+
+# ------------------ Delta Sync Log ------------------
+
+SYNC_KINDS = {feed.model: kind for kind, feed in FEEDS.items()}
+
+
+@receiver(post_save, sender=StockItem)
+@receiver(post_save, sender=VehicleRecord)
+def log_for_sync(sender, instance, **kwargs):
+    log_changes(SYNC_KINDS[sender], [instance.pk])
+
+
+@receiver(post_delete, sender=StockItem)
+@receiver(post_delete, sender=VehicleRecord)
+def tombstone_for_sync(sender, instance, **kwargs):
+    log_changes(SYNC_KINDS[sender], [instance.pk], deleted=True)
+
+
+@receiver(bulk_changed, sender=StockItem)
+@receiver(bulk_changed, sender=VehicleRecord)
+def bulk_log_for_sync(sender, pks, **kwargs):
+    log_changes(SYNC_KINDS[sender], pks)
+
+
+@receiver(pre_delete, sender=Supplier)
+def log_supplier_delete_for_sync(sender, instance, **kwargs):
+    # SET_NULL clears the supplier of its stock and vehicles without a save
+    for kind, feed in FEEDS.items():
+        log_changes(kind, feed.model.objects.filter(supplier=instance).values_list('pk', flat=True))
@@ -0,0 +1,114 @@
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .broadcast import publish_low_stock
+from .models import StockItem, StockMovement, VehicleRecord
+from .signals import bulk_changed
+
+
+class InsufficientStock(Exception):
+    pass
+
+
+# ------------------ Stock Ledger ------------------
+# Quantities are only ever changed with a relative F() update in the same
+# transaction as the ledger row, so concurrent receipts and issues from
+# different depots add up instead of overwriting each other.
+
+def _signed(kind, quantity):
+    if kind == 'receipt':
+        return abs(quantity)
+    if kind == 'issue':
+        return -abs(quantity)
+    return quantity
+
+
+def apply_movement(stock_item, kind, quantity, vehicle_record=None, note=''):
+    """
+    Record a movement and apply it to the item's quantity.
+    Raises InsufficientStock if an issue would take the quantity below zero.
+    """
+    delta = _signed(kind, quantity)
+    with transaction.atomic():
+        items = StockItem.objects.filter(pk=stock_item.pk)
+        if delta < 0:
+            items = items.filter(quantity__gte=-delta)
+        if not items.update(quantity=F('quantity') + delta, last_updated=timezone.now()):
+            raise InsufficientStock(f"Not enough {stock_item.name} in stock to issue {-delta}")
+        movement = StockMovement.objects.create(
+            stock_item=stock_item, kind=kind, quantity=delta, vehicle_record=vehicle_record, note=note
+        )
+        new_quantity, min_level = StockItem.objects.filter(pk=stock_item.pk).values_list('quantity', 'min_level').get()
+        if (new_quantity <= min_level) != (new_quantity - delta <= min_level):
+            transaction.on_commit(publish_low_stock)
+        transaction.on_commit(lambda: bulk_changed.send(sender=StockItem, pks=[stock_item.pk]))
+    return movement
+
+
+def stock_item_for_vehicle(vehicle):
+    """The stock item a delivery goes into: same product, preferring the same supplier."""
+    items = StockItem.objects.filter(fuel_type__iexact=vehicle.product_type.strip())
+    if vehicle.supplier_id:
+        match = items.filter(supplier_id=vehicle.supplier_id).order_by('id').first()
+        if match:
+            return match
+    return items.order_by('id').first()
+
+
+def post_vehicle_exit(vehicle):
+    """
+    Book a delivery into stock when a vehicle leaves the gate. Returns the
+    movement, or None when no stock item matches or it was already booked.
+    """
+    stock_item = stock_item_for_vehicle(vehicle)
+    if stock_item is None or StockMovement.objects.filter(vehicle_record=vehicle).exists():
+        return None
+    quantity = int(Decimal(vehicle.quantity).to_integral_value(rounding=ROUND_HALF_UP))
+    try:
+        return apply_movement(stock_item, 'receipt', quantity, vehicle_record=vehicle,
+                              note=f"Delivery by {vehicle.vehicle_number}")
+    except IntegrityError:
+        # another request booked this vehicle at the same moment
+        return None
+
+
+def exited_since_loaded(vehicle):
+    return vehicle.__dict__.get('exit_time') is not None and getattr(vehicle, '_loaded_exit_time', None) is None
+
+
+def book_exits(vehicles):
+    """Book deliveries for vehicles whose exit was written without save() (bulk_create/bulk_update)."""
+    for vehicle in vehicles:
+        if exited_since_loaded(vehicle):
+            post_vehicle_exit(vehicle)
+            vehicle._loaded_exit_time = vehicle.exit_time
+
+
+@receiver(post_save, sender=VehicleRecord)
+def book_delivery_on_exit(sender, instance, raw=False, update_fields=None, **kwargs):
+    # every save that records an exit (gate view, admin, edit form) lands
+    # here, inside the transaction VehicleRecord.save opens
+    if raw or (update_fields is not None and 'exit_time' not in update_fields):
+        return
+    book_exits([instance])
+
+
+def exit_vehicles(pks):
+    """
+    Record the exit of every listed vehicle still on site with one UPDATE and
+    book their deliveries. Returns the primary keys that were marked.
+    """
+    with transaction.atomic():
+        on_site = VehicleRecord.objects.filter(pk__in=pks, exit_time__isnull=True)
+        exited = list(on_site.values_list('pk', flat=True))
+        VehicleRecord.objects.filter(pk__in=exited, exit_time__isnull=True).update(exit_time=timezone.now())
+        for vehicle in VehicleRecord.objects.filter(pk__in=exited).only('pk', 'vehicle_number', 'supplier', 'product_type', 'quantity'):
+            post_vehicle_exit(vehicle)
+        if exited:
+            bulk_changed.send(sender=VehicleRecord, pks=exited)
+    return exited
@@ -0,0 +1,52 @@
+import gzip
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.exceptions import ImproperlyConfigured
+
+from .assets import missing_vendor_files
+
+try:
+    import brotli
+except ImportError:  # optional: only .gz files are written without it
+    brotli = None
+
+
+# ------------------ Static Files Storage ------------------
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    Content-hashed static files (see ManifestStaticFilesStorage), plus .gz and
+    .br copies of every hashed text file written by collectstatic, so the
+    server can send them pre-compressed.
+    """
+
+    compressible = ('.css', '.js', '.svg', '.json', '.map', '.txt', '.html', '.xml', '.ttf', '.eot', '.otf')
+    min_size = 512
+
+    def post_process(self, paths, dry_run=False, **options):
+        # with VENDOR_ASSETS_LOCAL the templates link to the vendored copies
+        # only, so a build without them would ship pages with no CSS or JS
+        if settings.VENDOR_ASSETS_LOCAL and (missing := missing_vendor_files()):
+            raise ImproperlyConfigured(
+                f"Vendored static files are missing: {', '.join(missing)}. Run `manage.py build_assets` first."
+            )
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for name in set(self.hashed_files.values()):
+            if name.endswith(self.compressible):
+                self.compress(Path(self.path(name)))
+
+    def compress(self, path):
+        data = path.read_bytes()
+        if len(data) < self.min_size:
+            return
+        variants = {'.gz': gzip.compress(data, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            variants['.br'] = brotli.compress(data, quality=11)
+        for suffix, compressed in variants.items():
+            # keep only copies that actually save bytes
+            if len(compressed) < len(data) * 0.95:
+                path.with_name(path.name + suffix).write_bytes(compressed)
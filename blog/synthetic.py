@@ -0,0 +1,247 @@
+import math
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+from itertools import accumulate
+
+from django.db import connections, transaction
+from django.utils import timezone
+
+from .models import Equipment, Inspection, Project, StockItem, Supplier, VehicleRecord
+
+# Rows generated per unit of --scale
+SCALE = {
+    'suppliers': 20,
+    'equipment': 20,
+    'stock': 25,
+    'inspections': 100,
+    'projects': 5,
+    'vehicles': 10_000,
+}
+
+SUPPLIER_NAMES = [
+    "Shell Pakistan", "Total Energies", "PSO", "Sui Northern Gas", "Hascol Petroleum",
+    "Attock Petroleum", "Byco", "Go Petroleum", "Gas & Oil Pakistan", "Puma Energy",
+]
+CITIES = ["Karachi", "Lahore", "Islamabad", "Rawalpindi", "Multan", "Faisalabad", "Port Qasim"]
+PEOPLE = ["Ali Khan", "Usman Ahmed", "Bilal Raza", "Hamid Iqbal", "Sana Malik", "Zeeshan", "Khalid"]
+PRODUCTS = [("Diesel", 45), ("Petrol", 35), ("LPG", 12), ("Natural Gas", 8)]
+
+# vehicle type: (weight, load in litres/kg, median gate dwell in minutes)
+VEHICLE_PROFILES = {
+    'Tanker': (60, (20_000, 45_000), 75),
+    'Truck': (25, (5_000, 15_000), 50),
+    'Service': (10, (0, 500), 25),
+    'Other': (5, (100, 2_000), 35),
+}
+
+# share of a day's arrivals per hour: quiet nights, morning and afternoon peaks
+HOURLY_ARRIVALS = [1, 1, 1, 1, 2, 4, 7, 9, 9, 8, 7, 6, 5, 6, 7, 7, 6, 5, 4, 3, 2, 2, 1, 1]
+
+
+# ------------------ Helpers ------------------
+
+@contextmanager
+def keep_timestamps(*models):
+    """
+    Let bulk_create write the given auto_now_add fields as set on the
+    instances, instead of stamping every row with the current time.
+    """
+    fields = [f for model in models for f in model._meta.concrete_fields if getattr(f, 'auto_now_add', False)]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def zipf_weights(n, s=1.1):
+    # a few large suppliers carry most of the traffic
+    return [1 / (rank + 1) ** s for rank in range(n)]
+
+
+def chunk_rng(seed, chunk):
+    """Generator for one chunk; chunks never share a stream, so output doesn't depend on worker count."""
+    return random.Random(seed * 1_000_003 + chunk)
+
+
+def vehicle_plate(rng):
+    return f"{rng.choice(['LEA', 'LES', 'KHI', 'TLC', 'RIR', 'ISB'])}-{rng.randrange(1000, 9999)}"
+
+
+# ------------------ Reference Data ------------------
+
+def create_reference_data(scale, seed, days=365):
+    """Suppliers, equipment, stock, inspections and projects; returns the supplier ids."""
+    rng = random.Random(seed)
+    now = timezone.now()
+
+    def some_time_ago():
+        return now - timedelta(minutes=rng.randrange(days * 24 * 60))
+
+    with transaction.atomic(), keep_timestamps(Supplier, Equipment, Inspection):
+        suppliers = Supplier.objects.bulk_create(
+            Supplier(
+                name=SUPPLIER_NAMES[n % len(SUPPLIER_NAMES)] + (f" {n // len(SUPPLIER_NAMES) + 1}" if n >= len(SUPPLIER_NAMES) else ""),
+                company_type=rng.choice(Supplier.COMPANY_TYPES)[0],
+                contact_person=rng.choice(PEOPLE),
+                email=f"supplier{n}@example.com",
+                phone=f"+92{rng.randint(3000000000, 3999999999)}",
+                address=rng.choice(CITIES),
+                date_added=some_time_ago(),
+            )
+            for n in range(SCALE['suppliers'] * scale)
+        )
+        equipment = Equipment.objects.bulk_create(
+            Equipment(
+                name=f"{kind} {n + 1}",
+                type=kind,
+                condition=rng.choices(['Good', 'Needs Repair', 'Out of Order'], [80, 15, 5])[0],
+                location=rng.choice(CITIES),
+                storage_capacity=rng.choice([0, 200, 1200, 5000, 20000]) if kind != 'Pipeline' else 0,
+                date_added=some_time_ago(),
+            )
+            for n in range(SCALE['equipment'] * scale)
+            for kind in [rng.choice(Equipment.EQUIPMENT_TYPES)[0]]
+        )
+        StockItem.objects.bulk_create(
+            StockItem(
+                name=f"{fuel} Stock {n + 1}",
+                fuel_type=fuel,
+                supplier=rng.choice(suppliers),
+                quantity=rng.randint(0, 5000),
+                min_level=500,
+            )
+            for n in range(SCALE['stock'] * scale)
+            for fuel in [rng.choices([p for p, _ in PRODUCTS], [w for _, w in PRODUCTS])[0]]
+        )
+        Inspection.objects.bulk_create(
+            Inspection(
+                equipment=rng.choice(equipment),
+                inspector=rng.choice(PEOPLE),
+                passed=rng.random() < 0.9,
+                remarks=rng.choice(["", "Minor leak fixed", "Pressure test ok", "Valve replaced"]),
+                date=some_time_ago().date(),
+            )
+            for _ in range(SCALE['inspections'] * scale)
+        )
+        Project.objects.bulk_create(
+            Project(
+                name=f"Pipeline Expansion {n + 1}",
+                location=rng.choice(["Karachi Port", "Multan Terminal", "Gwadar Refinery"]),
+                manager=rng.choice(PEOPLE),
+                start_date=some_time_ago().date(),
+                active=rng.random() < 0.6,
+            )
+            for n in range(SCALE['projects'] * scale)
+        )
+    return [s.pk for s in suppliers]
+
+
+# ------------------ Gate Records ------------------
+# At millions of rows bulk_create spends most of its time compiling SQL
+# value by value (and SQLite caps each INSERT at a few dozen rows), so
+# gate records are generated as plain tuples and written with one
+# executemany() of a single-row INSERT, each column adapted the way the
+# backend adapts it for the ORM.
+
+VEHICLE_COLUMNS = [
+    'vehicle_number', 'vehicle_type', 'driver_name', 'driver_phone', 'supplier', 'product_type',
+    'quantity', 'entry_time', 'exit_time', 'remarks', 'checked_by', 'print_count',
+]
+
+
+def _adapter(connection, field):
+    ops = connection.ops
+    if field.get_internal_type() == 'DateTimeField':
+        return ops.adapt_datetimefield_value
+    if field.get_internal_type() == 'DecimalField':
+        return lambda value: ops.adapt_decimalfield_value(value, field.max_digits, field.decimal_places)
+    return None
+
+
+def adapt_rows(model, names, rows, using='default'):
+    """Value tuples (in the order of `names`) as the database driver expects them."""
+    connection = connections[using]
+    fields = [model._meta.get_field(name) for name in names]
+    adapters = [(i, adapt) for i, f in enumerate(fields) if (adapt := _adapter(connection, f))]
+    rows = [list(row) for row in rows]
+    for row in rows:
+        for i, adapt in adapters:
+            if row[i] is not None:
+                row[i] = adapt(row[i])
+    return rows
+
+
+def insert_rows(model, names, rows, using='default'):
+    """INSERT adapted rows with a single executemany()."""
+    connection = connections[using]
+    sql = "INSERT INTO {} ({}) VALUES ({})".format(
+        connection.ops.quote_name(model._meta.db_table),
+        ", ".join(connection.ops.quote_name(model._meta.get_field(name).column) for name in names),
+        ", ".join(["%s"] * len(names)),
+    )
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, rows)
+    return len(rows)
+
+
+def vehicle_rows(rng, count, supplier_ids, now, days):
+    """Gate records as tuples in VEHICLE_COLUMNS order."""
+    # cumulative weights, so each weighted choice is a bisect rather than a re-sum
+    types = list(VEHICLE_PROFILES)
+    type_weights = list(accumulate(VEHICLE_PROFILES[t][0] for t in types))
+    supplier_weights = list(accumulate(zipf_weights(len(supplier_ids))))
+    products = [p for p, _ in PRODUCTS]
+    product_weights = list(accumulate(w for _, w in PRODUCTS))
+    hour_weights = list(accumulate(HOURLY_ARRIVALS))
+    today = timezone.localtime(now).replace(hour=0, minute=0, second=0, microsecond=0)
+
+    for _ in range(count):
+        vehicle_type = rng.choices(types, cum_weights=type_weights)[0]
+        _, (low, high), median_dwell = VEHICLE_PROFILES[vehicle_type]
+        # weekdays are busier than weekends
+        day = rng.randrange(days)
+        while (today - timedelta(days=day)).weekday() >= 5 and rng.random() < 0.5:
+            day = rng.randrange(days)
+        hour = rng.choices(range(24), cum_weights=hour_weights)[0]
+        entry = today - timedelta(days=day) + timedelta(hours=hour, minutes=rng.random() * 60)
+        if entry > now:
+            entry -= timedelta(days=1)
+        # long-tailed dwell around the type's median; the latest arrivals may still be on site
+        exit_time = entry + timedelta(minutes=rng.lognormvariate(math.log(median_dwell), 0.6))
+        if exit_time > now:
+            exit_time = None
+        yield (
+            vehicle_plate(rng),
+            vehicle_type,
+            rng.choice(PEOPLE),
+            f"03{rng.randint(100000000, 499999999)}",
+            rng.choices(supplier_ids, cum_weights=supplier_weights)[0] if supplier_ids else None,
+            rng.choices(products, cum_weights=product_weights)[0] if vehicle_type != 'Service' else "Service",
+            Decimal(rng.randint(low, high)),
+            entry,
+            exit_time,
+            "",
+            rng.choice(PEOPLE),
+            0,
+        )
+
+
+def generate_vehicle_chunk(seed, chunk, count, supplier_ids, now, days):
+    """One chunk of gate records, ready for insert_rows(); the same arguments always give the same rows."""
+    rows = vehicle_rows(chunk_rng(seed, chunk), count, supplier_ids, now, days)
+    return adapt_rows(VehicleRecord, VEHICLE_COLUMNS, rows)
+
+
+def write_vehicle_chunk(rows):
+    """Insert generated gate records in one transaction; returns the number written."""
+    with transaction.atomic():
+        return insert_rows(VehicleRecord, VEHICLE_COLUMNS, rows)
+
+
+def create_vehicle_chunk(*args):
+    return write_vehicle_chunk(generate_vehicle_chunk(*args))
@@ -0,0 +1,52 @@
+from django import template
+from django.templatetags.static import static
+from django.utils.html import format_html, format_html_join
+
+from blog.assets import image_variants, vendor_url
+
+register = template.Library()
+
+
+@register.simple_tag
+def vendor(name):
+    """<link>/<script> tag for a vendored library, e.g. {% vendor 'bootstrap.css' %}."""
+    if name.endswith('.css'):
+        return format_html('<link rel="stylesheet" href="{}">', vendor_url(name))
+    return format_html('<script src="{}"></script>', vendor_url(name))
+
+
+@register.simple_tag
+def vendor_src(name):
+    return vendor_url(name)
+
+
+@register.simple_tag
+def picture(src, sizes="100vw", **attrs):
+    """
+    <picture> with AVIF/WebP sources for an image that has built variants,
+    falling back to the original file; extra keyword arguments become <img>
+    attributes.
+    """
+    sources = format_html_join(
+        "", '<source type="{}" srcset="{}" sizes="{}">',
+        (
+            (mime, ", ".join(f"{static(path)} {width}w" for path, width in files), sizes)
+            for mime, files in image_variants(src).items()
+        ),
+    )
+    img_attrs = format_html_join("", ' {}="{}"', ((key.replace('_', '-'), value) for key, value in attrs.items()))
+    return format_html('<picture>{}<img src="{}"{}></picture>', sources, static(src), img_attrs)
+
+
+@register.simple_tag
+def background_image(src):
+    """CSS background-image value preferring the largest AVIF/WebP variant."""
+    fallback = format_html('url("{}")', static(src))
+    options = [
+        format_html('url("{}") type("{}")', static(files[-1][0]), mime)
+        for mime, files in image_variants(src).items()
+    ]
+    if not options:
+        return fallback
+    options.append(format_html('{} type("image/{}")', fallback, src.rsplit('.', 1)[-1].replace('jpg', 'jpeg')))
+    return format_html("image-set({})", format_html_join(", ", "{}", ((o,) for o in options)))
@@ -0,0 +1,15 @@
+from django import template
+
+from blog.caching import model_versions
+
+register = template.Library()
+
+
+@register.simple_tag
+def model_version(*labels):
+    """
+    Version key for fragments showing these models, e.g.
+    {% model_version 'blog.StockItem' 'blog.Supplier' as version %}
+    {% cache 3600 stock_table version %}...{% endcache %}
+    """
+    return model_versions(*labels)
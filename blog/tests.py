@@ -1,3 +1,957 @@
-from django.test import TestCase
+import asyncio
+import base64
+import json
+import logging
+import re
+import shutil
+import tempfile
+from datetime import datetime, timedelta, timezone as dt_timezone
+from io import BytesIO, StringIO
+from pathlib import Path
+from unittest import addModuleCleanup, skipUnless
+from unittest.mock import patch
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import F, Sum
+from django.http import FileResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+try:
+    import pypdf
+except ImportError:  # optional: the streamed report is parsed when it is installed
+    pypdf = None
+
+from .analytics import dwell_stats, np
+from .assets import VENDOR_ASSETS, missing_vendor_files, vendor_url
+from .broadcast import low_stock_feed
+from .changes import rebuild_change_log
+from .checks import check_shared_cache, check_vendor_assets
+from .exports import EXPORTS
+from .importers import import_rows
+from .instrumentation import RequestTimingMiddleware, RequestTimings, SlowRequestFileHandler
+from .jobs import fail_stale_jobs
+from .management.commands.bench_routes import Command as BenchRoutesCommand
+from .metrics import get_dashboard_metrics
+from .models import DailyVehicleSummary, Equipment, PdfJob, StockItem, Supplier, VehicleRecord
+from .pagination import EstimatedCountPaginator, encode_cursor
+from .pdf_cache import cached_receipt, evict_receipts, receipt_digest
+from .rollups import rebuild_days
+from .stock import apply_movement
+from .synthetic import generate_vehicle_chunk
+
+
+def setUpModule():
+    # the default cache is the directory the running site shares (and keeps
+    # its version counters in); these tests clear it, so they get their own
+    cache_dir = tempfile.mkdtemp()
+    addModuleCleanup(shutil.rmtree, cache_dir, ignore_errors=True)
+    test_caches = override_settings(CACHES={'default': {**settings.CACHES['default'], 'LOCATION': cache_dir}})
+    test_caches.enable()
+    addModuleCleanup(test_caches.disable)
+
+
+class ListViewQueryBudgetTests(TestCase):
+    """
+    Fails a test when a page runs more than a fixed number of queries, and
+    when the number of queries changes with the number of rows shown (N+1).
+    """
+
+    def seed(self, rows):
+        for i in range(rows):
+            supplier = Supplier.objects.create(name=f"Supplier {i}")
+            Equipment.objects.create(name=f"Pump {i}", type="Pump")
+            StockItem.objects.create(name=f"Diesel {i}", fuel_type="Diesel", supplier=supplier,
+                                     quantity=10, min_level=100)
+            VehicleRecord.objects.create(vehicle_number=f"LEA-{i}", driver_name="Driver", supplier=supplier,
+                                         product_type="Diesel", quantity=1000)
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            if response.streaming:
+                b''.join(response.streaming_content)
+        return len(ctx), [q['sql'] for q in ctx.captured_queries]
+
+    def assertQueryBudget(self, url, budget):
+        self.seed(3)
+        small, _ = self.count_queries(url)
+        self.seed(30)
+        large, queries = self.count_queries(url)
+        self.assertLessEqual(large, budget, f"{url} ran {large} queries:\n" + "\n".join(queries))
+        self.assertEqual(small, large, f"{url} query count grows with rows: {small} -> {large}")
+
+    def test_stock_list(self):
+        self.assertQueryBudget(reverse('stock_list'), 1)
+
+    def test_low_stock(self):
+        self.assertQueryBudget(reverse('low_stock'), 1)
+
+    def test_low_stock_json(self):
+        self.assertQueryBudget(reverse('low_stock') + '?format=json', 1)
+
+    def test_supplier_list(self):
+        self.assertQueryBudget(reverse('supplier_list'), 1)
+
+    def test_equipment_list(self):
+        self.assertQueryBudget(reverse('equipment_list'), 1)
+
+    def test_vehicle_list(self):
+        self.assertQueryBudget(reverse('vehicle_list'), 1)
+
+    def test_vehicle_report_pdf(self):
+        self.assertQueryBudget(reverse('vehicle_report_pdf'), 1)
+
+    def test_dashboard(self):
+        self.assertQueryBudget(reverse('dashboard'), 2)
+
+    def test_stock_data(self):
+        self.assertQueryBudget(reverse('stock_data'), 1)
+
+    def test_vehicle_lookup(self):
+        self.assertQueryBudget(reverse('vehicle_lookup') + '?number=LEA-1', 2)
+
+
+@override_settings(VEHICLE_PAGE_SIZE=3)
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        tied = timezone.make_aware(datetime(2024, 3, 1, 12))
+        for i in range(8):
+            vehicle = VehicleRecord.objects.create(vehicle_number=f"LEA-{i}", driver_name="Driver",
+                                                   product_type="Diesel", quantity=1000)
+            # five rows share one entry time, so only the id breaks the tie
+            entry_time = tied if i < 5 else tied + timedelta(hours=i)
+            VehicleRecord.objects.filter(pk=vehicle.pk).update(entry_time=entry_time)
+        self.expected = list(VehicleRecord.objects.order_by('-entry_time', '-id').values_list('pk', flat=True))
+
+    def more(self, cursor=None):
+        data = self.client.get(reverse('vehicle_list_more'), {'cursor': cursor} if cursor else {}).json()
+        return [row['id'] for row in data['results']], data['next_cursor']
+
+    def walk(self):
+        seen, cursor = [], None
+        while True:
+            ids, cursor = self.more(cursor)
+            seen.extend(ids)
+            if cursor is None:
+                return seen
+
+    def test_pages_cover_every_row_once_across_ties(self):
+        self.assertEqual(self.walk(), self.expected)
+
+    def test_full_last_page_has_no_next_cursor(self):
+        VehicleRecord.objects.filter(pk__in=self.expected[6:]).delete()
+        ids, cursor = self.more()
+        ids, cursor = self.more(cursor)
+        self.assertEqual((ids, cursor), (self.expected[3:6], None))
+
+    def test_invalid_cursors_start_from_the_top(self):
+        first_page = self.expected[:3]
+        naive = base64.urlsafe_b64encode(f"2024-03-01T12:00:00|{self.expected[4]}".encode()).decode()
+        for cursor in ("not-a-cursor!", encode_cursor(timezone.now(), 1)[:-3], "MjAyNHxhYmM", naive):
+            self.assertEqual(self.more(cursor)[0], first_page, cursor)
+
+
+class SmallCapPaginator(EstimatedCountPaginator):
+    max_count = 10
+
+
+class EstimatedCountPaginatorTests(TestCase):
+    def paginator(self, rows):
+        Supplier.objects.bulk_create(Supplier(name=f"Supplier {i}") for i in range(rows))
+        return SmallCapPaginator(Supplier.objects.order_by('id'), 5)
+
+    def test_small_tables_are_counted_exactly(self):
+        paginator = self.paginator(8)
+        self.assertEqual(paginator.count, 8)
+        self.assertFalse(paginator.capped)
+        self.assertEqual(paginator.num_pages, 2)
+
+    def test_capped_count_links_past_the_cap(self):
+        paginator = self.paginator(25)
+        self.assertEqual(paginator.count, 11)
+        self.assertTrue(paginator.capped)
+        self.assertTrue(paginator.page(2).has_next())
+
+        page = paginator.page(3)
+        self.assertEqual(len(page.object_list), 5)
+        self.assertTrue(page.has_next())
+        self.assertEqual(paginator.count, 25)
+        self.assertFalse(paginator.page(5).has_next())
+
+
+class AsyncJsonViewTests(TestCase):
+    def test_vehicle_lookup(self):
+        supplier = Supplier.objects.create(name="PSO")
+        for exit_time in (timezone.now(), None):
+            VehicleRecord.objects.create(vehicle_number="LEA-1", driver_name="Driver", supplier=supplier,
+                                         product_type="Diesel", quantity=1000, exit_time=exit_time)
+        data = self.client.get(reverse('vehicle_lookup'), {'number': 'LEA-1'}).json()
+        self.assertEqual(data['visits'], 2)
+        self.assertTrue(data['on_site'])
+        self.assertEqual(data['recent'][0]['supplier__name'], "PSO")
+        self.assertEqual(self.client.get(reverse('vehicle_lookup')).status_code, 400)
+
+    def test_dashboard_metrics(self):
+        StockItem.objects.create(name="Diesel", fuel_type="Diesel", quantity=10, min_level=100)
+        data = self.client.get(reverse('dashboard_metrics')).json()
+        self.assertEqual(data['total_stock_items'], 1)
+        self.assertEqual(data['low_stock_count'], 1)
+
+
+class DashboardMetricsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.supplier = Supplier.objects.create(name="PSO")
+
+    def assertMetrics(self, **expected):
+        metrics = get_dashboard_metrics()
+        self.assertEqual({key: metrics[key] for key in expected}, expected)
+
+    def test_saves_and_deletes_refresh_the_cached_figures(self):
+        self.assertMetrics(total_equipment=0, total_suppliers=1, total_stock_items=0)
+        pump = Equipment.objects.create(name="Pump", type="Pump")
+        self.assertMetrics(total_equipment=1)
+        other = Supplier.objects.create(name="Shell")
+        self.assertMetrics(total_suppliers=2)
+        item = StockItem.objects.create(name="Diesel", fuel_type="Diesel", quantity=500, min_level=100)
+        self.assertMetrics(total_stock_items=1, total_quantity=500, low_stock_count=0, chart_data=[500])
+
+        item.quantity = 50
+        item.save()
+        self.assertMetrics(total_quantity=50, low_stock_count=1)
+        with self.captureOnCommitCallbacks(execute=True):
+            apply_movement(item, 'receipt', 450)
+        self.assertMetrics(total_quantity=500, low_stock_count=0)
+
+        pump.delete()
+        other.delete()
+        item.delete()
+        self.assertMetrics(total_equipment=0, total_suppliers=1, total_stock_items=0, chart_data=[])
+
+    def test_figures_are_cached_between_changes(self):
+        get_dashboard_metrics()
+        with self.assertNumQueries(0):
+            get_dashboard_metrics()
+
+
+class FragmentCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.supplier = Supplier.objects.create(name="Attock Refinery")
+
+    def test_list_is_served_from_cache_until_a_save(self):
+        url = reverse('supplier_list')
+        with self.assertNumQueries(1):
+            self.client.get(url)
+        with self.assertNumQueries(0):
+            self.assertContains(self.client.get(url), "Attock Refinery")
+
+        self.supplier.name = "Byco Petroleum"
+        self.supplier.save()
+        with self.assertNumQueries(1):
+            self.assertContains(self.client.get(url), "Byco Petroleum")
+
+    def test_bulk_changes_bump_the_version(self):
+        StockItem.objects.create(name="Diesel", fuel_type="Diesel", supplier=self.supplier, quantity=500, min_level=100)
+        url = reverse('stock_list')
+        self.client.get(url)
+        item = StockItem.objects.get()
+        with self.captureOnCommitCallbacks(execute=True):
+            apply_movement(item, 'issue', 450)
+        self.assertContains(self.client.get(url), '<span class="badge bg-danger">50</span>', html=True)
+
+
+@patch('blog.signals.publish_low_stock')
+class LowStockSignalTests(TestCase):
+    def setUp(self):
+        self.item = StockItem.objects.create(name="Diesel", fuel_type="Diesel", quantity=500, min_level=100)
+
+    def test_crossing_the_minimum_level_publishes(self, publish):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.item.min_level = 600
+            self.item.save(update_fields=['min_level'])
+            self.item.name = "Diesel Tank"
+            self.item.save()
+        self.assertEqual(publish.call_count, 1)
+
+    def test_state_is_read_from_the_stored_row(self, publish):
+        stale = StockItem.objects.get()
+        StockItem.objects.filter(pk=stale.pk).update(quantity=50)
+        with self.captureOnCommitCallbacks(execute=True):
+            stale.name = "Diesel Tank"
+            stale.save(update_fields=['name'])
+        publish.assert_not_called()
+        with self.captureOnCommitCallbacks(execute=True):
+            stale.delete()
+        publish.assert_called_once()
+
+    def test_saves_do_not_read_the_row_back(self, publish):
+        item = StockItem.objects.get()
+        with CaptureQueriesContext(connection) as ctx, self.captureOnCommitCallbacks(execute=True):
+            item.quantity = 50
+            item.save()
+        self.assertFalse([q for q in ctx.captured_queries if q['sql'].startswith('SELECT') and 'blog_stockitem' in q['sql']])
+        publish.assert_called_once()
+
+
+class LowStockStreamTests(TestCase):
+    def setUp(self):
+        StockItem.objects.create(name="Diesel", fuel_type="Diesel", quantity=50, min_level=100)
+
+    def test_wsgi_clients_are_sent_to_polling(self):
+        self.assertEqual(self.client.get(reverse('low_stock_stream')).status_code, 204)
+        self.client.force_login(User.objects.create_user("clerk"))
+        response = self.client.get(reverse('dashboard'))
+        self.assertNotContains(response, 'new EventSource')
+        self.assertContains(response, 'setInterval(pollLowStock')
+
+    async def test_asgi_clients_get_the_snapshot_then_updates(self):
+        response = await self.async_client.get(reverse('low_stock_stream'))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        events = aiter(response.streaming_content)
+        first = await anext(events)
+        self.assertIn(b'"low_stock_count": 1', first)
+        low_stock_feed.publish('{"low_stock_count": 0}')
+        self.assertEqual(await anext(events), b'data: {"low_stock_count": 0}\n\n')
+        await events.aclose()
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.supplier = Supplier.objects.create(name="PSO")
+        self.item = StockItem.objects.create(name="Diesel", fuel_type="Diesel", supplier=self.supplier,
+                                             quantity=500, min_level=100)
+
+    def test_unchanged_json_is_a_304_without_queries(self):
+        url = reverse('stock_data')
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+
+        self.item.quantity = 400
+        self.item.save()
+        response = self.client.get(url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), [{'name': "Diesel", 'quantity': 400}])
+
+    async def test_async_views_read_the_stamps_off_the_event_loop(self):
+        get_many = FileBasedCache.get_many
+
+        def off_the_loop(backend, keys, **kwargs):
+            with self.assertRaises(RuntimeError):
+                asyncio.get_running_loop()
+            return get_many(backend, keys, **kwargs)
+
+        url = reverse('stock_data')
+        with patch.object(FileBasedCache, 'get_many', autospec=True, side_effect=off_the_loop) as lookup:
+            etag = (await self.async_client.get(url))['ETag']
+            response = await self.async_client.get(url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(lookup.call_count, 2)
+
+    def test_pages_revalidate_per_session(self):
+        url = reverse('stock_list')
+        response = self.client.get(url)
+        self.assertIn('Cookie', response['Vary'])
+        self.assertEqual(self.client.get(url, headers={'If-None-Match': response['ETag']}).status_code, 304)
+        # a changed supplier name shows on the stock page too
+        self.supplier.name = "Shell"
+        self.supplier.save()
+        self.assertEqual(self.client.get(url, headers={'If-None-Match': response['ETag']}).status_code, 200)
+
+        etag = self.client.get(url)['ETag']
+        self.client.force_login(User.objects.create_user("clerk"))
+        self.assertEqual(self.client.get(url, headers={'If-None-Match': etag}).status_code, 200)
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        supplier = Supplier.objects.create(name="Attock Refinery")
+        for number, day in (("LEA-1", 1), ("LEA-2", 5), ("LEA-3", 9)):
+            vehicle = VehicleRecord.objects.create(vehicle_number=number, driver_name="Driver, Jr.", supplier=supplier,
+                                                   product_type="Diesel", quantity=1000)
+            VehicleRecord.objects.filter(pk=vehicle.pk).update(
+                entry_time=timezone.make_aware(datetime(2024, 3, day, 12)))
+
+    def export(self, name='vehicles', **params):
+        response = self.client.get(reverse('export_data', args=[name]), params)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_csv_has_a_header_and_one_line_per_row(self):
+        response, body = self.export(fields='vehicle_number,driver_name,supplier__name')
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="vehicles.csv"')
+        self.assertEqual(body.splitlines(), [
+            'vehicle_number,driver_name,supplier__name',
+            'LEA-1,"Driver, Jr.",Attock Refinery',
+            'LEA-2,"Driver, Jr.",Attock Refinery',
+            'LEA-3,"Driver, Jr.",Attock Refinery',
+        ])
+
+    def test_ndjson_has_one_object_per_row(self):
+        response, body = self.export(format='ndjson', fields='vehicle_number,quantity,entry_time')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(set(rows[0]), {'vehicle_number', 'quantity', 'entry_time'})
+        self.assertEqual((rows[0]['vehicle_number'], rows[0]['quantity']), ("LEA-1", "1000.00"))
+
+    def test_all_fields_by_default(self):
+        _, body = self.export(name='stock')
+        self.assertEqual(body.splitlines(), [','.join(EXPORTS['stock'].fields)])
+
+    def test_unknown_fields_are_rejected(self):
+        response = self.client.get(reverse('export_data', args=['vehicles']), {'fields': 'vehicle_number,password'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['error'], "Unknown fields: password")
+        self.assertEqual(self.client.get(reverse('export_data', args=['users'])).status_code, 404)
+
+    def test_since_and_until_are_inclusive_days(self):
+        _, body = self.export(format='ndjson', fields='vehicle_number', since='2024-03-05', until='2024-03-09')
+        self.assertEqual([json.loads(line)['vehicle_number'] for line in body.splitlines()], ["LEA-2", "LEA-3"])
+        _, body = self.export(format='ndjson', fields='vehicle_number', until='2024-03-04')
+        self.assertEqual([json.loads(line)['vehicle_number'] for line in body.splitlines()], ["LEA-1"])
+
+
+class DeltaSyncTests(TestCase):
+    def sync(self, since, **params):
+        return self.client.get(reverse('sync_changes'), {'since': since, **params}).json()
+
+    def test_returns_changes_and_tombstones_after_the_cursor(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            supplier = Supplier.objects.create(name="PSO")
+            diesel = StockItem.objects.create(name="Diesel", fuel_type="Diesel", supplier=supplier, quantity=500)
+            petrol = StockItem.objects.create(name="Petrol", fuel_type="Petrol", quantity=300)
+        first = self.sync(0)
+        self.assertEqual([row['name'] for row in first['changes']['stock']], ["Diesel", "Petrol"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            apply_movement(diesel, 'issue', 100)
+            petrol_pk = petrol.pk
+            petrol.delete()
+            vehicle = VehicleRecord.objects.create(vehicle_number="LEA-1", driver_name="Driver", supplier=supplier,
+                                                   product_type="Diesel", quantity=1000)
+        with self.assertNumQueries(3):
+            second = self.sync(first['cursor'])
+        self.assertEqual(second['changes']['stock'][0]['quantity'], 400)
+        self.assertEqual(second['deleted'], {'stock': [petrol_pk], 'vehicle': []})
+        self.assertEqual(second['changes']['vehicle'][0]['id'], vehicle.pk)
+
+        # a deleted supplier is cleared from its rows without a save
+        with self.captureOnCommitCallbacks(execute=True):
+            supplier.delete()
+        third = self.sync(second['cursor'], kinds='vehicle')
+        self.assertEqual(third['changes']['vehicle'][0]['supplier_id'], None)
+        self.assertEqual(self.sync(third['cursor'], kinds='vehicle')['changes']['vehicle'], [])
+
+    def test_a_longer_transaction_is_not_skipped(self):
+        # transaction A saves first but commits after B; a client syncing
+        # in between must still get A's change on its next sync
+        with self.captureOnCommitCallbacks() as commit_a:
+            StockItem.objects.create(name="Diesel")
+        with self.captureOnCommitCallbacks(execute=True):
+            StockItem.objects.create(name="Petrol")
+        first = self.sync(0)
+        self.assertEqual([row['name'] for row in first['changes']['stock']], ["Petrol"])
+        for callback in commit_a:
+            callback()
+        second = self.sync(first['cursor'])
+        self.assertEqual([row['name'] for row in second['changes']['stock']], ["Diesel"])
+
+    def test_pages_by_cursor(self):
+        StockItem.objects.bulk_create(StockItem(name=f"Item {n}") for n in range(5))
+        rebuild_change_log('stock')
+        page = self.sync(0, limit=3)
+        self.assertTrue(page['more'])
+        rest = self.sync(page['cursor'], limit=3)
+        self.assertFalse(rest['more'])
+        self.assertEqual(len(page['changes']['stock']) + len(rest['changes']['stock']), 5)
+
+
+class DailyRollupTests(TestCase):
+    def setUp(self):
+        self.supplier = Supplier.objects.create(name="PSO")
+
+    def add_vehicle(self, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            return VehicleRecord.objects.create(vehicle_number="LEA-1", driver_name="Driver", supplier=self.supplier,
+                                                product_type="Diesel", quantity=1000, **kwargs)
+
+    def test_summary_follows_adds_exits_and_deletes(self):
+        vehicle = self.add_vehicle()
+        self.add_vehicle()
+        first = DailyVehicleSummary.objects.get()
+        self.assertEqual((first.vehicles, first.total_quantity, first.exited), (2, 2000, 0))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            vehicle.exit_time = vehicle.entry_time + timedelta(hours=2)
+            vehicle.save()
+        # the day's row is updated in place, not deleted and re-inserted
+        summary = DailyVehicleSummary.objects.get()
+        self.assertEqual(summary.pk, first.pk)
+        self.assertEqual(summary.exited, 1)
+        self.assertEqual(summary.average_dwell(), timedelta(hours=2))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            vehicle.delete()
+        summary = DailyVehicleSummary.objects.get()
+        self.assertEqual((summary.vehicles, summary.exited), (1, 0))
+
+    def test_moving_a_record_updates_both_days_and_buckets(self):
+        vehicle = self.add_vehicle()
+        self.add_vehicle()
+        vehicle = VehicleRecord.objects.get(pk=vehicle.pk)
+        today = timezone.localdate(vehicle.entry_time)
+        with self.captureOnCommitCallbacks(execute=True):
+            vehicle.entry_time -= timedelta(days=1)
+            vehicle.product_type = "Petrol"
+            vehicle.save()
+        self.assertEqual(
+            list(DailyVehicleSummary.objects.order_by('date').values_list('date', 'product_type', 'vehicles')),
+            [(today - timedelta(days=1), "Petrol", 1), (today, "Diesel", 1)],
+        )
+
+    def test_refreshing_a_day_twice_is_harmless(self):
+        vehicle = self.add_vehicle()
+        day = timezone.localdate(vehicle.entry_time)
+        rebuild_days([day, day])
+        rebuild_days([day])
+        self.assertEqual(DailyVehicleSummary.objects.get().vehicles, 1)
+
+    def test_report_reads_only_summaries(self):
+        self.add_vehicle()
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('throughput_report'), {'format': 'json', 'group': 'supplier'})
+        self.assertEqual(response.json()['rows'][0]['supplier__name'], "PSO")
+        self.assertEqual(response.json()['rows'][0]['quantity_total'], "1000")
+
+
+class VehicleBatchTests(TestCase):
+    def setUp(self):
+        self.stock = StockItem.objects.create(name="Diesel", fuel_type="Diesel", quantity=0, min_level=0)
+        self.vehicles = [
+            VehicleRecord.objects.create(vehicle_number=f"LEA-{i}", driver_name="Driver",
+                                         product_type="Diesel", quantity=1000)
+            for i in range(3)
+        ]
+        self.pks = [v.pk for v in self.vehicles]
+
+    def test_batch_exit(self):
+        self.vehicles[0].exit_time = timezone.now()
+        self.vehicles[0].save()
+        with self.captureOnCommitCallbacks(execute=True), CaptureQueriesContext(connection) as ctx:
+            self.client.post(reverse('vehicle_exit_batch'), {'vehicles': self.pks})
+        updates = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('UPDATE "blog_vehiclerecord"')]
+        self.assertEqual(len(updates), 1)
+        self.assertFalse(VehicleRecord.objects.filter(exit_time__isnull=True).exists())
+        # the first exit was booked by its save, the batch books the other two
+        self.stock.refresh_from_db()
+        self.assertEqual(self.stock.quantity, 3000)
+        self.assertEqual(self.stock.movements.count(), 3)
+        self.assertEqual(DailyVehicleSummary.objects.get().exited, 3)
+
+    def test_any_save_that_records_an_exit_books_the_delivery_once(self):
+        vehicle = VehicleRecord.objects.get(pk=self.pks[0])
+        vehicle.exit_time = timezone.now()
+        vehicle.save()
+        vehicle.remarks = "Sealed"
+        vehicle.save()
+        self.stock.refresh_from_db()
+        self.assertEqual(self.stock.quantity, 1000)
+        self.assertEqual(self.stock.movements.get().vehicle_record_id, vehicle.pk)
+
+    def test_exit_rolls_back_when_the_delivery_cannot_be_booked(self):
+        vehicle = VehicleRecord.objects.get(pk=self.pks[0])
+        vehicle.exit_time = timezone.now()
+        with patch('blog.stock.apply_movement', side_effect=RuntimeError), self.assertRaises(RuntimeError):
+            vehicle.save(update_fields=['exit_time'])
+        self.assertIsNone(VehicleRecord.objects.get(pk=vehicle.pk).exit_time)
+
+    def test_imported_exits_book_deliveries(self):
+        rows = [{'id': str(self.pks[0]), 'vehicle_number': "LEA-0", 'driver_name': "Driver", 'vehicle_type': "Tanker",
+                 'product_type': "Diesel", 'quantity': "1000", 'exit_time': "2024-03-01 12:00"},
+                {'vehicle_number': "LEA-9", 'driver_name': "Driver", 'vehicle_type': "Tanker",
+                 'product_type': "Diesel", 'quantity': "500", 'exit_time': "2024-03-01 13:00"}]
+        self.assertEqual(import_rows('vehicles', rows).errors, [])
+        self.stock.refresh_from_db()
+        self.assertEqual(self.stock.quantity, 1500)
+
+    def test_deliveries_reach_stock_added_through_the_form(self):
+        self.client.post(reverse('stock_add'), {'name': "LPG Bullet", 'fuel_type': "LPG", 'quantity': 0, 'min_level': 0})
+        lpg = VehicleRecord.objects.create(vehicle_number="LPG-1", driver_name="Driver", product_type="LPG", quantity=500)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('vehicle_exit_batch'), {'vehicles': [lpg.pk]})
+        self.assertEqual(StockItem.objects.get(name="LPG Bullet").quantity, 500)
+        self.stock.refresh_from_db()
+        self.assertEqual(self.stock.quantity, 0)
+
+    def test_batch_receipts(self):
+        response = self.client.post(reverse('vehicle_receipts_pdf'), {'vehicles': self.pks[:2]})
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertIn(b'/Count 2', response.content)
+        self.assertEqual(
+            list(VehicleRecord.objects.order_by('pk').values_list('print_count', flat=True)), [1, 1, 0],
+        )
+
+    def test_revalidated_receipt_is_not_a_print(self):
+        url = reverse('vehicle_pdf', args=[self.pks[0]])
+        with tempfile.TemporaryDirectory() as cache_dir, self.settings(PDF_CACHE_DIR=cache_dir):
+            etag = self.client.get(url)['ETag']
+            response = self.client.get(url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.vehicles[0].refresh_from_db()
+        self.assertEqual(self.vehicles[0].print_count, 1)
+
+
+class ReceiptCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.vehicle = VehicleRecord.objects.create(vehicle_number="LEA-1", driver_name="Driver",
+                                                    product_type="Diesel", quantity=1000)
+
+    def test_cached_receipt_is_keyed_on_the_print_date(self):
+        today = receipt_digest(self.vehicle)
+        with patch('blog.pdf_cache.timezone.localdate', return_value=timezone.localdate() + timedelta(days=1)):
+            self.assertNotEqual(receipt_digest(self.vehicle), today)
+
+    def test_directory_is_scanned_only_over_budget(self):
+        with tempfile.TemporaryDirectory() as cache_dir, self.settings(PDF_CACHE_DIR=cache_dir), \
+                patch('blog.pdf_cache.evict_receipts', wraps=evict_receipts) as evict:
+            cached_receipt(self.vehicle)
+            self.assertEqual(evict.call_count, 1)  # learns the size once
+            self.vehicle.remarks = "Second copy"
+            cached_receipt(self.vehicle)
+            self.assertEqual(evict.call_count, 1)
+            with self.settings(PDF_CACHE_MAX_BYTES=1):
+                self.vehicle.remarks = "Third copy"
+                cached_receipt(self.vehicle)
+                self.assertEqual(evict.call_count, 2)
+                self.assertEqual(list(Path(cache_dir).glob('*.pdf')), [])
+
+
+class PdfJobTests(TestCase):
+    def test_receipt_job_needs_a_numeric_vehicle(self):
+        response = self.client.post(reverse('pdf_job_create'), {'kind': 'receipt', 'vehicle': 'abc'})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(PdfJob.objects.exists())
+
+    def test_abandoned_running_jobs_are_failed(self):
+        stale = PdfJob.objects.create(kind='report', status='running',
+                                      started_at=timezone.now() - timedelta(hours=2))
+        mine = PdfJob.objects.create(kind='report', status='running', started_at=stale.started_at)
+        fresh = PdfJob.objects.create(kind='report', status='running', started_at=timezone.now())
+        self.assertEqual(fail_stale_jobs(3600, exclude=[mine.pk]), 1)
+        statuses = dict(PdfJob.objects.values_list('pk', 'status'))
+        self.assertEqual([statuses[job.pk] for job in (stale, mine, fresh)], ['failed', 'running', 'running'])
+
+
+class OnSiteBoardTests(TestCase):
+    def add_vehicle(self, number, exited=False):
+        return VehicleRecord.objects.create(vehicle_number=number, driver_name="Driver", product_type="Diesel",
+                                            quantity=1000, exit_time=timezone.now() if exited else None)
+
+    def test_board_lists_only_open_visits(self):
+        self.add_vehicle("LEA-1234")
+        self.add_vehicle("KHI-77", exited=True)
+        data = self.client.get(reverse('vehicle_on_site'), {'format': 'json'}).json()
+        self.assertEqual(data['on_site'], 1)
+        self.assertEqual([v['vehicle_number'] for v in data['vehicles']], ["LEA-1234"])
+        self.assertContains(self.client.get(reverse('vehicle_on_site')), "LEA-1234")
+
+    def test_plate_lookup_is_normalized_and_indexed(self):
+        self.add_vehicle("LEA-1234", exited=True)
+        vehicle = self.add_vehicle("lea 1234")
+        vehicle.refresh_from_db()
+        self.assertEqual(vehicle.plate_key, "LEA1234")
+        data = self.client.get(reverse('vehicle_on_site'), {'format': 'json', 'plate': "Lea.1234"}).json()
+        self.assertEqual([v['id'] for v in data['vehicles']], [vehicle.pk])
+        if connection.vendor == 'sqlite':
+            plan = VehicleRecord.objects.on_site().for_plate("LEA-1234").explain()
+            self.assertIn('vehicle_on_site_plate_idx', plan)
+
+
+@skipUnless(pypdf, "pypdf is not installed")
+class VehicleReportPdfTests(TestCase):
+    def setUp(self):
+        self.pso = Supplier.objects.create(name="PSO")
+        self.shell = Supplier.objects.create(name="Shell")
+        for i in range(25):
+            vehicle = VehicleRecord.objects.create(vehicle_number=f"LEA-{i:02d}", driver_name="Driver (Night)",
+                                                   supplier=self.pso if i % 2 else self.shell,
+                                                   product_type="Diesel", quantity=1000)
+            VehicleRecord.objects.filter(pk=vehicle.pk).update(
+                entry_time=timezone.make_aware(datetime(2024, 3, 1 + i, 12)))
+
+    def report(self, **params):
+        response = self.client.get(reverse('vehicle_report_pdf'), params)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        reader = pypdf.PdfReader(BytesIO(b''.join(response.streaming_content)), strict=True)
+        pages = [page.extract_text() for page in reader.pages]
+        return pages, re.findall(r"Vehicle No: (LEA-\d+)", "\n".join(pages))
+
+    def test_every_row_once_newest_first_across_pages(self):
+        pages, numbers = self.report()
+        self.assertEqual(len(pages), 3)
+        self.assertIn("Vehicle Records Report", pages[0])
+        self.assertIn("Driver: Driver (Night)", pages[0])
+        self.assertEqual(numbers, [f"LEA-{i:02d}" for i in reversed(range(25))])
+
+    def test_filters(self):
+        _, numbers = self.report(date_from='2024-03-03', date_to='2024-03-05')
+        self.assertEqual(numbers, ["LEA-04", "LEA-03", "LEA-02"])
+        _, numbers = self.report(supplier=self.pso.pk, date_to='2024-03-06')
+        self.assertEqual(numbers, ["LEA-05", "LEA-03", "LEA-01"])
+
+    def test_empty_report(self):
+        pages, numbers = self.report(date_from='2030-01-01')
+        self.assertEqual((len(pages), numbers), (1, []))
+        self.assertIn("No vehicle records found.", pages[0])
+
+
+@skipUnless(np, "numpy is not installed")
+class DwellAnalyticsTests(TestCase):
+    def setUp(self):
+        self.pso = Supplier.objects.create(name="PSO")
+        self.shell = Supplier.objects.create(name="Shell")
+        for supplier, minutes in ((self.pso, 30), (self.pso, 90), (self.shell, 600), (None, None)):
+            vehicle = VehicleRecord.objects.create(vehicle_number="LEA-1", driver_name="Driver", supplier=supplier,
+                                                   product_type="Diesel", quantity=1000)
+            if minutes:
+                vehicle.exit_time = vehicle.entry_time + timedelta(minutes=minutes)
+                vehicle.save()
+
+    def test_stats(self):
+        stats = dwell_stats(VehicleRecord.objects.all())
+        self.assertEqual((stats['vehicles'], stats['exited'], stats['on_site']), (4, 3, 1))
+        self.assertAlmostEqual(stats['mean_dwell'], 240)
+        self.assertAlmostEqual(stats['percentiles'][50], 90)
+        self.assertEqual([n for _, n in stats['dwell_histogram']], [0, 1, 1, 0, 0, 1, 0])
+        self.assertEqual(sum(stats['hourly_arrivals']), 4)
+        self.assertEqual(
+            [(row['supplier_id'], row['vehicles'], row['median_dwell']) for row in stats['suppliers']],
+            [(self.shell.pk, 1, 600), (self.pso.pk, 2, 60)],
+        )
+
+    @override_settings(TIME_ZONE='Europe/London')
+    def test_hourly_arrivals_follow_daylight_saving(self):
+        VehicleRecord.objects.all().delete()
+        # 09:00 on the gate clock in winter (GMT) and in summer (BST)
+        for entry in (datetime(2025, 1, 15, 9, tzinfo=dt_timezone.utc), datetime(2025, 7, 15, 8, tzinfo=dt_timezone.utc)):
+            vehicle = VehicleRecord.objects.create(vehicle_number="DST-1", driver_name="Driver", product_type="Diesel",
+                                                   quantity=1000)
+            VehicleRecord.objects.filter(pk=vehicle.pk).update(entry_time=entry)
+        hourly = dwell_stats(VehicleRecord.objects.all())['hourly_arrivals']
+        self.assertEqual(hourly[9], 1)
+        self.assertEqual(sum(hourly), 1)
+
+    def test_dashboard_is_cached_until_a_vehicle_changes(self):
+        url = reverse('dwell_dashboard')
+        self.assertEqual(self.client.get(url, {'format': 'json'}).json()['vehicles'], 4)
+        with self.assertNumQueries(0):
+            self.client.get(url, {'format': 'json'})
+        VehicleRecord.objects.create(vehicle_number="LEA-2", driver_name="Driver", product_type="Diesel", quantity=1)
+        self.assertEqual(self.client.get(url, {'format': 'json'}).json()['vehicles'], 5)
+        self.assertContains(self.client.get(url, {'supplier': self.pso.pk}), "<td>PSO</td>")
+
+
+class ImportTests(TestCase):
+    def setUp(self):
+        self.supplier = Supplier.objects.create(name="Attock Refinery")
+
+    def vehicle_rows(self, count):
+        return [{'vehicle_number': f"IMP-{i}", 'driver_name': "Driver", 'supplier': "attock refinery",
+                 'vehicle_type': "Tanker", 'product_type': "Diesel", 'quantity': "1000"} for i in range(count)]
+
+    def test_supplier_lookups_do_not_query_per_row(self):
+        with CaptureQueriesContext(connection) as few:
+            import_rows('vehicles', self.vehicle_rows(2))
+        with CaptureQueriesContext(connection) as many:
+            result = import_rows('vehicles', self.vehicle_rows(20))
+        self.assertEqual(result.errors, [])
+        self.assertEqual(len(many), len(few))
+        self.assertEqual(VehicleRecord.objects.filter(supplier=self.supplier).count(), 22)
+
+    def test_stock_updates_need_no_quantity_column(self):
+        item = StockItem.objects.create(name="Diesel", fuel_type="Diesel", quantity=100, supplier=self.supplier)
+        result = import_rows('stock', [{'id': str(item.pk), 'name': "Diesel Tank 2", 'supplier': "", 'min_level': "50"}])
+        self.assertEqual((result.updated, result.errors), (1, []))
+        item.refresh_from_db()
+        self.assertEqual((item.name, item.quantity, item.min_level, item.supplier), ("Diesel Tank 2", 100, 50, None))
+        self.assertEqual(item.fuel_type, "Diesel")
+
+    def test_partial_update_rows_leave_other_columns_alone(self):
+        vehicle = VehicleRecord.objects.create(vehicle_number="LEA-1", driver_name="Driver", driver_phone="0300",
+                                               supplier=self.supplier, product_type="Diesel", quantity=1000,
+                                               remarks="Sealed", checked_by="Gate 2")
+        result = import_rows('vehicles', [{'id': str(vehicle.pk), 'driver_name': "New Driver"}])
+        self.assertEqual((result.updated, result.errors), (1, []))
+        vehicle.refresh_from_db()
+        self.assertEqual(
+            (vehicle.driver_name, vehicle.driver_phone, vehicle.remarks, vehicle.checked_by, vehicle.supplier),
+            ("New Driver", "0300", "Sealed", "Gate 2", self.supplier),
+        )
+
+    def test_imported_stock_gets_an_opening_ledger_row(self):
+        rows = [{'name': "Diesel", 'fuel_type': "Diesel", 'quantity': "750", 'min_level': "100"},
+                {'name': "LPG", 'fuel_type': "LPG", 'quantity': "0", 'min_level': "100"}]
+        self.assertEqual(import_rows('stock', rows).errors, [])
+        for item in StockItem.objects.all():
+            self.assertEqual(item.movements.aggregate(total=Sum('quantity'))['total'] or 0, item.quantity)
+
+
+class SearchIndexTests(TestCase):
+    def names(self, q):
+        response = self.client.get(reverse('supplier_list'), {'q': q})
+        return [s.name for s in response.context['suppliers']]
+
+    def test_index_follows_saves_and_deletes(self):
+        supplier = Supplier.objects.create(name="Attock Refinery", contact_person="Hamid")
+        self.assertEqual(self.names("attock"), ["Attock Refinery"])
+        self.assertEqual(self.names("ham"), ["Attock Refinery"])
+
+        supplier.name = "Byco Petroleum"
+        supplier.save()
+        self.assertEqual(self.names("attock"), [])
+        self.assertEqual(self.names("byco"), ["Byco Petroleum"])
+
+        supplier.delete()
+        self.assertEqual(self.names("byco"), [])
+
+
+class RequestTimingTests(TestCase):
+    def setUp(self):
+        Supplier.objects.create(name="Attock Refinery")
+
+    def test_server_timing_header(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('supplier_list'))
+        timing = response['Server-Timing']
+        for metric in ('sql;dur=', 'render;dur=', 'pdf;dur=', 'total;dur='):
+            self.assertIn(metric, timing)
+        self.assertIn(f'desc="{len(ctx)} queries"', timing)
+
+    @override_settings(SLOW_REQUEST_THRESHOLDS={'queries': 0})
+    def test_slow_requests_are_logged(self):
+        with self.assertLogs('blog.instrumentation', 'WARNING') as logs:
+            response = self.client.get(reverse('vehicle_report_pdf'))
+            b''.join(response.streaming_content)
+        entry = json.loads(logs.records[0].getMessage())
+        self.assertEqual(entry['view'], 'vehicle_report_pdf')
+        self.assertTrue(entry['streamed'])
+        self.assertEqual(entry['queries'], 1)
+        self.assertGreater(entry['pdf_ms'], 0)
+
+    def test_fast_requests_are_not_logged(self):
+        with self.assertNoLogs('blog.instrumentation'):
+            self.client.get(reverse('supplier_list'))
+
+    def test_file_responses_keep_the_file_wrapper_path(self):
+        middleware = RequestTimingMiddleware(lambda request: None)
+        with tempfile.TemporaryFile() as handle:
+            response = middleware.finish(RequestFactory().get('/'), FileResponse(handle), RequestTimings())
+            self.assertIs(response.file_to_stream, handle)
+
+    def test_abandoned_streams_close_the_original_iterator(self):
+        closed = []
+
+        def chunks():
+            try:
+                yield b'a'
+                yield b'b'
+            finally:
+                closed.append(True)
+
+        middleware = RequestTimingMiddleware(lambda request: None)
+        response = middleware.finish(RequestFactory().get('/'), StreamingHttpResponse(chunks()), RequestTimings())
+        next(iter(response))
+        response.close()
+        self.assertEqual(closed, [True])
+
+    def test_log_directory_is_created_on_first_write(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / 'logs' / 'slow.log'
+            handler = SlowRequestFileHandler(path, delay=True)
+            self.assertFalse(path.parent.exists())
+            handler.emit(logging.makeLogRecord({'msg': 'slow'}))
+            handler.close()
+            self.assertEqual(path.read_text(), 'slow\n')
+
+
+class BenchRoutesCompareTests(SimpleTestCase):
+    def result(self, p95, queries, status=200):
+        return {'meta': {'scale': 1}, 'routes': {
+            'vehicle_list': {'p50_ms': 10, 'p95_ms': p95, 'p99_ms': 100, 'queries': queries, 'status': status},
+        }}
+
+    def regressions(self, before, after):
+        command = BenchRoutesCommand(stdout=StringIO(), stderr=StringIO())
+        return command.compare(before, after, threshold=0.5, min_ms=5)
+
+    def test_noise_is_not_a_regression(self):
+        self.assertEqual(self.regressions(self.result(20, 3), self.result(24, 3)), 0)
+
+    def test_slower_heavier_or_failing_routes_are(self):
+        self.assertEqual(self.regressions(self.result(20, 3), self.result(40, 3)), 1)
+        self.assertEqual(self.regressions(self.result(20, 3), self.result(20, 4)), 1)
+        self.assertEqual(self.regressions(self.result(20, 3), self.result(20, 3, status=500)), 1)
+
+
+class SeedCommandTests(TestCase):
+    def test_seeds_every_table_and_derived_data(self):
+        call_command('seed', vehicles=250, chunk_size=100, workers=1, stdout=StringIO())
+        self.assertEqual(Supplier.objects.count(), 20)
+        self.assertEqual(VehicleRecord.objects.count(), 250)
+        self.assertFalse(VehicleRecord.objects.filter(exit_time__lt=F('entry_time')).exists())
+        self.assertEqual(DailyVehicleSummary.objects.aggregate(n=Sum('vehicles'))['n'], 250)
+
+    def test_chunks_are_deterministic(self):
+        now = timezone.now()
+        chunk = generate_vehicle_chunk(7, 3, 50, [1, 2, 3], now, 30)
+        self.assertEqual(chunk, generate_vehicle_chunk(7, 3, 50, [1, 2, 3], now, 30))
+        self.assertNotEqual(chunk, generate_vehicle_chunk(7, 4, 50, [1, 2, 3], now, 30))
+
+
+class SharedCacheCheckTests(SimpleTestCase):
+    locmem = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+    def test_locmem_is_refused_without_debug(self):
+        with self.settings(DEBUG=False, CACHES=self.locmem):
+            self.assertEqual([e.id for e in check_shared_cache(None)], ['blog.E001'])
+        with self.settings(DEBUG=True, CACHES=self.locmem):
+            self.assertEqual(check_shared_cache(None), [])
+
+
+class StaticAssetTests(TestCase):
+    def test_cdn_links_until_vendored_copies_are_switched_on(self):
+        self.assertContains(self.client.get(reverse('about')), 'https://img.icons8.com/office/200/oil-industry.png')
+        self.assertEqual(check_vendor_assets(None), [])
+        with self.settings(VENDOR_ASSETS_LOCAL=True):
+            self.assertEqual(vendor_url('oil-industry.png'), '/static/vendor/icons8/oil-industry.png')
+
+    @override_settings(VENDOR_ASSETS_LOCAL=True)
+    def test_missing_vendored_copies_are_an_error(self):
+        with tempfile.TemporaryDirectory() as root, patch('blog.assets.STATIC_SOURCE', Path(root)):
+            for _, path in VENDOR_ASSETS.values():
+                (Path(root) / path).parent.mkdir(parents=True, exist_ok=True)
+                (Path(root) / path).write_text("")
+            css = Path(root) / VENDOR_ASSETS['fontawesome.css'][1]
+            css.write_text('@font-face{src:url(../webfonts/fa-solid-900.woff2)}')
+            self.assertEqual(missing_vendor_files(), ["vendor/fontawesome-6.6.0/webfonts/fa-solid-900.woff2"])
+            self.assertEqual([e.id for e in check_vendor_assets(None)], ['blog.E002'])
+
+    def test_hero_images_offer_avif_and_webp(self):
+        response = self.client.get(reverse('contact'))
+        self.assertContains(response, '<source type="image/avif" srcset="/static/images/variants/contact-us-480w.avif 480w')
+        self.assertContains(response, 'type="image/webp"')
+        self.assertContains(response, '<img src="/static/images/contact-us.jpg" alt="Contact Us"')
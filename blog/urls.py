@@ -30,21 +30,47 @@ urlpatterns = [
     path('stock/add/', views.stock_add, name='stock_add'),
     path('stock/edit/<int:pk>/', views.stock_edit, name='stock_edit'),
     path('stock/delete/<int:pk>/', views.stock_delete, name='stock_delete'),
+    path('stock/<int:pk>/movements/', views.stock_movements, name='stock_movements'),
     path('stock/low/', views.low_stock, name='low_stock'),
+    path('stock/low/stream/', views.low_stock_stream, name='low_stock_stream'),
     path('stock/data/', views.stock_data, name='stock_data'),
 
+    # Bulk import
+    path('import/', views.import_data, name='import_data'),
+
+    # Streaming export
+    path('export/<str:name>/', views.export_data, name='export_data'),
+
     # Dashboard
     path('dashboard/', views.dashboard, name='dashboard'),
+    path('dashboard/metrics/', views.dashboard_metrics, name='dashboard_metrics'),
 
     # Vehicle Records
     path('vehicles/', views.vehicle_list, name='vehicle_list'),
+    path('vehicles/more/', views.vehicle_list_more, name='vehicle_list_more'),
+    path('vehicles/lookup/', views.vehicle_lookup, name='vehicle_lookup'),
+    path('vehicles/on-site/', views.vehicle_on_site, name='vehicle_on_site'),
     path('vehicles/add/', views.vehicle_add, name='vehicle_add'),
     path('vehicles/edit/<int:pk>/', views.vehicle_edit, name='vehicle_edit'),
     path('vehicles/delete/<int:pk>/', views.vehicle_delete, name='vehicle_delete'),
     path('vehicles/exit/<int:pk>/', views.vehicle_exit, name='vehicle_exit'),
+    path('vehicles/exit/batch/', views.vehicle_exit_batch, name='vehicle_exit_batch'),
     path('vehicles/pdf/<int:pk>/', views.vehicle_pdf, name='vehicle_pdf'),
+    path('vehicles/receipts/pdf/', views.vehicle_receipts_pdf, name='vehicle_receipts_pdf'),
     path('vehicles/report/pdf/', views.vehicle_report_pdf, name='vehicle_report_pdf'),
 
+    # Reports
+    path('reports/throughput/', views.throughput_report, name='throughput_report'),
+    path('reports/dwell/', views.dwell_dashboard, name='dwell_dashboard'),
+
+    # Delta sync for depot tablets
+    path('api/sync/', views.sync_changes, name='sync_changes'),
+
+    # Background PDF jobs
+    path('pdf-jobs/', views.pdf_job_create, name='pdf_job_create'),
+    path('pdf-jobs/<int:pk>/', views.pdf_job_status, name='pdf_job_status'),
+    path('pdf-jobs/<int:pk>/download/', views.pdf_job_download, name='pdf_job_download'),
+
     # Authentication (Custom)
     path('login/', views.custom_login, name='custom_login'),
     path('logout/', views.custom_logout, name='custom_logout'),
@@ -1,42 +1,91 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIRequest
 from django.shortcuts import render, get_object_or_404, redirect
+from django.template.loader import render_to_string
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.models import User
 from django.contrib import messages
-from django.db.models import F, Sum 
-from django.http import JsonResponse, HttpResponse
+from django.http import Http404, FileResponse, JsonResponse, HttpResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.views.decorators.cache import cache_page
+from django.views.decorators.http import require_POST
+from django.views.decorators.vary import vary_on_cookie
 from django.utils import timezone
+from asgiref.sync import sync_to_async
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import SuspiciousFileOperation
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+from django.db.models import Count, F, Max, Sum
+import asyncio
+from datetime import timedelta
+import mimetypes
+from pathlib import Path
 from io import BytesIO
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import A4
 
-from .models import Equipment, Supplier, StockItem, VehicleRecord, Vehicle
-from .forms import EquipmentForm, RegisterForm, SupplierForm, StockItemForm, VehicleRecordForm,UserLoginForm
+from .models import Equipment, Supplier, StockItem, VehicleRecord, Vehicle, PdfJob
+from .analytics import dwell_stats
+from .broadcast import alow_stock_snapshot, low_stock_feed, low_stock_queryset
+from .caching import conditional_on, model_versions
+from .changes import FEEDS, changes_since
+from .exports import EXPORTS, csv_lines, export_rows, ndjson_lines
+from .filters import filter_date_range
+from .forms import EquipmentForm, ImportForm, RegisterForm, SupplierForm, StockItemForm, StockItemEditForm, StockMovementForm, VehicleRecordForm,UserLoginForm
+from .importers import import_rows, read_rows
+from .jobs import enqueue_pdf_job
+from .metrics import aget_dashboard_metrics, get_dashboard_metrics
+from .pagination import keyset_page
+from .pdf import render_vehicle_receipt, render_vehicle_receipts, vehicle_report_chunks, vehicle_report_queryset
+from .pdf_cache import cached_receipt, receipt_digest
+from .rollups import throughput_rows
+from .search import search
+from .stock import InsufficientStock, apply_movement, exit_vehicles
 
 # ------------------ Static Pages ------------------
+# Whole responses are cached; Vary: Cookie keeps the logged-in navbar apart.
 
+cache_static_page = cache_page(settings.STATIC_PAGE_CACHE_SECONDS, key_prefix='static-page')
+
+@cache_static_page
+@vary_on_cookie
 def index(request):
     return render(request, 'index.html')
 
+@cache_static_page
+@vary_on_cookie
 def about(request):
     return render(request, 'about.html')
 
+@cache_static_page
+@vary_on_cookie
 def services(request):
     return render(request, 'services.html')
 
 def contact(request):
     return render(request, 'contact.html')
 
+@cache_static_page
+@vary_on_cookie
 def oil_trading(request):
     return render(request, 'oil_trading.html')
 
+@cache_static_page
+@vary_on_cookie
 def gas_management(request):
     return render(request, 'gas_management.html')
 
+@cache_static_page
+@vary_on_cookie
 def consulting(request):
     return render(request, 'consulting.html')
 
 # ------------------ Equipment CRUD ------------------
 
+@conditional_on('blog.Equipment', per_session=True)
 def equipment_list(request):
     equipments = Equipment.objects.all()
     return render(request, 'equipment/list.html', {'equipments': equipments})
@@ -74,9 +123,14 @@ def equipment_delete(request, pk):
 
 # ------------------ Supplier CRUD ------------------
 
+@conditional_on('blog.Supplier', per_session=True)
 def supplier_list(request):
+    q = request.GET.get('q', '').strip()
+    if q:
+        page = search('supplier', q, Supplier.objects.all(), request.GET.get('page'))
+        return render(request, 'suppliers/list.html', {'suppliers': page.object_list, 'page': page, 'q': q})
     suppliers = Supplier.objects.all()
-    return render(request, 'suppliers/list.html', {'suppliers': suppliers})
+    return render(request, 'suppliers/list.html', {'suppliers': suppliers, 'q': q})
 
 def supplier_add(request):
     if request.method == 'POST':
@@ -109,9 +163,14 @@ def supplier_delete(request, pk):
 
 # ------------------ Stock CRUD ------------------
 
+@conditional_on('blog.StockItem', 'blog.Supplier', per_session=True)
 def stock_list(request):
-    stocks = StockItem.objects.all()
-    return render(request, 'stock/list.html', {'stocks': stocks})
+    q = request.GET.get('q', '').strip()
+    if q:
+        page = search('stock', q, StockItem.objects.for_list(), request.GET.get('page'))
+        return render(request, 'stock/list.html', {'stocks': page.object_list, 'page': page, 'q': q})
+    stocks = StockItem.objects.for_list()
+    return render(request, 'stock/list.html', {'stocks': stocks, 'q': q})
 
 def stock_add(request):
     if request.method == 'POST':
@@ -127,68 +186,159 @@ def stock_add(request):
 def stock_edit(request, pk):
     stock_item = get_object_or_404(StockItem, pk=pk)
     if request.method == 'POST':
-        form = StockItemForm(request.POST, instance=stock_item)
+        form = StockItemEditForm(request.POST, instance=stock_item)
         if form.is_valid():
-            form.save()
+            # quantity is never written directly: other depots may have moved
+            # stock since this form was loaded, so only the change is applied
+            delta = form.cleaned_data['quantity'] - form.cleaned_data['original_quantity']
+            item = form.save(commit=False)
+            item.quantity = form.initial['quantity']
+            item.save(update_fields=['name', 'fuel_type', 'supplier', 'min_level', 'last_updated'])
+            if delta:
+                try:
+                    apply_movement(item, 'adjustment', delta, note="Manual edit")
+                except InsufficientStock as e:
+                    messages.error(request, str(e))
+                    return redirect('stock_edit', pk=pk)
             messages.success(request, 'Stock item updated successfully!')
             return redirect('stock_list')
     else:
-        form = StockItemForm(instance=stock_item)
+        form = StockItemEditForm(instance=stock_item)
     return render(request, 'stock/edit.html', {'form': form})
 
+def stock_movements(request, pk):
+    stock_item = get_object_or_404(StockItem, pk=pk)
+    if request.method == 'POST':
+        form = StockMovementForm(request.POST)
+        if form.is_valid():
+            try:
+                apply_movement(stock_item, form.cleaned_data['kind'], form.cleaned_data['quantity'],
+                               note=form.cleaned_data['note'])
+            except InsufficientStock as e:
+                messages.error(request, str(e))
+            else:
+                messages.success(request, 'Stock movement recorded.')
+            return redirect('stock_movements', pk=pk)
+    else:
+        form = StockMovementForm()
+    movements = stock_item.movements.select_related('vehicle_record').order_by('-created_at')[:50]
+    return render(request, 'stock/movements.html', {'stock_item': stock_item, 'form': form, 'movements': movements})
+
 def stock_delete(request, pk):
     stock_item = get_object_or_404(StockItem, pk=pk)
     stock_item.delete()
     messages.success(request, 'Stock item deleted successfully!')
     return redirect('stock_list')
 
-def stock_data(request):
-    data = list(StockItem.objects.values('name', 'quantity'))
+# The JSON read endpoints below are async views: the ASGI app
+# (myproject.asgi) serves them on the event loop instead of handing each
+# request to the thread-sensitive sync adapter.
+@conditional_on('blog.StockItem')
+async def stock_data(request):
+    data = [row async for row in StockItem.objects.values('name', 'quantity')]
     return JsonResponse(data, safe=False)
 
+# ------------------ Bulk Import ------------------
+
+def import_data(request):
+    result = None
+    if request.method == 'POST':
+        form = ImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            upload = form.cleaned_data['file']
+            try:
+                result = import_rows(form.cleaned_data['kind'], read_rows(upload.file, upload.name))
+            except ValueError as e:
+                messages.error(request, str(e))
+            else:
+                messages.success(request, f"Imported {result.created} new and {result.updated} updated rows.")
+    else:
+        form = ImportForm()
+    return render(request, 'import.html', {
+        'form': form,
+        'result': result,
+        'errors': result.errors[:50] if result else [],
+    })
+
+# ------------------ Streaming Export ------------------
+
+# /export/<name>/?format=csv|ndjson&fields=a,b&since=YYYY-MM-DD&until=YYYY-MM-DD
+def export_data(request, name):
+    spec = EXPORTS.get(name)
+    if spec is None:
+        raise Http404("Unknown export")
+
+    fields = spec.fields
+    if request.GET.get('fields'):
+        fields = [f.strip() for f in request.GET['fields'].split(',') if f.strip()]
+        unknown = [f for f in fields if f not in spec.fields]
+        if unknown or not fields:
+            return JsonResponse({'error': f"Unknown fields: {', '.join(unknown)}", 'fields': spec.fields}, status=400)
+
+    rows = export_rows(spec, request.GET, fields)
+    if request.GET.get('format') == 'ndjson':
+        response = StreamingHttpResponse(ndjson_lines(fields, rows), content_type='application/x-ndjson')
+        response['Content-Disposition'] = f'attachment; filename="{name}.ndjson"'
+    else:
+        response = StreamingHttpResponse(csv_lines(fields, rows), content_type='text/csv')
+        response['Content-Disposition'] = f'attachment; filename="{name}.csv"'
+    return response
+
 # ------------------ Dashboard ------------------
 
 def dashboard(request):
-    total_equipment = Equipment.objects.count()
-    total_suppliers = Supplier.objects.count()
-    total_stock_items = StockItem.objects.count()
-    total_quantity = StockItem.objects.aggregate(total=Sum('quantity'))['total'] or 0
-    low_stock_count = StockItem.objects.filter(quantity__lte=F('min_level')).count()
-
-    # Chart data (Top 10)
-    top_items = StockItem.objects.order_by('-quantity')[:10]
-    chart_labels = [item.name for item in top_items]
-    chart_data = [item.quantity for item in top_items]
-
-    context = {
-        'total_equipment': total_equipment,
-        'total_suppliers': total_suppliers,
-        'total_stock_items': total_stock_items,
-        'total_quantity': total_quantity,
-        'low_stock_count': low_stock_count,
-        'chart_labels': chart_labels,
-        'chart_data': chart_data,
-    }
-
+    context = {**get_dashboard_metrics(), 'live_low_stock': _serves_event_streams(request)}
     return render(request, 'dashboard.html', context)
 
-# ------------------ Low Stock JSON ------------------
+async def dashboard_metrics(request):
+    return JsonResponse(await aget_dashboard_metrics())
 
-def low_stock(request):
-    low_items_qs = StockItem.objects.filter(quantity__lte=F('min_level'))
-    low_items = list(low_items_qs.values('id', 'name', 'quantity', 'min_level'))
-    low_stock_count = low_items_qs.count()
+# ------------------ Low Stock JSON ------------------
 
+@conditional_on('blog.StockItem', per_session=True)
+async def low_stock(request):
     if request.GET.get('format') == 'json':
-        return JsonResponse({'low_stock_count': low_stock_count, 'low_items': low_items})
-    return render(request, 'stock/low_stock.html', {'low_items': low_items_qs})
+        low_items = [item async for item in low_stock_queryset()]
+        return JsonResponse({'low_stock_count': len(low_items), 'low_items': low_items})
+    # the page template reads request.user, which is sync-only
+    return await sync_to_async(_low_stock_page)(request)
+
+def _low_stock_page(request):
+    return render(request, 'stock/low_stock.html', {'low_items': StockItem.objects.low().for_list()})
+
+def _serves_event_streams(request):
+    # an open event stream needs the ASGI app (myproject.asgi); under WSGI
+    # Django would consume the endless generator and never send a byte
+    return isinstance(request, ASGIRequest)
+
+# Server-Sent Events: pushes the low-stock list whenever an item crosses its
+# minimum level. Under WSGI it answers 204, which tells EventSource not to
+# reconnect; the dashboard polls instead.
+async def low_stock_stream(request):
+    if not _serves_event_streams(request):
+        return HttpResponse(status=204)
+
+    async def events():
+        subscription = low_stock_feed.subscribe()
+        queue = subscription[1]
+        try:
+            yield f"data: {await alow_stock_snapshot()}\n\n"
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), settings.LOW_STOCK_HEARTBEAT)
+                    yield f"data: {message}\n\n"
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+        finally:
+            low_stock_feed.unsubscribe(subscription)
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
 
 # ------------------ Vehicle Record Management ------------------
 
-def vehicle_list(request):
-    vehicles = VehicleRecord.objects.all().order_by('-entry_time')
-    return render(request, 'vehicles/list.html', {'vehicles': vehicles})
-
 def vehicle_add(request):
     if request.method == 'POST':
         form = VehicleRecordForm(request.POST)
@@ -203,11 +353,37 @@ def vehicle_add(request):
   # Mark exit time
 def vehicle_exit(request, pk):
     vehicle = get_object_or_404(VehicleRecord, pk=pk)
-    vehicle.exit_time = timezone.now()
-    vehicle.save()
+    if vehicle.exit_time is None:
+        vehicle.exit_time = timezone.now()
+        # books the delivery into stock in the same transaction (blog.stock)
+        vehicle.save(update_fields=['exit_time'])
     messages.success(request, 'Vehicle exit time recorded successfully.')
     return redirect('vehicle_list')
 
+# Batch exit from the vehicle list: every checked vehicle in one request
+@require_POST
+def vehicle_exit_batch(request):
+    pks = _selected_vehicles(request)
+    if pks is None:
+        return redirect('vehicle_list')
+    exited = exit_vehicles(pks)
+    messages.success(request, f'Exit time recorded for {len(exited)} vehicle(s).')
+    # the on-site board posts here too and wants to come back to itself
+    if request.POST.get('next') == reverse('vehicle_on_site'):
+        return redirect('vehicle_on_site')
+    return redirect('vehicle_list')
+
+def _selected_vehicles(request):
+    """Checked vehicle ids from the list form, or None (with a message) if there are none or too many."""
+    pks = [pk for pk in request.POST.getlist('vehicles') if pk.isdigit()]
+    if not pks:
+        messages.error(request, 'Select at least one vehicle.')
+        return None
+    if len(pks) > settings.VEHICLE_BATCH_LIMIT:
+        messages.error(request, f'Select at most {settings.VEHICLE_BATCH_LIMIT} vehicles at a time.')
+        return None
+    return pks
+
 def vehicle_edit(request, pk):
     vehicle = get_object_or_404(VehicleRecord, pk=pk)
     if request.method == 'POST':
@@ -217,7 +393,7 @@ def vehicle_edit(request, pk):
             return redirect('vehicle_list')  # apne list page ka name idhar likho
     else:
         form = VehicleRecordForm(instance=vehicle)
-    return render(request, 'blog/vehicle_edit.html', {'form': form, 'vehicle': vehicle})
+    return render(request, 'vehicles/vehicle_edit.html', {'form': form, 'vehicle': vehicle})
 
 def vehicle_delete(request, pk):
     vehicle = get_object_or_404(VehicleRecord, pk=pk)
@@ -247,8 +423,59 @@ def add_vehicle_record(request):
 
 # 🚗 Vehicle Record List (Frontend)
 def vehicle_list(request):
-    vehicles = VehicleRecord.objects.all().order_by('-entry_time')
-    return render(request, 'vehicles/list.html', {'vehicles': vehicles})
+    q = request.GET.get('q', '').strip()
+    if q:
+        page = search('vehicle', q, VehicleRecord.objects.for_list(), request.GET.get('page'))
+        return render(request, 'vehicles/list.html', {'vehicles': page.object_list, 'page': page, 'q': q})
+    vehicles, next_cursor = keyset_page(
+        VehicleRecord.objects.for_list(), request.GET.get('cursor'), settings.VEHICLE_PAGE_SIZE
+    )
+    return render(request, 'vehicles/list.html', {'vehicles': vehicles, 'next_cursor': next_cursor})
+
+# "Load more" for the vehicle list: next page of rows after a cursor
+def vehicle_list_more(request):
+    vehicles, next_cursor = keyset_page(
+        VehicleRecord.objects.for_list(), request.GET.get('cursor'), settings.VEHICLE_PAGE_SIZE
+    )
+    results = [
+        {
+            'id': v.pk,
+            'vehicle_number': v.vehicle_number,
+            'vehicle_type': v.vehicle_type,
+            'driver_name': v.driver_name,
+            'product_type': v.product_type,
+            'quantity': str(v.quantity),
+            'entry_time': v.entry_time.isoformat(),
+            'exit_time': v.exit_time.isoformat() if v.exit_time else None,
+        }
+        for v in vehicles
+    ]
+    html = render_to_string('vehicles/_rows.html', {'vehicles': vehicles}, request=request)
+    return JsonResponse({'results': results, 'html': html, 'next_cursor': next_cursor})
+
+# Every visit of one vehicle number: totals plus the latest records
+async def vehicle_lookup(request):
+    number = request.GET.get('number', '').strip()
+    if not number:
+        return JsonResponse({'error': "number is required"}, status=400)
+    visits = VehicleRecord.objects.filter(vehicle_number=number)
+    summary = await visits.aaggregate(
+        visits=Count('id'), total_quantity=Sum('quantity'), last_entry=Max('entry_time'),
+    )
+    recent = [
+        {**row, 'quantity': str(row['quantity'])}
+        async for row in visits.order_by('-entry_time', '-id').values(
+            'id', 'driver_name', 'supplier__name', 'product_type', 'quantity', 'entry_time', 'exit_time',
+        )[:20]
+    ]
+    return JsonResponse({
+        'vehicle_number': number,
+        'visits': summary['visits'],
+        'total_quantity': str(summary['total_quantity'] or 0),
+        'last_entry': summary['last_entry'],
+        'on_site': bool(recent) and recent[0]['exit_time'] is None,
+        'recent': recent,
+    })
 
 # 🚗 Add Vehicle Record
 def vehicle_add(request):
@@ -264,49 +491,71 @@ def vehicle_add(request):
         form = VehicleRecordForm()
     return render(request, 'vehicles/add.html', {'form': form})     
 
+# ------------------ On-Site Board ------------------
+# /vehicles/on-site/[?plate=LEA-1234][&format=json]
+# Only open visits, which the partial indexes on exit_time IS NULL cover
+# (VehicleRecord.Meta): the board never touches the closed ones, and a gate
+# scanner's plate lookup is one probe of the on-site plate index.
+def vehicle_on_site(request):
+    vehicles = VehicleRecord.objects.on_site()
+    plate = request.GET.get('plate', '').strip()
+    if plate:
+        vehicles = vehicles.for_plate(plate)
+    board = list(vehicles.for_list().order_by('-entry_time', '-id')[:settings.ON_SITE_BOARD_LIMIT])
+    count = len(board) if len(board) < settings.ON_SITE_BOARD_LIMIT else vehicles.count()
+
+    if request.GET.get('format') == 'json':
+        now = timezone.now()
+        return JsonResponse({
+            'on_site': count,
+            'vehicles': [{
+                'id': v.pk, 'vehicle_number': v.vehicle_number, 'vehicle_type': v.vehicle_type,
+                'driver_name': v.driver_name, 'driver_phone': v.driver_phone,
+                'supplier': v.supplier.name if v.supplier else None, 'product_type': v.product_type,
+                'quantity': str(v.quantity), 'entry_time': v.entry_time, 'minutes_on_site': int((now - v.entry_time).total_seconds() // 60),
+            } for v in board],
+        })
+    return render(request, 'vehicles/on_site.html', {'vehicles': board, 'count': count, 'plate': plate})
+
 # ------------------ Vehicle Receipt PDF ------------------
 
 def vehicle_pdf(request, pk):
-    vehicle = get_object_or_404(VehicleRecord, pk=pk)
-
-    buffer = BytesIO()
-    p = canvas.Canvas(buffer, pagesize=A4)
-
-    p.setFont("Helvetica-Bold", 16)
-    p.drawCentredString(300, 800, "Vehicle Receipt")
-
-    p.setFont("Helvetica", 11)
-    y = 760
-    lines = [
-        f"Vehicle No.: {vehicle.vehicle_number}",
-        f"Vehicle Type: {vehicle.vehicle_type}",
-        f"Driver: {vehicle.driver_name}    Phone: {vehicle.driver_phone or 'N/A'}",
-        f"Supplier: {vehicle.supplier.name if vehicle.supplier else 'N/A'}",
-        f"Product: {vehicle.product_type}",
-        f"Quantity: {vehicle.quantity}",
-        f"Entry Time: {vehicle.entry_time.strftime('%Y-%m-%d %H:%M')}",
-        f"Exit Time: {vehicle.exit_time.strftime('%Y-%m-%d %H:%M') if vehicle.exit_time else '---'}",
-        f"Checked By: {vehicle.checked_by or '---'}",
-        f"Remarks: {vehicle.remarks or '---'}",
-    ]
-    for line in lines:
-        p.drawString(60, y, line)
-        y -= 18
+    vehicle = get_object_or_404(VehicleRecord.objects.select_related('supplier'), pk=pk)
+
+    # the receipt digest is the ETag, so reprints of an unchanged record are
+    # answered with a 304 or straight from the on-disk cache
+    digest = receipt_digest(vehicle)
+    etag = f'"{digest}"'
+    path = cached_receipt(vehicle, digest)
+    last_modified = path.stat().st_mtime
+
+    response = get_conditional_response(request, etag=etag, last_modified=int(last_modified))
+    if response is None:
+        # only a receipt actually sent counts as printed, not a revalidation
+        VehicleRecord.objects.filter(pk=vehicle.pk).update(print_count=F('print_count') + 1)
+        response = FileResponse(open(path, 'rb'), content_type='application/pdf')
+        response['Content-Disposition'] = f'inline; filename="Vehicle_{vehicle.vehicle_number}.pdf"'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
 
-    # footer
-    p.setFont("Helvetica-Oblique", 9)
-    p.drawString(60, 80, f"Generated: {timezone.now().strftime('%Y-%m-%d %H:%M')}")
+# All checked receipts as one PDF, counted as printed with a single UPDATE
+@require_POST
+def vehicle_receipts_pdf(request):
+    pks = _selected_vehicles(request)
+    if pks is None:
+        return redirect('vehicle_list')
+    vehicles = list(VehicleRecord.objects.select_related('supplier').filter(pk__in=pks).order_by('entry_time', 'id'))
+    if not vehicles:
+        raise Http404
+    pdf = render_vehicle_receipts(vehicles)
+    VehicleRecord.objects.filter(pk__in=[v.pk for v in vehicles]).update(print_count=F('print_count') + 1)
 
-    p.showPage()
-    p.save()
-    pdf = buffer.getvalue()
-    buffer.close()
-    
     response = HttpResponse(pdf, content_type='application/pdf')
-    response['Content-Disposition'] = f'inline; filename="Vehicle_{vehicle.vehicle_number}.pdf"'
+    response['Content-Disposition'] = f'inline; filename="Vehicle_receipts_{timezone.localdate():%Y%m%d}.pdf"'
     return response
 
-
 # ------------------ PDF Test View ------------------
 
 def test_pdf(request):
@@ -325,82 +574,132 @@ def test_pdf(request):
     return response
 
 def generate_vehicle_pdf(request, record_id):
-    # Record fetch karo
-    record = VehicleRecord.objects.get(id=record_id)
-
-    # Response ko PDF banane ke liye set karo
-    response = HttpResponse(content_type='application/pdf')
+    record = get_object_or_404(VehicleRecord.objects.select_related('supplier'), id=record_id)
+    response = HttpResponse(render_vehicle_receipt(record), content_type='application/pdf')
     response['Content-Disposition'] = f'attachment; filename="vehicle_{record.id}.pdf"'
-
-    # ReportLab canvas banao
-    pdf = canvas.Canvas(response, pagesize=A4)
-    width, height = A4
-
-    # PDF me likhna start karo
-    pdf.setFont("Helvetica", 14)
-    pdf.drawString(100, 800, "Vehicle Record Report")
-    pdf.setFont("Helvetica", 12)
-
-    y = 760
-    pdf.drawString(100, y, f"Owner Name: {record.owner_name}")
-    y -= 20
-    pdf.drawString(100, y, f"Vehicle Number: {record.vehicle_number}")
-    y -= 20
-    pdf.drawString(100, y, f"Model: {record.model}")
-    y -= 20
-    pdf.drawString(100, y, f"Date Added: {record.date_added.strftime('%d-%m-%Y')}")
-
-    # PDF save karo
-    pdf.showPage()
-    pdf.save()
     return response
 
 def vehicle_report_pdf(request):
-    buffer = BytesIO()
-    p = canvas.Canvas(buffer, pagesize=A4)
-
-    p.setFont("Helvetica-Bold", 16)
-    p.drawString(200, 800, "Vehicle Records Report")
+    # optional filters: ?date_from=YYYY-MM-DD&date_to=YYYY-MM-DD&supplier=<id>
+    vehicles = vehicle_report_queryset(request.GET)
 
-    p.setFont("Helvetica", 12)
-    y = 770
-    vehicles = VehicleRecord.objects.all().order_by('-entry_time')
-
-    if not vehicles.exists():
-        p.drawString(100, y, "No vehicle records found.")
-    else:
-        for v in vehicles:
-            p.drawString(100, y, f"Vehicle No: {v.vehicle_number} | Driver: {v.driver_name}")
-            y -= 20
-            p.drawString(120, y, f"Supplier: {v.supplier} | Product: {v.product_type} | Qty: {v.quantity}")
-            y -= 20
-            p.drawString(120, y, f"Entry: {v.entry_time.strftime('%Y-%m-%d %H:%M')}")
-            if v.exit_time:
-                p.drawString(120, y-20, f"Exit: {v.exit_time.strftime('%Y-%m-%d %H:%M')}")
-                y -= 20
-            y -= 30
-
-            if y < 100:
-                p.showPage()
-                y = 770
-                p.setFont("Helvetica", 12)
-
-    p.showPage()
-    p.save()
-
-    pdf = buffer.getvalue()
-    buffer.close()
-    response = HttpResponse(pdf, content_type='application/pdf')
+    response = StreamingHttpResponse(vehicle_report_chunks(vehicles), content_type='application/pdf')
     response['Content-Disposition'] = 'inline; filename="vehicle_report.pdf"'
     return response
 
-# increment print counter
-    vehicle.print_count = (vehicle.print_count or 0) + 1
-    vehicle.save()
+# ------------------ Throughput Report ------------------
 
-    response = HttpResponse(pdf, content_type='application/pdf')
-    response['Content-Disposition'] = f'inline; filename=Vehicle_{vehicle.vehicle_number}.pdf'
-    return response
+# /reports/throughput/?group=day|supplier|product|vehicle_type&date_from=&date_to=&supplier=&product=
+# Reads only the daily summaries, never the vehicle records themselves.
+def throughput_report(request):
+    group, rows = throughput_rows(request.GET)
+    if request.GET.get('format') == 'json':
+        for row in rows:
+            row['quantity_total'] = str(row['quantity_total'])
+            row['dwell_total'] = row['dwell_total'].total_seconds()
+            row['average_dwell'] = row['average_dwell'].total_seconds() if row['average_dwell'] else None
+        return JsonResponse({'group': group, 'rows': rows})
+    return render(request, 'reports/throughput.html', {
+        'group': group,
+        'rows': rows,
+        'params': request.GET,
+        'suppliers': Supplier.objects.order_by('name').only('id', 'name'),
+    })
+
+# ------------------ Gate Dwell Analytics ------------------
+
+# /reports/dwell/?date_from=&date_to=&supplier=   (defaults to the last 90 days)
+# Figures come from dwell_stats (NumPy over the raw columns) and are cached
+# until a vehicle record changes.
+def dwell_dashboard(request):
+    params = request.GET.copy()
+    if not params.get('date_from') and not params.get('date_to'):
+        params['date_from'] = (timezone.localdate() - timedelta(days=90)).isoformat()
+    supplier = params.get('supplier', '')
+
+    vehicles = filter_date_range(VehicleRecord.objects.all(), 'entry_time', params)
+    if supplier.isdigit():
+        vehicles = vehicles.filter(supplier_id=supplier)
+
+    key = "blog:dwell:{}:{}:{}:{}".format(
+        model_versions('blog.VehicleRecord'), params.get('date_from', ''), params.get('date_to', ''), supplier,
+    )
+    stats = cache.get(key)
+    if stats is None:
+        try:
+            stats = dwell_stats(vehicles)
+        except ValueError as e:
+            messages.error(request, str(e))
+            stats = {}
+        else:
+            cache.set(key, stats, 3600)
+
+    if request.GET.get('format') == 'json':
+        return JsonResponse(stats)
+    names = dict(Supplier.objects.filter(
+        pk__in=[row['supplier_id'] for row in stats.get('suppliers', [])]
+    ).values_list('pk', 'name'))
+    for row in stats.get('suppliers', []):
+        row['name'] = names.get(row['supplier_id'])
+    return render(request, 'reports/dwell.html', {
+        'stats': stats,
+        'params': params,
+        'suppliers': Supplier.objects.order_by('name').only('id', 'name'),
+    })
+
+# ------------------ Delta Sync ------------------
+# /api/sync/?since=<cursor>&kinds=stock,vehicle&limit=
+# Start from since=0, then pass back the returned cursor; keep fetching
+# while "more" is true.
+def sync_changes(request):
+    try:
+        since = int(request.GET.get('since', 0))
+        limit = min(int(request.GET.get('limit', settings.SYNC_PAGE_SIZE)), settings.SYNC_PAGE_SIZE)
+    except ValueError:
+        return JsonResponse({'error': "since and limit must be integers"}, status=400)
+    kinds = [kind for kind in request.GET.get('kinds', '').split(',') if kind]
+    unknown = [kind for kind in kinds if kind not in FEEDS]
+    if unknown or limit < 1:
+        return JsonResponse({'error': f"kinds must be among {', '.join(FEEDS)} and limit positive"}, status=400)
+    return JsonResponse(changes_since(since, kinds, limit))
+
+# ------------------ Background PDF Jobs ------------------
+
+@require_POST
+def pdf_job_create(request):
+    kind = request.POST.get('kind')
+    if kind == 'receipt':
+        vehicle_id = request.POST.get('vehicle', '')
+        if not vehicle_id.isdigit():
+            return JsonResponse({'error': "vehicle must be a vehicle record id"}, status=400)
+        vehicle = get_object_or_404(VehicleRecord, pk=vehicle_id)
+        params = {'vehicle': vehicle.pk}
+    elif kind == 'report':
+        params = {k: request.POST[k] for k in ('date_from', 'date_to', 'supplier') if request.POST.get(k)}
+    else:
+        return JsonResponse({'error': "kind must be 'receipt' or 'report'"}, status=400)
+
+    job = enqueue_pdf_job(kind, params)
+    return JsonResponse(_pdf_job_json(job), status=202)
+
+def pdf_job_status(request, pk):
+    job = get_object_or_404(PdfJob, pk=pk)
+    return JsonResponse(_pdf_job_json(job))
+
+def pdf_job_download(request, pk):
+    job = get_object_or_404(PdfJob, pk=pk, status='done')
+    return FileResponse(job.file.open('rb'), content_type='application/pdf',
+                        filename=f"{job.kind}-{job.pk}.pdf")
+
+def _pdf_job_json(job):
+    return {
+        'id': job.pk,
+        'kind': job.kind,
+        'status': job.status,
+        'error': job.error,
+        'status_url': reverse('pdf_job_status', args=[job.pk]),
+        'download_url': reverse('pdf_job_download', args=[job.pk]) if job.status == 'done' else None,
+    }
 
 def custom_login(request):
     if request.method == 'POST':
@@ -437,4 +736,42 @@ def register(request):
             return redirect('custom_login')
     else:
         form = RegisterForm()
-    return render(request, 'accounts/register.html', {'form': form})
\ No newline at end of file
+    return render(request, 'accounts/register.html', {'form': form})
+
+# ------------------ Static Assets ------------------
+
+def static_asset(request, path):
+    """
+    Collected static files, served when DEBUG is off: the pre-compressed
+    .br/.gz copy when the client accepts it, with a year-long immutable
+    cache for content-hashed names.
+    """
+    try:
+        full_path = Path(safe_join(settings.STATIC_ROOT, path))
+    except SuspiciousFileOperation:
+        raise Http404
+    if not full_path.is_file():
+        raise Http404
+
+    served, encoding = full_path, None
+    accepted = request.headers.get('Accept-Encoding', '')
+    for suffix, name in (('.br', 'br'), ('.gz', 'gzip')):
+        candidate = full_path.with_name(full_path.name + suffix)
+        if name in accepted and candidate.is_file():
+            served, encoding = candidate, name
+            break
+
+    last_modified = int(full_path.stat().st_mtime)
+    response = get_conditional_response(request, last_modified=last_modified)
+    if response is None:
+        content_type, _ = mimetypes.guess_type(full_path.name)
+        response = FileResponse(served.open('rb'), content_type=content_type or 'application/octet-stream')
+        response['Last-Modified'] = http_date(last_modified)
+        if encoding:
+            response['Content-Encoding'] = encoding
+    patch_vary_headers(response, ['Accept-Encoding'])
+    if path in getattr(staticfiles_storage, 'hashed_files', {}).values():
+        patch_cache_control(response, public=True, max_age=365 * 24 * 3600, immutable=True)
+    else:
+        patch_cache_control(response, public=True, max_age=300)
+    return response
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 from django.contrib.messages import constants as messages
 
@@ -42,6 +43,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'blog.instrumentation.RequestTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -55,7 +57,8 @@ ROOT_URLCONF = 'myproject.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates, timing each render for the Server-Timing header
+        'BACKEND': 'blog.instrumentation.TimedDjangoTemplates',
         'DIRS': [BASE_DIR /"blog" / "templates",],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -75,12 +78,58 @@ WSGI_APPLICATION = 'myproject.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# Select the profile with DJANGO_DB=sqlite (default) or DJANGO_DB=postgres.
+DB_PROFILE = os.environ.get('DJANGO_DB', 'sqlite')
+
+if DB_PROFILE == 'postgres':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('POSTGRES_DB', 'petroleum_hub'),
+            'USER': os.environ.get('POSTGRES_USER', 'postgres'),
+            'PASSWORD': os.environ.get('POSTGRES_PASSWORD', ''),
+            'HOST': os.environ.get('POSTGRES_HOST', 'localhost'),
+            'PORT': os.environ.get('POSTGRES_PORT', '5432'),
+            # keep connections open between requests and drop dead ones
+            'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {},
+        }
+    }
+    if os.environ.get('DB_POOL'):
+        # psycopg connection pool; persistent connections must be off with it
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': 2,
+            'max_size': int(os.environ.get('DB_POOL_MAX', 10)),
+        }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+            'OPTIONS': {
+                # seconds a writer waits for the lock before "database is locked"
+                'timeout': 20,
+                # take the write lock when the transaction starts, so two
+                # writers never deadlock upgrading from a read lock
+                'transaction_mode': 'IMMEDIATE',
+            },
+        }
     }
+
+# Applied to every new SQLite connection (see blog.signals.tune_sqlite).
+SQLITE_PRAGMAS = {
+    'busy_timeout': 20000,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
 }
+# WAL lets readers run alongside the single writer, and synchronous=NORMAL
+# is safe in WAL mode and avoids an fsync per commit. Opt in with
+# SQLITE_WAL=1: journal_mode is stored in the database file itself, so it
+# would otherwise rewrite the checked-in db.sqlite3 on the first connection.
+if os.environ.get('SQLITE_WAL'):
+    SQLITE_PRAGMAS.update({'journal_mode': 'WAL', 'synchronous': 'NORMAL'})
 
 
 # Password validation
@@ -117,30 +166,131 @@ USE_TZ = True
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/5.2/howto/static-files/
 
-STATIC_URL = 'static/'
+STATIC_URL = '/static/'
+STATIC_ROOT = BASE_DIR / "staticfiles"
+
+# Link the self-hosted copies of Bootstrap, Font Awesome, Chart.js etc.
+# (blog/static/vendor/, written by `manage.py build_assets`) instead of
+# their CDNs. Turn on once those files are committed: with it on, a missing
+# copy is a system check error (blog.E002) and collectstatic refuses to run.
+VENDOR_ASSETS_LOCAL = os.environ.get('VENDOR_ASSETS_LOCAL') == '1'
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
-# Added manually
-STATICFILES_DIRS = [
-    BASE_DIR / "static",
-    "/var/www/static/",
-]
-import os
-from pathlib import Path
-
-BASE_DIR = Path(__file__).resolve().parent.parent
-# Static files (CSS, JavaScript, Images)
-STATIC_URL = '/static/'
-STATICFILES_DIRS = [BASE_DIR / "static"]
-STATIC_ROOT = BASE_DIR / "staticfiles"
-
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Outside DEBUG, collectstatic writes content-hashed names plus .gz/.br
+# copies (blog.storage) and blog.views.static_asset serves them with
+# far-future cache headers. Development keeps the plain names, which need
+# no collectstatic run.
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': (
+            'django.contrib.staticfiles.storage.StaticFilesStorage' if DEBUG
+            else 'blog.storage.CompressedManifestStaticFilesStorage'
+        ),
+    },
+}
+
+# DJANGO_CACHE=file (default) shares one cache directory between all worker
+# processes, so the model version counters behind ETags and fragment keys
+# agree everywhere. DJANGO_CACHE=locmem keeps a cache per process and is
+# only correct with a single worker; blog.E001 refuses it with DEBUG off.
+CACHE_PROFILE = os.environ.get('DJANGO_CACHE', 'file')
+
+if CACHE_PROFILE == 'file':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get('DJANGO_CACHE_DIR', BASE_DIR / "cache"),
+            'OPTIONS': {'MAX_ENTRIES': 20000},
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'OPTIONS': {'MAX_ENTRIES': 5000},
+        }
+    }
+
+# Full-page cache lifetime for the static marketing pages
+STATIC_PAGE_CACHE_SECONDS = 60 * 60
+
+# Dashboard counters are cached until a save/delete signal clears them;
+# the timeout is only a safety net for writes that bypass signals.
+DASHBOARD_METRICS_TIMEOUT = 300
+
+# Seconds between keep-alive comments on the low-stock event stream
+LOW_STOCK_HEARTBEAT = 15
+
+# Worker processes used by `manage.py pdf_worker`
+PDF_JOB_PROCESSES = 2
+
+# Seconds a PDF job may stay 'running' before pdf_worker assumes its worker
+# died and marks it failed
+PDF_JOB_TIMEOUT = 30 * 60
+
+# On-disk cache of rendered vehicle receipts (least recently used are evicted)
+PDF_CACHE_DIR = MEDIA_ROOT / "pdf_cache"
+PDF_CACHE_MAX_BYTES = 200 * 1024 * 1024
+
+# Requests reaching any of these limits (milliseconds, or a query count) are
+# written as JSON lines to SLOW_REQUEST_LOG; `manage.py slow_requests`
+# summarizes the worst endpoints.
+SLOW_REQUEST_THRESHOLDS = {
+    'total_ms': 500,
+    'sql_ms': 200,
+    'queries': 50,
+    'render_ms': 200,
+    'pdf_ms': 500,
+}
+SLOW_REQUEST_LOG = BASE_DIR / "logs" / "slow_requests.log"
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'slow_requests': {
+            'class': 'blog.instrumentation.SlowRequestFileHandler',
+            'filename': SLOW_REQUEST_LOG,
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 3,
+            'formatter': 'message',
+            'delay': True,
+        },
+    },
+    'loggers': {
+        'blog.instrumentation': {
+            'handlers': ['slow_requests'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
+
+# Most vehicles one batch exit or batch receipt request may select
+VEHICLE_BATCH_LIMIT = 500
+
+# Most change-log entries returned by one delta-sync request (/api/sync/)
+SYNC_PAGE_SIZE = 1000
+
+# Most open visits listed on the on-site board (/vehicles/on-site/)
+ON_SITE_BOARD_LIMIT = 500
+
+# Rows per page on the vehicle list and its "load more" endpoint
+VEHICLE_PAGE_SIZE = 50
+
 LOGIN_URL = '/accounts/login/'            # جب کوئی لاگ ان نہ ہو تو ری ڈائریکٹ
 LOGIN_REDIRECT_URL = '/'                  # لاگ ان کے بعد کہاں جانا ہے
 LOGOUT_REDIRECT_URL = '/'                 # لاگ آؤٹ کے بعد کہاں جانا ہے
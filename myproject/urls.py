@@ -14,8 +14,11 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.conf import settings
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
+
+from blog import views
 
 admin.site.site_header = "Petroleum Hub Institute"
 admin.site.site_title = "Petroleum Hub Institute Portal"
@@ -25,3 +28,10 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path("", include("blog.urls")),
 ]
+
+# runserver serves static files itself in DEBUG; otherwise use the
+# compressed, far-future cached copies from collectstatic
+if not settings.DEBUG:
+    urlpatterns += [
+        re_path(r'^%s(?P<path>.+)$' % settings.STATIC_URL.lstrip('/'), views.static_asset),
+    ]